@@ -1,12 +1,13 @@
 import json
-import aiohttp
-import ssl
-import certifi
+import time
 from config import (
     DEEPSEEK_API_KEY, DEEPSEEK_MODEL_NAME, DEEPSEEK_API_URL,
     GEMINI_API_KEY, GEMINI_MODEL_NAME, GEMINI_API_URL
 )
 from logger import log
+from metrics import AI_LATENCY
+from http_client import get_session
+from tracing import span
 
 async def _call_openai_compatible_api(api_key: str, api_url: str, model_name: str, system_prompt: str, user_prompt: str) -> str:
     """
@@ -32,21 +33,16 @@ async def _call_openai_compatible_api(api_key: str, api_url: str, model_name: st
         "temperature": 1.0 
     }
 
-    # Create SSL context with certifi
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
-
-    timeout = aiohttp.ClientTimeout(total=60)
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context), timeout=timeout) as session:
-        async with session.post(api_url, headers=headers, json=payload) as response:
-            if response.status == 200:
-                data = await response.json()
-                if 'choices' in data and len(data['choices']) > 0:
-                    return data['choices'][0]['message']['content']
-                else:
-                    raise ValueError(f"Invalid response format: {data}")
+    async with get_session('ai').post(api_url, headers=headers, json=payload) as response:
+        if response.status == 200:
+            data = await response.json()
+            if 'choices' in data and len(data['choices']) > 0:
+                return data['choices'][0]['message']['content']
             else:
-                error_text = await response.text()
-                raise ValueError(f"API Error {response.status}: {error_text}")
+                raise ValueError(f"Invalid response format: {data}")
+        else:
+            error_text = await response.text()
+            raise ValueError(f"API Error {response.status}: {error_text}")
 
 async def get_ai_interpretation(symbol: str, timeframe: str, signal_data: dict, previous_signal: dict = None) -> tuple[str, str]:
     """
@@ -111,24 +107,36 @@ This is a new signal alert.
 """
 
     # --- Attempt 1: Gemini ---
+    start = time.perf_counter()
     try:
-        log.info(f"Attempting AI interpretation for {symbol} using Gemini...")
-        interpretation = await _call_openai_compatible_api(
-            GEMINI_API_KEY, GEMINI_API_URL, GEMINI_MODEL_NAME, system_prompt, user_prompt
-        )
-        log.info(f"Successfully received AI interpretation for {symbol} using Gemini.")
+        # outcome is switched to "success" once the call returns
+        with span("llm", provider="gemini", outcome="error") as llm_span:
+            log.info("Attempting AI interpretation for %s using Gemini...", symbol)
+            interpretation = await _call_openai_compatible_api(
+                GEMINI_API_KEY, GEMINI_API_URL, GEMINI_MODEL_NAME, system_prompt, user_prompt
+            )
+            llm_span.set(outcome="success")
+        AI_LATENCY.observe(time.perf_counter() - start, provider="gemini", outcome="success")
+        log.info("Successfully received AI interpretation for %s using Gemini.", symbol)
         return interpretation, GEMINI_MODEL_NAME
     except Exception as e:
-        log.warning(f"Gemini API failed: {e}. Falling back to DeepSeek.")
+        AI_LATENCY.observe(time.perf_counter() - start, provider="gemini", outcome="error")
+        log.warning("Gemini API failed: %s. Falling back to DeepSeek.", e)
 
     # --- Attempt 2: DeepSeek ---
+    start = time.perf_counter()
     try:
-        log.info(f"Attempting AI interpretation for {symbol} using DeepSeek...")
-        interpretation = await _call_openai_compatible_api(
-            DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL_NAME, system_prompt, user_prompt
-        )
-        log.info(f"Successfully received AI interpretation for {symbol} using DeepSeek.")
+        # outcome is switched to "success" once the call returns
+        with span("llm", provider="deepseek", outcome="error") as llm_span:
+            log.info("Attempting AI interpretation for %s using DeepSeek...", symbol)
+            interpretation = await _call_openai_compatible_api(
+                DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL_NAME, system_prompt, user_prompt
+            )
+            llm_span.set(outcome="success")
+        AI_LATENCY.observe(time.perf_counter() - start, provider="deepseek", outcome="success")
+        log.info("Successfully received AI interpretation for %s using DeepSeek.", symbol)
         return interpretation, DEEPSEEK_MODEL_NAME
     except Exception as e:
-        log.error(f"DeepSeek API also failed: {e}. AI interpretation unavailable.")
+        AI_LATENCY.observe(time.perf_counter() - start, provider="deepseek", outcome="error")
+        log.error("DeepSeek API also failed: %s. AI interpretation unavailable.", e)
         return f"AI interpretation unavailable. (Gemini Error: Check logs, DeepSeek Error: {e})", "None"
@@ -0,0 +1,161 @@
+import asyncio
+import heapq
+import itertools
+import math
+from config import AI_WORKERS, AI_REQUEST_SPACING_SECONDS, AI_EXPIRED_POLICY, AI_INDICATOR_PRIORITY
+from candle_store import TIMEFRAME_MS
+from clock import clock
+from logger import log
+from metrics import AI_QUEUE_DEPTH, AI_QUEUE_WAIT, AI_QUEUE_EXPIRED
+from tracing import start_span, use_span
+
+EXPIRED_POLICIES = ("send", "drop")
+
+def _timeframe_steps(timeframe: str):
+    """Candle lengths (ms) of a timeframe or a confluence label such as "15m+1h"."""
+    return [TIMEFRAME_MS[tf] for tf in timeframe.split('+') if tf in TIMEFRAME_MS] or [TIMEFRAME_MS['15m']]
+
+def signal_candle_close(timeframe: str, now: float) -> float:
+    """Latest candle close (of the lowest timeframe) at `now`, in epoch seconds."""
+    step = min(_timeframe_steps(timeframe)) / 1000
+    return math.floor(now / step) * step
+
+def signal_deadline(timeframe: str, now: float) -> float:
+    """Close of the candle (of the lowest timeframe) the signal fired in, in epoch seconds."""
+    return signal_candle_close(timeframe, now) + min(_timeframe_steps(timeframe)) / 1000
+
+def signal_priority(timeframe: str, signal: dict, now: float, deadline: float) -> float:
+    """
+    Higher is more urgent: log2 of the (highest) timeframe in minutes, the indicator's
+    AI_INDICATOR_PRIORITY weight, one point per extra confluence component and up to one
+    point of recency (the share of the candle still ahead).
+    """
+    steps = _timeframe_steps(timeframe)
+    primary = signal.get('primary_signal', {})
+    score = math.log2(max(steps) / 60_000)
+    score += AI_INDICATOR_PRIORITY.get(primary.get('indicator'), 1.0)
+    score += max(len(primary.get('components', ())) - 1, 0)
+    score += max(deadline - now, 0.0) / (min(steps) / 1000)
+    return score
+
+class AIRequest:
+    __slots__ = ("priority", "deadline", "enqueued_at", "symbol", "timeframe", "signal", "previous_signal", "span", "wait_span")
+
+    def __init__(self, priority, deadline, enqueued_at, symbol, timeframe, signal, previous_signal, span):
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = enqueued_at
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.signal = signal
+        self.previous_signal = previous_signal
+        # The signal's trace span, ended once it is delivered or dropped
+        self.span = span
+        self.wait_span = start_span("ai_queue_wait", parent=span)
+
+class AIQueue:
+    """
+    Priority queue in front of the AI interpretation step.
+
+    `deliver(symbol, timeframe, signal, previous_signal, interpret)` is awaited for every request,
+    most urgent first. A request taken after its deadline is sent with `interpret=False` or dropped,
+    depending on `expired_policy`. With `start()` the queue is served by background workers across
+    cycles; otherwise `drain()` serves it inline.
+    """
+    def __init__(self, deliver, workers: int = AI_WORKERS, spacing: float = AI_REQUEST_SPACING_SECONDS,
+                 expired_policy: str = AI_EXPIRED_POLICY, now=clock.now):
+        if expired_policy not in EXPIRED_POLICIES:
+            raise ValueError(f"Unknown expired policy '{expired_policy}', expected one of {EXPIRED_POLICIES}.")
+        self.deliver = deliver
+        self.workers = max(1, workers)
+        self.spacing = spacing
+        self.expired_policy = expired_policy
+        self.now = now
+        self._heap = []
+        self._seq = itertools.count()
+        self._tasks = []
+        self._wakeup = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def submit(self, symbol: str, timeframe: str, signal: dict, previous_signal=None, span=None):
+        """Queues a signal that passed cooldown. `span` is its trace span (see tracing.py)."""
+        now = self.now()
+        deadline = signal_deadline(timeframe, now)
+        priority = signal_priority(timeframe, signal, now, deadline)
+        request = AIRequest(priority, deadline, now, symbol, timeframe, signal, previous_signal, span)
+        heapq.heappush(self._heap, (-priority, next(self._seq), request))
+        AI_QUEUE_DEPTH.set(len(self._heap))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop(self):
+        request = heapq.heappop(self._heap)[2]
+        AI_QUEUE_DEPTH.set(len(self._heap))
+        return request
+
+    async def _serve(self, request):
+        with use_span(request.span):
+            request.wait_span.end()
+            delivered = await self._deliver(request)
+        if request.span is not None:
+            request.span.end(outcome="dropped" if delivered is None else "interpreted" if delivered else "sent_without_ai")
+        return delivered
+
+    async def _deliver(self, request):
+        """Delivers one request; returns whether it was interpreted, or None if it was dropped."""
+        now = self.now()
+        AI_QUEUE_WAIT.observe(now - request.enqueued_at)
+        interpret = now < request.deadline
+        if not interpret:
+            AI_QUEUE_EXPIRED.inc(policy=self.expired_policy)
+            log.info("AI queue: %s (%s) %s expired %.0fs ago; %s.", request.symbol, request.timeframe,
+                     request.signal['primary_signal'].get('indicator'), now - request.deadline,
+                     "dropping it" if self.expired_policy == "drop" else "sending without AI analysis")
+            if self.expired_policy == "drop":
+                return None
+        try:
+            await self.deliver(request.symbol, request.timeframe, request.signal, request.previous_signal, interpret)
+        except Exception as e:
+            log.error("AI queue: delivery for %s (%s) failed: %s", request.symbol, request.timeframe, e)
+        return interpret
+
+    async def _drain_worker(self):
+        while self._heap:
+            if await self._serve(self._pop()):
+                await asyncio.sleep(self.spacing)
+
+    async def drain(self):
+        """Serves everything queued so far with `workers` concurrent consumers, then returns."""
+        await asyncio.gather(*[self._drain_worker() for _ in range(min(self.workers, len(self._heap)))])
+
+    async def _worker(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if await self._serve(self._pop()):
+                # Small delay to avoid hitting rate limits if multiple signals trigger at once
+                await asyncio.sleep(self.spacing)
+
+    def start(self):
+        """Starts the background workers on the running loop."""
+        self._wakeup = asyncio.Event()
+        if self._heap:
+            self._wakeup.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        log.info("AI queue: %d worker(s), expired signals are %s.", self.workers,
+                 "dropped" if self.expired_policy == "drop" else "sent without AI analysis")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
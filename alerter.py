@@ -1,22 +1,14 @@
-import aiohttp
-import json
-import ssl
-import certifi
 import asyncio
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from config import LARK_WEBHOOK_URL, WX_WEBHOOK_URL, WX_WEBHOOK_AUTH
 from logger import log
+from metrics import ALERT_SEND_LATENCY
+from http_client import get_session
+from tracing import span
 
-async def send_wx_alert(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str = "Unknown AI", timestamp: datetime = None):
-    """
-    Sends a simple text alert to the WX webhook.
-    """
-    webhook_url = WX_WEBHOOK_URL
-    if not webhook_url:
-        log.warning("WX webhook URL not set. Skipping WX alert.")
-        return
-
+def _build_wx_message(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str, timestamp: datetime = None):
+    """Builds the WX webhook payload and headers."""
     alert_time = timestamp if timestamp else datetime.utcnow()
     primary = signal_data.get('primary_signal', {})
     signal_type = primary.get('signal_type', 'N/A')
@@ -26,7 +18,7 @@ async def send_wx_alert(symbol: str, timeframe: str, signal_data: dict, ai_inter
     
     # Format metrics
     metrics = []
-    excluded_keys = ['indicator', 'signal_type', 'thresholds_used', 'confirmation_candle']
+    excluded_keys = ['indicator', 'signal_type', 'thresholds_used', 'confirmation_candle', 'components']
     for k, v in primary.items():
         if k not in excluded_keys:
             metrics.append(f"{k}: {v}")
@@ -45,18 +37,29 @@ async def send_wx_alert(symbol: str, timeframe: str, signal_data: dict, ai_inter
         "Authorization": WX_WEBHOOK_AUTH,
         "Content-Type": "application/json"
     }
-    
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    return payload, headers
+
+async def send_wx_alert(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str = "Unknown AI", timestamp: datetime = None):
+    """
+    Sends a simple text alert to the WX webhook.
+    """
+    webhook_url = WX_WEBHOOK_URL
+    if not webhook_url:
+        log.warning("WX webhook URL not set. Skipping WX alert.")
+        return
+
+    with span("card_render", channel="wx"):
+        payload, headers = _build_wx_message(symbol, timeframe, signal_data, ai_interpretation, model_name, timestamp)
     
     try:
-        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-            async with session.post(webhook_url, json=payload, headers=headers) as response:
+        with ALERT_SEND_LATENCY.time(channel='wx'), span("webhook_post", channel="wx"):
+            async with get_session('webhook').post(webhook_url, json=payload, headers=headers) as response:
                 if response.status == 200:
-                    log.info(f"WX alert for {symbol} sent successfully.")
+                    log.info("WX alert for %s sent successfully.", symbol)
                 else:
-                    log.error(f"Error sending WX alert: HTTP {response.status}")
+                    log.error("Error sending WX alert: HTTP %s", response.status)
     except Exception as e:
-        log.error(f"Exception sending WX alert for {symbol}: {e}")
+        log.error("Exception sending WX alert for %s: %s", symbol, e)
 
 async def send_all_alerts(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str = "Unknown AI", timestamp: datetime = None):
     """
@@ -75,15 +78,8 @@ async def send_all_alerts(symbol: str, timeframe: str, signal_data: dict, ai_int
     if tasks:
         await asyncio.gather(*tasks)
 
-async def send_lark_alert(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str = "Unknown AI", timestamp: datetime = None):
-    """
-    构建并发送一个美化后的 Lark (飞书) 交互式卡片消息
-    """
-    webhook_url = LARK_WEBHOOK_URL
-    if not webhook_url:
-        log.warning("Lark webhook URL not set. Cannot send alert.")
-        return
-    
+def _build_lark_card(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str, timestamp: datetime = None):
+    """Builds the Lark interactive card message."""
     alert_time = timestamp if timestamp else datetime.utcnow()
     # 提取数据
     primary = signal_data.get('primary_signal', {})
@@ -104,7 +100,7 @@ async def send_lark_alert(symbol: str, timeframe: str, signal_data: dict, ai_int
     # 2. 构建核心指标列 (Column Set)
     # 筛选出一些关键字段展示在网格中
     key_metrics = []
-    excluded_keys = ['indicator', 'signal_type', 'thresholds_used', 'confirmation_candle']
+    excluded_keys = ['indicator', 'signal_type', 'thresholds_used', 'confirmation_candle', 'components']
     
     for k, v in primary.items():
         if k not in excluded_keys:
@@ -273,20 +269,30 @@ async def send_lark_alert(symbol: str, timeframe: str, signal_data: dict, ai_int
         "msg_type": "interactive",
         "card": card
     }
+    return payload
 
-    # Create SSL context with certifi
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
+async def send_lark_alert(symbol: str, timeframe: str, signal_data: dict, ai_interpretation: str, model_name: str = "Unknown AI", timestamp: datetime = None):
+    """
+    构建并发送一个美化后的 Lark (飞书) 交互式卡片消息
+    """
+    webhook_url = LARK_WEBHOOK_URL
+    if not webhook_url:
+        log.warning("Lark webhook URL not set. Cannot send alert.")
+        return
     
+    with span("card_render", channel="lark"):
+        payload = _build_lark_card(symbol, timeframe, signal_data, ai_interpretation, model_name, timestamp)
+
     try:
-        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-            async with session.post(webhook_url, json=payload) as response:
+        with ALERT_SEND_LATENCY.time(channel='lark'), span("webhook_post", channel="lark"):
+            async with get_session('webhook').post(webhook_url, json=payload) as response:
                 if response.status == 200:
                     data = await response.json()
                     if data.get("code") == 0:
-                        log.info(f"Lark alert for {symbol} sent successfully.")
+                        log.info("Lark alert for %s sent successfully.", symbol)
                     else:
-                        log.error(f"Lark API returned error: {data}")
+                        log.error("Lark API returned error: %s", data)
                 else:
-                    log.error(f"Error sending Lark alert: HTTP {response.status}")
+                    log.error("Error sending Lark alert: HTTP %s", response.status)
     except Exception as e:
-        log.error(f"Exception sending Lark alert for {symbol}: {e}")
+        log.error("Exception sending Lark alert for %s: %s", symbol, e)
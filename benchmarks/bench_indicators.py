@@ -0,0 +1,54 @@
+import numpy as np
+import indicators
+import kernels
+from indicators import BaseSignal, _create_market_snapshot
+from benchmarks.harness import benchmark
+
+def _fresh_frames(fixtures):
+    return [df for _, _, df in fixtures.frames()]
+
+def _register_checker(signal_class):
+    checker = signal_class()
+
+    @benchmark(f"indicators.{signal_class.__name__}.check", setup=_fresh_frames)
+    def bench_check(frames):
+        for df in frames:
+            checker.check(df)
+
+for _obj in list(vars(indicators).values()):
+    if isinstance(_obj, type) and issubclass(_obj, BaseSignal) and _obj is not BaseSignal:
+        _register_checker(_obj)
+
+_SNAPSHOT_SIGNAL = {"indicator": "Benchmark", "signal_type": "Bullish Benchmark", "current_price": "0"}
+
+@benchmark("indicators._create_market_snapshot", setup=_fresh_frames)
+def bench_market_snapshot(frames):
+    for df in frames:
+        _create_market_snapshot(df, _SNAPSHOT_SIGNAL)
+
+def _kernel_inputs(fixtures):
+    """Float64 price / ATR / RSI arrays per series, as the checkers hand them to the kernels."""
+    inputs = []
+    indicators._require_ta()
+    for _, _, df in fixtures.frames():
+        df.ta.atr(length=14, append=True)
+        df.ta.rsi(length=indicators.RSI_LENGTH, append=True)
+        prices = indicators._price_arrays(df)
+        atr = df['ATRr_14'].to_numpy(dtype=np.float64)
+        rsi = df[f'RSI_{indicators.RSI_LENGTH}'].to_numpy(dtype=np.float64)
+        inputs.append((prices, atr, rsi))
+    return inputs
+
+def _register_kernels(backend, fvg, divergence, order_block):
+    @benchmark(f"kernels.scan_all [{backend}]", setup=_kernel_inputs)
+    def bench_kernels(inputs):
+        for (open_, high, low, close), atr, rsi in inputs:
+            fvg(open_, high, low, close, indicators.FVG_LOOKBACK)
+            divergence(low, high, rsi, indicators.RSI_DIVERGENCE_WINDOW)
+            order_block(open_, high, low, close, atr, float(indicators.OB_ATR_MULTIPLIER), indicators.OB_LOOKBACK)
+
+# Both kernel backends side by side: the uncompiled loops, and the Numba build when it is installed
+_register_kernels("numpy", kernels._fvg_scan, kernels._divergence_scan, kernels._order_block_scan)
+if kernels.numba_module() is not None:
+    _register_kernels("numba", kernels.jit(kernels._fvg_scan), kernels.jit(kernels._divergence_scan),
+                      kernels.jit(kernels._order_block_scan))
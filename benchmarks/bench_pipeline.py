@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from data_fetcher import build_market_dataframe, _loads
+from state_manager import SignalStateManager
+from live_candles import EvaluationTracker
+from benchmarks.harness import benchmark
+
+@benchmark("data_fetcher.build_market_dataframe", setup=lambda fixtures: fixtures.recordings)
+def bench_frame_build(recordings):
+    for rec in recordings:
+        build_market_dataframe(rec['klines'], rec['oi'], rec['ls'])
+
+def _candidate_signals(fixtures):
+    """A cycle's worth of candidate signals: each series fires every indicator, FVGs and OBs with price zones."""
+    signals = []
+    for rec in fixtures.recordings:
+        for indicator, signal_type in [("Fair Value Gap Rebalance", "Bullish Reversal Confirmation"),
+                                       ("Order Block", "Bearish OB Retest"),
+                                       ("Volume Spike", "Bullish Volume Spike"),
+                                       ("Bollinger Bands Breakout", "Bullish Breakout"),
+                                       ("RSI Divergence", "Bearish Divergence")]:
+            primary = {"indicator": indicator, "signal_type": signal_type, "current_price": rec['klines'][-1][4]}
+            if indicator == "Fair Value Gap Rebalance":
+                primary.update({"fvg_top": rec['klines'][-3][2], "fvg_bottom": rec['klines'][-3][3], "confirmation_candle": "Hammer"})
+            elif indicator == "Order Block":
+                primary.update({"ob_top": rec['klines'][-10][2], "ob_bottom": rec['klines'][-10][3]})
+            signals.append((rec['symbol'], rec['timeframe'], {"primary_signal": primary}))
+    return signals
+
+def _state_manager_setup(fixtures):
+    state_dir = tempfile.mkdtemp(prefix="bench_state_")
+    manager = SignalStateManager(os.path.join(state_dir, "signal_state.json"))
+    signals = _candidate_signals(fixtures)
+    # Prime the state so the timed pass exercises the cooldown (suppression) path, the common case.
+    for symbol, timeframe, signal in signals:
+        manager.should_send_alert(symbol, timeframe, signal)
+    return manager, signals
+
+@benchmark("state_manager.SignalStateManager.should_send_alert", setup=_state_manager_setup)
+def bench_should_send_alert(args):
+    manager, signals = args
+    for symbol, timeframe, signal in signals:
+        manager.should_send_alert(symbol, timeframe, signal)
+
+@benchmark("state_manager.SignalStateManager.evaluate_signals (batch)", setup=_state_manager_setup)
+def bench_evaluate_signals(args):
+    manager, signals = args
+    manager.evaluate_signals(signals)
+
+def _run_check_setup(fixtures):
+    import main
+
+    state_dir = tempfile.mkdtemp(prefix="bench_run_check_")
+    main.state_manager = SignalStateManager(os.path.join(state_dir, "signal_state.json"))
+    market_data = fixtures.market_data()
+
+    async def mock_fetcher():
+        return market_data
+
+    return main, mock_fetcher
+
+@benchmark("main.run_check (offline)", setup=_run_check_setup, rounds=5)
+async def bench_run_check(args):
+    main, mock_fetcher = args
+    # Same data every round: forget evaluated candles so each round does a full pass
+    main.evaluation_tracker = EvaluationTracker()
+    await main.run_check(mock_fetcher, deliver_alerts=False)
+
+def _encoded_responses(fixtures):
+    """Raw response bodies as they arrive off the wire."""
+    return [tuple(json.dumps(rec[kind]).encode('utf-8') for kind in ('klines', 'oi', 'ls')) for rec in fixtures.recordings]
+
+@benchmark("data_fetcher.decode_and_build (raw bytes)", setup=_encoded_responses)
+def bench_decode_and_build(bodies):
+    for klines_raw, oi_raw, ls_raw in bodies:
+        build_market_dataframe(_loads(klines_raw), _loads(oi_raw), _loads(ls_raw))
+
+@benchmark("main.run_check (offline, panel)", setup=_run_check_setup, rounds=5)
+async def bench_run_check_panel(args):
+    main, mock_fetcher = args
+    main.evaluation_tracker = EvaluationTracker()
+    await main.run_check(mock_fetcher, deliver_alerts=False, evaluation_mode='panel')
+
+def _panel_setup(fixtures):
+    from main import signal_checkers
+    by_timeframe = {}
+    for symbol, timeframe_data in fixtures.market_data().items():
+        for timeframe, series in timeframe_data.items():
+            by_timeframe.setdefault(timeframe, {})[symbol] = series
+    return by_timeframe, signal_checkers
+
+@benchmark("panel.panel_candidates", setup=_panel_setup)
+def bench_panel_candidates(args):
+    from panel import panel_candidates
+    by_timeframe, checkers = args
+    for series_by_symbol in by_timeframe.values():
+        panel_candidates(series_by_symbol, checkers)
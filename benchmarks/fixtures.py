@@ -0,0 +1,60 @@
+import numpy as np
+from config import DATA_FETCH_LIMIT
+
+TIMEFRAME_MS = {'15m': 900_000, '1h': 3_600_000, '4h': 14_400_000}
+DEFAULT_SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT"]
+
+def synthetic_recording(symbol: str, timeframe: str, rows: int = DATA_FETCH_LIMIT, seed: int = 0):
+    """
+    Generates raw Binance-shaped klines / OI / L/S responses (strings where Binance sends strings)
+    for a random-walk market, so the benchmarks exercise exactly the live parsing path.
+    """
+    rng = np.random.default_rng(seed)
+    step = TIMEFRAME_MS[timeframe]
+    start = 1_700_000_000_000 // step * step
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, rows)))
+    volume = np.abs(rng.normal(1000, 300, rows))
+    taker_buy = volume * rng.uniform(0.3, 0.7, rows)
+    oi = 1e8 * (1 + np.cumsum(rng.normal(0, 0.002, rows)))
+    ls = rng.uniform(0.8, 1.2, rows)
+
+    klines, oi_data, ls_data = [], [], []
+    for i in range(rows):
+        ts = start + i * step
+        klines.append([ts, f"{open_[i]:.4f}", f"{high[i]:.4f}", f"{low[i]:.4f}", f"{close[i]:.4f}", f"{volume[i]:.3f}",
+                       ts + step - 1, f"{volume[i] * close[i]:.2f}", 100, f"{taker_buy[i]:.3f}", f"{taker_buy[i] * close[i]:.2f}", "0"])
+        oi_data.append({"symbol": symbol, "sumOpenInterest": f"{oi[i] / close[i]:.3f}", "sumOpenInterestValue": f"{oi[i]:.2f}", "timestamp": ts})
+        ls_data.append({"symbol": symbol, "longShortRatio": f"{ls[i]:.4f}", "longAccount": "0.5", "shortAccount": "0.5", "timestamp": ts})
+    return {"symbol": symbol, "timeframe": timeframe, "klines": klines, "oi": oi_data, "ls": ls_data}
+
+class Fixtures:
+    """
+    Raw recordings (recorded with MARKET_DATA_RECORD_DIR, or synthetic) plus helpers to build fresh frames.
+    """
+    def __init__(self, recorded_dir: str = None, symbols=DEFAULT_SYMBOLS, timeframes=tuple(TIMEFRAME_MS)):
+        if recorded_dir:
+            from market_replay import load_raw_market_data
+            self.source = f"recorded:{recorded_dir}"
+            self.recordings = [r for r in load_raw_market_data(recorded_dir) if r.get('klines')]
+        else:
+            self.source = "synthetic"
+            self.recordings = [
+                synthetic_recording(symbol, timeframe, seed=seed)
+                for seed, (symbol, timeframe) in enumerate((s, tf) for s in symbols for tf in timeframes)
+            ]
+
+    def frames(self):
+        """Builds a fresh list of (symbol, timeframe, DataFrame); checkers mutate frames, so never reuse them."""
+        from data_fetcher import build_market_dataframe
+        return [(r['symbol'], r['timeframe'], build_market_dataframe(r['klines'], r['oi'], r['ls'])) for r in self.recordings]
+
+    def market_data(self):
+        """Fresh candle series in the {symbol: {timeframe: CandleSeries}} shape returned by get_all_binance_data_async."""
+        from data_fetcher import build_candle_series
+        data = {}
+        for r in self.recordings:
+            data.setdefault(r['symbol'], {})[r['timeframe']] = build_candle_series(r['symbol'], r['timeframe'], r['klines'], r['oi'], r['ls'])
+        return data
@@ -0,0 +1,72 @@
+import asyncio
+import inspect
+import json
+import statistics
+import time
+
+# name -> (target, setup, rounds)
+_BENCHMARKS = {}
+
+def benchmark(name: str, setup=None, rounds: int = 10):
+    """
+    Registers a benchmark. `setup(fixtures)` runs untimed before every round and its result is
+    passed to the target; only the target is timed. Async targets are awaited on a private loop.
+    """
+    def decorator(target):
+        _BENCHMARKS[name] = (target, setup, rounds)
+        return target
+    return decorator
+
+def run_benchmarks(fixtures, name_filter: str = None, rounds_override: int = None):
+    """Runs the registered benchmarks and returns {name: {median, min, mean, rounds}} in seconds."""
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for name, (target, setup, rounds) in _BENCHMARKS.items():
+            if name_filter and name_filter not in name:
+                continue
+            rounds = rounds_override or rounds
+            timings = []
+            for _ in range(rounds):
+                arg = setup(fixtures) if setup else fixtures
+                start = time.perf_counter()
+                if inspect.iscoroutinefunction(target):
+                    loop.run_until_complete(target(arg))
+                else:
+                    target(arg)
+                timings.append(time.perf_counter() - start)
+            results[name] = {
+                "median": statistics.median(timings),
+                "min": min(timings),
+                "mean": statistics.fmean(timings),
+                "rounds": rounds,
+            }
+            print(f"{name:<55} median {results[name]['median'] * 1000:>10.3f} ms   min {results[name]['min'] * 1000:>10.3f} ms")
+    finally:
+        loop.close()
+    return results
+
+def save_baseline(results, path: str, source: str):
+    with open(path, 'w') as f:
+        json.dump({"source": source, "results": results}, f, indent=2, sort_keys=True)
+
+def compare_to_baseline(results, path: str, tolerance: float):
+    """
+    Compares medians with the stored baseline. Returns the names that regressed by more than `tolerance`.
+    """
+    with open(path, 'r') as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'benchmark':<55} {'baseline ms':>12} {'current ms':>12} {'change':>9}")
+    for name, current in results.items():
+        if name not in baseline:
+            print(f"{name:<55} {'-':>12} {current['median'] * 1000:>12.3f} {'new':>9}")
+            continue
+        base = baseline[name]["median"]
+        change = (current["median"] - base) / base if base > 0 else 0.0
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{name:<55} {base * 1000:>12.3f} {current['median'] * 1000:>12.3f} {change:>+8.1%}{flag}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
@@ -0,0 +1,67 @@
+"""
+Startup cost of the bot: how long a fresh interpreter takes to `import main`, and where that time goes
+(parsed from `python -X importtime`).
+
+    python -m benchmarks.import_time [--module main] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from benchmarks.harness import benchmark
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _import_in_fresh_interpreter(module: str, *flags):
+    return subprocess.run([sys.executable, *flags, "-c", f"import {module}"], cwd=REPO_ROOT,
+                          capture_output=True, text=True, check=True)
+
+def import_breakdown(module: str = "main"):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns [(name, depth, self_us, cumulative_us)] in the order the interpreter reports them.
+    """
+    result = _import_in_fresh_interpreter(module, "-X", "importtime")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def format_breakdown(entries, module: str = "main", top: int = 15) -> str:
+    """Total import time, the heaviest direct imports of `module` and the heaviest modules by self time."""
+    position = next((i for i, entry in enumerate(entries) if entry[0] == module), None)
+    if position is None:
+        return f"{module} was not imported"
+    _, target_depth, _, total = entries[position]
+    # -X importtime lists a module right after its own imports, which are one indentation level deeper
+    own = []
+    for entry in reversed(entries[:position]):
+        if entry[1] <= target_depth:
+            break
+        own.append(entry)
+    direct = [e for e in own if e[1] == target_depth + 1]
+    lines = [f"import {module}: {total / 1000:.1f} ms", "", "Heaviest direct imports (cumulative):"]
+    for name, _, _, cumulative in sorted(direct, key=lambda e: e[3], reverse=True)[:top]:
+        lines.append(f"  {name:<40} {cumulative / 1000:8.1f} ms")
+    lines += ["", "Heaviest modules (self):"]
+    for name, _, self_us, _ in sorted(own, key=lambda e: e[2], reverse=True)[:top]:
+        lines.append(f"  {name:<40} {self_us / 1000:8.1f} ms")
+    return "\n".join(lines)
+
+@benchmark("startup.import main (fresh interpreter)", rounds=5)
+def bench_import_main(_fixtures):
+    _import_in_fresh_interpreter("main")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import-time breakdown of a bot module.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    print(format_breakdown(import_breakdown(args.module), args.module, args.top))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Load-test driver: runs the bot's check cycle against the local mock server with a large symbol universe
+and reports throughput, cycle latency and memory.
+
+    python -m benchmarks.load_test --symbols 2000 --cycles 3 --llm-latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the signal bot against the mock server.")
+    parser.add_argument("--symbols", type=int, default=1000, help="Number of symbols to monitor.")
+    parser.add_argument("--cycles", type=int, default=3, help="Number of run_check cycles.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--external-mock", action="store_true",
+                        help="Use a mock server already running on --port (e.g. one shared by several shards).")
+    parser.add_argument("--recorded", metavar="DIR", help="Replay recordings from DIR (default: synthetic series).")
+    parser.add_argument("--binance-latency", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--no-deliver", action="store_true", help="Skip AI calls and alerts (detection only).")
+    parser.add_argument("--tracemalloc", action="store_true", help="Track Python heap peak (slower).")
+    parser.add_argument("--check-recording", action="store_true",
+                        help="Record market data while running, then check every recording replays a full window.")
+    return parser.parse_args()
+
+def configure_environment(args):
+    """Points every external endpoint at the mock server. Must run before any bot module is imported."""
+    base = f"http://127.0.0.1:{args.port}"
+    state_dir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.update({
+        "BINANCE_BASE_URL": base,
+        "GEMINI_API_URL": f"{base}/v1/chat/completions",
+        "GEMINI_API_KEY": "mock",
+        "DEEPSEEK_API_URL": f"{base}/chat/completions",
+        "DEEPSEEK_API_KEY": "mock",
+        "LARK_WEBHOOK_URL": f"{base}/lark",
+        "WX_WEBHOOK_URL": f"{base}/wxsend",
+        "SOCKS5_PROXY": "",
+        "METRICS_ENABLED": "true",
+        "SIGNAL_STATE_FILE": os.path.join(state_dir, "signal_state.json"),
+        "CVD_STATE_FILE": os.path.join(state_dir, "cvd_state.json"),
+    })
+    if args.check_recording:
+        os.environ["MARKET_DATA_RECORD_DIR"] = os.path.join(state_dir, "recordings")
+
+async def run(args):
+    import logging
+    import data_fetcher
+    import main
+    import metrics
+    from logger import log
+    from http_client import close_sessions
+    from sharding import filter_symbols_for_shard
+    from candle_store import candle_store
+    from benchmarks.mock_server import MockServerState, load_recordings, start_mock_server
+
+    log.setLevel(logging.WARNING)
+    state = runner = None
+    if not args.external_mock:
+        state = MockServerState(load_recordings(args.recorded), args.binance_latency, args.llm_latency, args.llm_error_rate)
+        runner = await start_mock_server(state, port=args.port)
+
+    # The mock maps any symbol onto a recorded series, so a synthetic universe of any size works.
+    data_fetcher.MAJOR_COINS = [f"LOAD{i:05d}USDT" for i in range(args.symbols)]
+    data_fetcher.ENABLE_DYNAMIC_SCAN = False
+    if state is not None:
+        state.universe = data_fetcher.MAJOR_COINS
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    cycle_times = []
+    try:
+        for cycle in range(1, args.cycles + 1):
+            start = time.perf_counter()
+            await main.run_check(deliver_alerts=not args.no_deliver)
+            elapsed = time.perf_counter() - start
+            cycle_times.append(elapsed)
+            print(f"cycle {cycle}: {elapsed:.2f}s")
+    finally:
+        await close_sessions()
+        if runner is not None:
+            await runner.cleanup()
+
+    # With SHARD_COUNT > 1 this process only checks its own partition of the universe
+    symbols = len(filter_symbols_for_shard(data_fetcher.MAJOR_COINS))
+    series = symbols * len(main.TIMEFRAMES)
+    fetch = metrics.FETCH_LATENCY.series
+    print(f"\nsymbols: {symbols}, series per cycle: {series}")
+    print(f"cycle time: min {min(cycle_times):.2f}s, max {max(cycle_times):.2f}s, mean {sum(cycle_times) / len(cycle_times):.2f}s")
+    print(f"throughput: {series / min(cycle_times):.1f} series/s")
+    for (endpoint,), (_, total, count) in sorted(fetch.items()):
+        print(f"fetch {endpoint:<30} {count:>7} requests, mean {total / count * 1000:.1f} ms")
+    build = metrics.FRAME_BUILD_TIME.series.get(())
+    if build:
+        print(f"frame build: {build[2]} frames, mean {build[1] / build[2] * 1000:.2f} ms")
+    if state is not None:
+        print(f"mock server: {dict(state.requests)}, webhooks received: {len(state.webhooks)}")
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        print(f"python heap peak: {peak / 2**20:.1f} MiB")
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"max RSS: {max_rss / (2**20 if sys.platform == 'darwin' else 2**10):.1f} MiB")
+
+    if args.check_recording and not await check_recording(os.environ["MARKET_DATA_RECORD_DIR"], candle_store.capacity):
+        sys.exit(1)
+
+async def check_recording(directory: str, capacity: int) -> bool:
+    """Replays the recordings taken during the run; each series must come back with the store's full window."""
+    from market_replay import make_replay_fetcher
+
+    replayed = await make_replay_fetcher(directory)()
+    short = [(symbol, timeframe, len(series)) for symbol, tf_data in replayed.items()
+             for timeframe, series in tf_data.items() if len(series) != capacity]
+    total = sum(map(len, replayed.values()))
+    print(f"recording: {total} series replayed, {len(short)} without the full {capacity}-candle window")
+    for symbol, timeframe, length in short[:10]:
+        print(f"  {symbol} {timeframe}: {length} candles")
+    return total > 0 and not short
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Per-series memory: the original 12-column DataFrame (as get_binance_data_async used to build it)
+versus the compact CandleSeries.
+
+    python -m benchmarks.memory_report [--recorded DIR]
+"""
+import argparse
+import pandas as pd
+from benchmarks.fixtures import Fixtures
+from data_fetcher import build_candle_series
+from candle_store import required_window
+
+KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume',
+                 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore']
+
+def legacy_frame(klines_data, oi_data, ls_data) -> pd.DataFrame:
+    """Reference: the full-width frame the fetcher produced before the compact representation."""
+    df = pd.DataFrame(klines_data, columns=KLINE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'taker_buy_base_asset_volume']
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric)
+    df['cvd'] = (df['taker_buy_base_asset_volume'] - (df['volume'] - df['taker_buy_base_asset_volume'])).cumsum()
+    for rows, key, column in ((oi_data, 'sumOpenInterestValue', 'oi'), (ls_data, 'longShortRatio', 'ls_ratio')):
+        hist = pd.DataFrame(rows)
+        hist['timestamp'] = pd.to_datetime(hist['timestamp'], unit='ms')
+        df[column] = pd.to_numeric(hist.set_index('timestamp')[key])
+    return df.bfill().ffill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-series memory of the legacy frame and CandleSeries.")
+    parser.add_argument("--recorded", metavar="DIR")
+    args = parser.parse_args()
+
+    from main import signal_checkers
+    window = required_window(signal_checkers)
+
+    fixtures = Fixtures(args.recorded)
+    legacy_total = compact_total = window_total = 0
+    for rec in fixtures.recordings:
+        legacy_total += int(legacy_frame(rec['klines'], rec['oi'], rec['ls']).memory_usage(deep=True).sum())
+        compact_total += build_candle_series(rec['symbol'], rec['timeframe'], rec['klines'], rec['oi'], rec['ls']).nbytes
+        window_total += build_candle_series(rec['symbol'], rec['timeframe'], rec['klines'], rec['oi'], rec['ls'], capacity=window).nbytes
+    count = len(fixtures.recordings)
+    print(f"{count} series ({fixtures.source})")
+    print(f"legacy DataFrame:                {legacy_total / count / 1024:8.1f} KiB per series")
+    print(f"CandleSeries (full fetch):       {compact_total / count / 1024:8.1f} KiB per series ({legacy_total / compact_total:.1f}x)")
+    print(f"CandleSeries ({window:>4}-row window): {window_total / count / 1024:8.1f} KiB per series ({legacy_total / window_total:.1f}x)")
+
+if __name__ == "__main__":
+    main()
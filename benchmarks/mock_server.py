@@ -0,0 +1,187 @@
+"""
+Local stand-in for every external service the bot talks to:
+Binance Futures REST (klines / OI / L/S / time / 24hr ticker), OpenAI-compatible LLM endpoints
+and the Lark / WX webhooks.
+
+    python -m benchmarks.mock_server --port 8089 --recorded recordings --llm-latency 1.5 --llm-error-rate 0.1
+
+Point the bot at it with BINANCE_BASE_URL, GEMINI_API_URL, DEEPSEEK_API_URL, LARK_WEBHOOK_URL and WX_WEBHOOK_URL.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from collections import Counter
+from aiohttp import web
+from benchmarks.fixtures import TIMEFRAME_MS, DEFAULT_SYMBOLS, synthetic_recording
+
+MOCK_AI_TEXT = "【核心信号与结构】 Mock analysis.\n【主力意图分析 (Smart Money Intent)】 Mock intent.\n【操作建议与关注点】 Mock levels."
+
+class MockServerState:
+    """
+    Serves recorded (or synthetic) series. Unknown symbols are mapped onto one of the loaded
+    series for the timeframe by a stable hash, so thousands of symbols cost no extra memory.
+
+    Each series is replayed on the current timeline: its rows repeat as a ring, one per period, and the
+    last row served is the live candle of the current period. `limit` counts back from that candle, so
+    the bot's incremental fetches and OI / L/S cadences see the same steady state as against Binance.
+    """
+    def __init__(self, recordings, binance_latency=0.0, llm_latency=0.0, llm_error_rate=0.0, seed=0):
+        self.binance_latency = binance_latency
+        self.llm_latency = llm_latency
+        self.llm_error_rate = llm_error_rate
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.webhooks = []
+        self.templates = {}
+        for rec in recordings:
+            self.templates.setdefault(rec['timeframe'], []).append(rec)
+        # timeframe -> (current period, {(template index, kind, limit): encoded JSON body})
+        self._bodies = {}
+        # Symbols listed by the bulk ticker endpoints (defaults to the recorded ones)
+        self.universe = None
+
+    def _template_index(self, symbol, timeframe):
+        return zlib.crc32(symbol.encode('utf-8')) % len(self.templates[timeframe])
+
+    def body(self, kind, symbol, timeframe, limit):
+        if timeframe not in self.templates:
+            return None
+        index = self._template_index(symbol, timeframe)
+        klines = self.templates[timeframe][index]['klines']
+        step = TIMEFRAME_MS.get(timeframe) or klines[1][0] - klines[0][0]
+        period = int(time.time() * 1000) // step
+        cached_period, bodies = self._bodies.get(timeframe, (None, None))
+        if cached_period != period:
+            # A new candle has opened: every body of the timeframe moves one row along
+            bodies = {}
+            self._bodies[timeframe] = (period, bodies)
+        key = (index, kind, limit)
+        body = bodies.get(key)
+        if body is None:
+            rows = self.templates[timeframe][index][kind]
+            body = bodies[key] = json.dumps(_rows_on_timeline(kind, rows, period, step, limit)).encode('utf-8')
+        return body
+
+    def symbols(self):
+        if self.universe is not None:
+            return list(self.universe)
+        return sorted({rec['symbol'] for recs in self.templates.values() for rec in recs})
+
+    def last_price(self, symbol):
+        """Close of the last candle of the series the symbol maps onto (lowest timeframe)."""
+        timeframe = min(self.templates, key=TIMEFRAME_MS.__getitem__)
+        return self.templates[timeframe][self._template_index(symbol, timeframe)]['klines'][-1][4]
+
+def _rows_on_timeline(kind, rows, period, step, limit):
+    """The last `limit` periods up to `period` (the live one), taking rows from the recording as a ring."""
+    count = min(limit or len(rows), len(rows))
+    served = []
+    for p in range(period - count + 1, period + 1):
+        row, ts = rows[p % len(rows)], p * step
+        if kind == 'klines':
+            served.append([ts, *row[1:6], ts + step - 1, *row[7:]])
+        else:
+            served.append({**row, "timestamp": ts})
+    return served
+
+def create_app(state: MockServerState) -> web.Application:
+    async def binance_delay():
+        if state.binance_latency:
+            await asyncio.sleep(state.binance_latency)
+
+    def series_handler(kind, period_param):
+        async def handler(request):
+            state.requests[request.path] += 1
+            await binance_delay()
+            symbol = request.query.get('symbol', '')
+            timeframe = request.query.get(period_param, '')
+            limit = int(request.query.get('limit', 0) or 0)
+            body = state.body(kind, symbol, timeframe, limit)
+            if body is None:
+                return web.json_response({"code": -1120, "msg": "Invalid interval."}, status=400)
+            return web.Response(body=body, content_type='application/json')
+        return handler
+
+    async def server_time(request):
+        state.requests[request.path] += 1
+        await binance_delay()
+        return web.json_response({"serverTime": int(time.time() * 1000)})
+
+    async def ticker_24hr(request):
+        state.requests[request.path] += 1
+        await binance_delay()
+        return web.json_response([
+            {"symbol": s, "quoteVolume": f"{1e9 - i:.2f}", "lastPrice": "100.0"} for i, s in enumerate(state.symbols())
+        ])
+
+    async def ticker_price(request):
+        state.requests[request.path] += 1
+        await binance_delay()
+        now = int(time.time() * 1000)
+        return web.json_response([{"symbol": s, "price": state.last_price(s), "time": now} for s in state.symbols()])
+
+    async def chat_completions(request):
+        state.requests['chat/completions'] += 1
+        payload = await request.json()
+        if state.llm_latency:
+            await asyncio.sleep(state.llm_latency)
+        if state.random.random() < state.llm_error_rate:
+            return web.json_response({"error": {"message": "mock upstream error"}}, status=503)
+        return web.json_response({
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": MOCK_AI_TEXT}}],
+        })
+
+    async def webhook(request):
+        state.requests[request.path] += 1
+        state.webhooks.append((request.path, time.time(), await request.json()))
+        return web.json_response({"code": 0, "msg": "success"})
+
+    async def stats(request):
+        return web.json_response({"requests": dict(state.requests), "webhooks_received": len(state.webhooks)})
+
+    app = web.Application()
+    app.router.add_get('/fapi/v1/klines', series_handler('klines', 'interval'))
+    app.router.add_get('/futures/data/openInterestHist', series_handler('oi', 'period'))
+    app.router.add_get('/futures/data/globalLongShortAccountRatio', series_handler('ls', 'period'))
+    app.router.add_get('/fapi/v1/time', server_time)
+    app.router.add_get('/fapi/v1/ticker/24hr', ticker_24hr)
+    app.router.add_get('/fapi/v1/ticker/price', ticker_price)
+    app.router.add_post('/{prefix:.*}chat/completions', chat_completions)
+    app.router.add_post('/lark', webhook)
+    app.router.add_post('/wxsend', webhook)
+    app.router.add_get('/_stats', stats)
+    return app
+
+def load_recordings(recorded_dir: str = None, symbols=DEFAULT_SYMBOLS):
+    if recorded_dir:
+        from market_replay import load_raw_market_data
+        return [r for r in load_raw_market_data(recorded_dir) if r.get('klines')]
+    return [synthetic_recording(s, tf, seed=i) for i, (s, tf) in enumerate((s, tf) for s in symbols for tf in TIMEFRAME_MS)]
+
+async def start_mock_server(state: MockServerState, host: str = '127.0.0.1', port: int = 8089):
+    """Starts the mock server on the running loop. Returns the AppRunner (call cleanup() to stop)."""
+    runner = web.AppRunner(create_app(state), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Binance / LLM / webhook server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--recorded", metavar="DIR", help="Replay recordings from DIR (default: synthetic series).")
+    parser.add_argument("--binance-latency", type=float, default=0.0, help="Added latency per Binance request (s).")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Added latency per LLM completion (s).")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of LLM calls answered with HTTP 503.")
+    args = parser.parse_args()
+
+    state = MockServerState(load_recordings(args.recorded), args.binance_latency, args.llm_latency, args.llm_error_rate)
+    print(f"Mock server on http://{args.host}:{args.port} serving {len(state.symbols())} recorded symbols")
+    web.run_app(create_app(state), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark suite for the indicator checkers and the detection cycle.
+
+    python -m benchmarks.run                      # run and compare against benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline      # (re)write the baseline
+    python -m benchmarks.run --recorded recordings --filter indicators.
+"""
+import argparse
+import logging
+import os
+import sys
+from logger import log
+from benchmarks.fixtures import Fixtures
+from benchmarks.harness import run_benchmarks, save_baseline, compare_to_baseline
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the signal bot benchmark suite.")
+    parser.add_argument("--recorded", metavar="DIR", help="Use recordings written by MARKET_DATA_RECORD_DIR instead of synthetic frames.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--rounds", type=int, help="Override the number of timed rounds per benchmark.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON path.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown before failing (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    # Import for registration side effects.
+    import benchmarks.bench_indicators  # noqa: F401
+    import benchmarks.bench_pipeline  # noqa: F401
+    from benchmarks import import_time
+
+    # Keep the per-signal INFO logging out of the timings and the output.
+    log.setLevel(logging.WARNING)
+
+    fixtures = Fixtures(args.recorded)
+    print(f"Fixtures: {fixtures.source}, {len(fixtures.recordings)} series\n")
+    results = run_benchmarks(fixtures, args.filter, args.rounds)
+    if any(name.startswith("startup.") for name in results):
+        print("\n" + import_time.format_breakdown(import_time.import_breakdown(), top=10))
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline, fixtures.source)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Shard scaling check: runs 1, 2, 4, ... shard processes of the load test against one shared mock server and
+reports the aggregate throughput per shard count, relative to a single instance.
+
+    python -m benchmarks.shard_scaling --symbols 2000 --shards 1 2 4 --binance-latency 0.05
+
+Each shard is a separate `benchmarks.load_test` process with SHARD_INDEX / SHARD_COUNT set, so it checks only
+its own partition of the universe. A shard count's cycle time is that of its slowest shard (the universe is
+done when every partition is). Scaling stays near-linear while there are cores and fetch slots to spare.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+
+CYCLE_TIME = re.compile(r"cycle time: min ([\d.]+)s")
+SERIES = re.compile(r"series per cycle: (\d+)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure how check throughput scales with the number of shards.")
+    parser.add_argument("--symbols", type=int, default=1000, help="Size of the whole universe (split across shards).")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4], help="Shard counts to run.")
+    parser.add_argument("--cycles", type=int, default=2, help="Cycles per shard; the fastest one is used.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--recorded", metavar="DIR", help="Replay recordings from DIR (default: synthetic series).")
+    parser.add_argument("--binance-latency", type=float, default=0.0)
+    return parser.parse_args()
+
+def start_mock_server(args):
+    command = [sys.executable, "-m", "benchmarks.mock_server", "--port", str(args.port),
+               "--binance-latency", str(args.binance_latency)]
+    if args.recorded:
+        command += ["--recorded", args.recorded]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/_stats", timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"Mock server did not come up on port {args.port}")
+
+def run_shards(args, shard_count: int):
+    """Runs every shard of `shard_count` side by side. Returns (cycle time of the slowest shard, series checked)."""
+    command = [sys.executable, "-m", "benchmarks.load_test", "--external-mock", "--no-deliver",
+               "--port", str(args.port), "--symbols", str(args.symbols), "--cycles", str(args.cycles)]
+    shards = [
+        subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                         env={**os.environ, "SHARD_COUNT": str(shard_count), "SHARD_INDEX": str(index)})
+        for index in range(shard_count)
+    ]
+    cycle_times, series = [], 0
+    for index, shard in enumerate(shards):
+        output, _ = shard.communicate()
+        if shard.returncode != 0:
+            raise RuntimeError(f"Shard {index}/{shard_count} exited with {shard.returncode}")
+        cycle_times.append(float(CYCLE_TIME.search(output).group(1)))
+        series += int(SERIES.search(output).group(1))
+    return max(cycle_times), series
+
+def main():
+    args = parse_args()
+    server = start_mock_server(args)
+    try:
+        print(f"{'shards':>6} {'series':>8} {'cycle s':>9} {'series/s':>10} {'speedup':>8} {'efficiency':>10}")
+        baseline = None
+        for shard_count in args.shards:
+            cycle_time, series = run_shards(args, shard_count)
+            throughput = series / cycle_time
+            if baseline is None:
+                # Single-instance throughput, estimated from the first shard count if 1 was not run
+                baseline = throughput / shard_count
+            speedup = throughput / baseline
+            print(f"{shard_count:>6} {series:>8} {cycle_time:>9.2f} {throughput:>10.1f} {speedup:>7.2f}x {speedup / shard_count:>9.0%}")
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"\n{os.cpu_count()} CPUs available; expect the speedup to flatten past that.")
+
+if __name__ == "__main__":
+    main()
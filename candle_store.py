@@ -0,0 +1,139 @@
+import json
+import os
+from config import DATA_FETCH_LIMIT, INDICATOR_WARMUP_CANDLES, CVD_STATE_FILE, SHARD_INDEX, SHARD_COUNT
+from logger import log
+
+TIMEFRAME_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000,
+    '12h': 43_200_000, '1d': 86_400_000,
+}
+
+def required_window(checkers) -> int:
+    """
+    Rolling-window size needed by the active checkers: their largest declared lookback plus
+    indicator warm-up, capped at DATA_FETCH_LIMIT.
+    """
+    lookback = max((checker.lookback for checker in checkers), default=0)
+    return min(lookback + INDICATOR_WARMUP_CANDLES, DATA_FETCH_LIMIT)
+
+class CandleStore:
+    """
+    Keeps one CandleSeries per (symbol, timeframe) alive across cycles, so each cycle only
+    downloads the candles that closed or changed since the previous one.
+    """
+    def __init__(self, capacity: int = DATA_FETCH_LIMIT, cvd_state_file: str = CVD_STATE_FILE):
+        self.capacity = capacity
+        self._series = {}
+        if SHARD_COUNT > 1:
+            # Shards own disjoint symbols; give each its own file instead of sharing one.
+            root, ext = os.path.splitext(cvd_state_file)
+            cvd_state_file = f"{root}.shard{SHARD_INDEX}{ext}"
+        self.cvd_state_file = cvd_state_file
+        # (symbol, timeframe) -> (open_time_ms, cvd) at the close of the last closed candle
+        self._cvd_anchors = self._load_cvd_state()
+        # (symbol, timeframe, history column) -> local time (ms) of its last successful OI / L/S fetch
+        self._history_fetched = {}
+
+    def _load_cvd_state(self):
+        """Loads the persisted CVD levels so the accumulators survive restarts."""
+        if not os.path.exists(self.cvd_state_file):
+            return {}
+        try:
+            with open(self.cvd_state_file, 'r') as f:
+                raw = json.load(f)
+            return {tuple(key.split('|', 1)): (int(ts), float(value)) for key, (ts, value) in raw.items()}
+        except (json.JSONDecodeError, IOError, ValueError) as e:
+            log.warning("Could not load CVD state from %s. CVD restarts from the fetched window. Error: %s", self.cvd_state_file, e)
+            return {}
+
+    def save_cvd_state(self):
+        """Records the CVD level of every series' last closed candle and writes it to disk."""
+        for key, series in self._series.items():
+            if len(series) >= 2:
+                anchor = series.cvd_anchor_before(series.last_timestamp)
+                if anchor is not None:
+                    self._cvd_anchors[key] = anchor
+        tmp_file = f"{self.cvd_state_file}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({f"{symbol}|{timeframe}": list(anchor) for (symbol, timeframe), anchor in self._cvd_anchors.items()}, f)
+            os.replace(tmp_file, self.cvd_state_file)
+        except (IOError, OSError) as e:
+            log.error("Could not save CVD state to %s. Error: %s", self.cvd_state_file, e)
+
+    def cvd_anchor(self, symbol: str, timeframe: str):
+        """
+        Known CVD level to continue from when (re)building a series: the stored series' last closed
+        candle if we have one, otherwise the persisted level from a previous run.
+        """
+        series = self.get(symbol, timeframe)
+        if series is not None and len(series) >= 2:
+            return series.cvd_anchor_before(series.last_timestamp)
+        return self._cvd_anchors.get((symbol, timeframe))
+
+    def configure_for(self, checkers):
+        """Sizes the rolling window from the checkers' lookbacks. Existing series are dropped if the size changes."""
+        capacity = required_window(checkers)
+        if capacity != self.capacity:
+            self._series.clear()
+        self.capacity = capacity
+        self._history_fetched.clear()
+        log.info("Candle store window: %s candles per series (lookback + %s warm-up).", capacity, INDICATOR_WARMUP_CANDLES)
+
+    def get(self, symbol: str, timeframe: str):
+        return self._series.get((symbol, timeframe))
+
+    def put(self, series):
+        self._series[(series.symbol, series.timeframe)] = series
+
+    def keys(self):
+        """(symbol, timeframe) of every stored series."""
+        return set(self._series)
+
+    def prune(self, active_keys):
+        """Forgets series that are no longer monitored (e.g. dropped out of the dynamic scan)."""
+        for key in list(self._series):
+            if key not in active_keys:
+                del self._series[key]
+        # Includes levels loaded from disk for series this run never fetched
+        for key in list(self._cvd_anchors):
+            if key not in active_keys:
+                del self._cvd_anchors[key]
+        for key in list(self._history_fetched):
+            if key[:2] not in active_keys:
+                del self._history_fetched[key]
+
+    def fetch_limit(self, symbol: str, timeframe: str, now_ms: int) -> int:
+        """
+        Number of candles to request: the full window for a new (or stale) series, otherwise the
+        candles opened since the last stored one plus that one (the previous live candle, now closed).
+        """
+        series = self.get(symbol, timeframe)
+        step = TIMEFRAME_MS.get(timeframe)
+        if series is None or not len(series) or step is None:
+            return self.capacity
+        missing = (now_ms - series.last_timestamp) // step + 2
+        return int(min(max(missing, 2), self.capacity))
+
+    def history_limit(self, symbol: str, timeframe: str, name: str, now_ms: int, refresh_ms: int):
+        """
+        Number of OI / L/S history rows to request for a stored series, or None while the last fetch is
+        younger than `refresh_ms` (the stored values are carried forward instead). Covers every candle
+        opened since the last successful fetch, so a failed refresh is backfilled by the next one.
+        """
+        step = TIMEFRAME_MS.get(timeframe)
+        fetched_at = self._history_fetched.get((symbol, timeframe, name))
+        if fetched_at is None or step is None:
+            return self.capacity
+        if now_ms - fetched_at < refresh_ms:
+            return None
+        return int(min((now_ms - fetched_at) // step + 2, self.capacity))
+
+    def mark_history_fetched(self, symbol: str, timeframe: str, name: str, now_ms: int):
+        self._history_fetched[(symbol, timeframe, name)] = now_ms
+
+    def __len__(self):
+        return len(self._series)
+
+candle_store = CandleStore()
@@ -0,0 +1,138 @@
+import numpy as np
+from config import CANDLE_COMPACT_FLOAT32
+
+_COMPACT_DTYPE = np.float32 if CANDLE_COMPACT_FLOAT32 else np.float64
+
+# Column name -> storage dtype. Prices and CVD keep float64: zone comparisons and the running sum need it.
+# Taker-buy volume is only an input to CVD and is not stored.
+CANDLE_FIELDS = {
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': _COMPACT_DTYPE,
+    'cvd': np.float64,
+    'oi': _COMPACT_DTYPE,
+    'ls_ratio': _COMPACT_DTYPE,
+}
+
+class CandleSeries:
+    """
+    Fixed-capacity, struct-of-arrays ring buffer of candles for one symbol/timeframe.
+
+    Rows are kept contiguous inside slightly oversized arrays: appends write past the end and,
+    once the slack is used up, the newest `capacity` rows are moved back to the front. Column
+    access is therefore always a zero-copy view in time order.
+    """
+    __slots__ = ('symbol', 'timeframe', 'capacity', '_timestamps', '_columns', '_start', '_end')
+
+    def __init__(self, symbol: str, timeframe: str, capacity: int):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.capacity = capacity
+        storage = capacity + max(8, capacity // 16)
+        self._timestamps = np.zeros(storage, dtype=np.int64)
+        self._columns = {name: np.zeros(storage, dtype=dtype) for name, dtype in CANDLE_FIELDS.items()}
+        self._start = 0
+        self._end = 0
+
+    @classmethod
+    def from_arrays(cls, symbol: str, timeframe: str, timestamps, columns: dict, capacity: int = None):
+        """Builds a series from open-time (ms) and column arrays. Keeps the newest `capacity` rows."""
+        series = cls(symbol, timeframe, capacity or len(timestamps))
+        series.extend(timestamps, columns)
+        return series
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def timestamps(self):
+        return self._timestamps[self._start:self._end]
+
+    @property
+    def last_timestamp(self):
+        return int(self._timestamps[self._end - 1]) if self._end > self._start else None
+
+    def closed_length(self, now_ms: int, step_ms: int) -> int:
+        """Number of leading candles closed by `now_ms`; any rows after them belong to the live candle."""
+        return int(np.searchsorted(self.timestamps, now_ms - step_ms, side='right'))
+
+    def column(self, name: str):
+        """Zero-copy view of one column in time order."""
+        return self._columns[name][self._start:self._end]
+
+    def cvd_anchor_before(self, timestamp: int):
+        """(open_time, cvd) of the last stored candle that opened strictly before `timestamp`, or None."""
+        pos = int(np.searchsorted(self.timestamps, timestamp, side='left'))
+        if pos == 0:
+            return None
+        row = self._start + pos - 1
+        return int(self._timestamps[row]), float(self._columns['cvd'][row])
+
+    def value_before(self, name: str, timestamp: int, default=None):
+        """Value of `name` in the last stored candle that opened strictly before `timestamp`."""
+        pos = int(np.searchsorted(self.timestamps, timestamp, side='left'))
+        if pos == 0:
+            return default
+        return self._columns[name][self._start + pos - 1].item()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the underlying arrays (including the append slack)."""
+        return self._timestamps.nbytes + sum(arr.nbytes for arr in self._columns.values())
+
+    def _reserve(self, incoming: int):
+        """Makes room for `incoming` rows at the end, moving the rows still needed to the front if required."""
+        if self._end + incoming <= len(self._timestamps):
+            return
+        keep = min(len(self), max(self.capacity - incoming, 0))
+        src = slice(self._end - keep, self._end)
+        self._timestamps[:keep] = self._timestamps[src]
+        for arr in self._columns.values():
+            arr[:keep] = arr[src]
+        self._start, self._end = 0, keep
+
+    def extend(self, timestamps, columns: dict):
+        """
+        Merges candles into the series. A row with the same open time as the last stored candle
+        replaces it in place (the live candle being updated); older rows are ignored.
+        Returns the number of rows appended (excluding an in-place update).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        last = self.last_timestamp
+        offset = 0
+        if last is not None:
+            offset = int(np.searchsorted(timestamps, last, side='left'))
+            if offset < len(timestamps) and timestamps[offset] == last:
+                self._timestamps[self._end - 1] = last
+                for name, arr in self._columns.items():
+                    arr[self._end - 1] = columns[name][offset]
+                offset += 1
+
+        count = len(timestamps) - offset
+        if count <= 0:
+            return 0
+        # Only the newest `capacity` rows can survive.
+        skip = max(count - self.capacity, 0)
+        offset += skip
+        count -= skip
+
+        self._reserve(count)
+        dst = slice(self._end, self._end + count)
+        self._timestamps[dst] = timestamps[offset:]
+        for name, arr in self._columns.items():
+            arr[dst] = columns[name][offset:]
+        self._end += count
+        if len(self) > self.capacity:
+            self._start = self._end - self.capacity
+        return count
+
+    def to_frame(self):
+        """
+        DataFrame view for the pandas-based checkers, indexed by open time like the original frames.
+        Checkers may append indicator columns to it; the series itself is never modified.
+        """
+        import pandas as pd  # deferred: not needed until the first check
+        index = pd.DatetimeIndex(pd.to_datetime(self.timestamps, unit='ms'), name='timestamp')
+        return pd.DataFrame({name: self.column(name) for name in self._columns}, index=index, copy=False)
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import aiohttp
+from config import CLOCK_SYNC_SAMPLES, CLOCK_RESYNC_SECONDS
+from logger import log
+from metrics import CLOCK_OFFSET, CLOCK_UNCERTAINTY
+from http_client import get_session
+
+class ClockService:
+    """
+    Keeps an estimate of the Binance server clock relative to the local one.
+
+    Each sync takes several server-time samples and keeps the one with the smallest round trip:
+    assuming the server stamped its reply halfway through it, offset = server - (sent + received) / 2,
+    with an error of at most RTT / 2 (the uncertainty). Reading the clock never waits on the network.
+    """
+    def __init__(self, samples: int = CLOCK_SYNC_SAMPLES, resync_seconds: float = CLOCK_RESYNC_SECONDS):
+        self.samples = max(1, samples)
+        self.resync_seconds = resync_seconds
+        self.offset = 0.0          # seconds, server - local
+        self.uncertainty = None    # seconds; None until the first successful sync
+        self.last_sync = None      # local epoch seconds of the last successful sync
+
+    def now(self) -> float:
+        """Binance-synchronized current time in epoch seconds."""
+        return time.time() + self.offset
+
+    def utcnow(self) -> datetime:
+        """Binance-synchronized current UTC time (naive, like datetime.utcnow())."""
+        return datetime.utcnow() + timedelta(seconds=self.offset)
+
+    async def _sample(self, session):
+        """One NTP-style sample: (offset, rtt) in seconds."""
+        from data_fetcher import BASE_URL
+        sent = time.time()
+        start = time.perf_counter()
+        async with session.get(f"{BASE_URL}/fapi/v1/time", timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            data = await response.json()
+        rtt = time.perf_counter() - start
+        server = data['serverTime'] / 1000
+        return server - (sent + rtt / 2), rtt
+
+    async def sync(self, session) -> bool:
+        """Samples the server clock and adopts the minimum-RTT estimate. Returns True on success."""
+        best = None
+        for _ in range(self.samples):
+            try:
+                offset, rtt = await self._sample(session)
+            except Exception as e:
+                log.warning("Clock sample failed: %s", e)
+                continue
+            if best is None or rtt < best[1]:
+                best = (offset, rtt)
+        if best is None:
+            log.warning("Failed to synchronize time with Binance. Keeping the previous offset.")
+            return False
+
+        previous = self.offset
+        self.offset, self.uncertainty = best[0], best[1] / 2
+        self.last_sync = time.time()
+        CLOCK_OFFSET.set(self.offset)
+        CLOCK_UNCERTAINTY.set(self.uncertainty)
+        log.info("Time Synchronized. Offset: %+.1fms ± %.1fms (change %+.1fms).",
+                 self.offset * 1000, self.uncertainty * 1000, (self.offset - previous) * 1000)
+        return True
+
+    async def sync_once(self) -> bool:
+        """Runs one sync over the shared Binance session."""
+        try:
+            return await self.sync(get_session('binance'))
+        except Exception as e:
+            log.error("Time synchronization failed: %s", e)
+            return False
+
+    async def run(self):
+        """Background task: re-synchronizes every `resync_seconds`."""
+        while True:
+            await asyncio.sleep(self.resync_seconds)
+            await self.sync_once()
+
+clock = ClockService()
@@ -12,12 +12,15 @@ LARK_WEBHOOK_URL = os.getenv("LARK_WEBHOOK_URL")
 # Proxy Settings
 SOCKS5_PROXY = os.getenv("SOCKS5_PROXY")
 
-WX_WEBHOOK_URL = "https://wxpush.uykb.eu.org/wxsend"
-WX_WEBHOOK_AUTH = "uykb"
+WX_WEBHOOK_URL = os.getenv("WX_WEBHOOK_URL", "https://wxpush.uykb.eu.org/wxsend")
+WX_WEBHOOK_AUTH = os.getenv("WX_WEBHOOK_AUTH", "uykb")
+
+# Binance Futures REST base URL (override to point the bot at a local mock server)
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL", "https://fapi.binance.com")
 
 # --- AI Model Settings ---
 DEEPSEEK_MODEL_NAME = "deepseek-chat"
-DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/chat/completions")
 
 GEMINI_MODEL_NAME = "gemini-2.5-flash-lite"
 # User defined custom OpenAI compatible address for Gemini
@@ -25,7 +28,11 @@ GEMINI_API_URL = os.getenv("GEMINI_API_URL")
 
 # --- Monitoring Settings ---
 TIMEFRAMES = ['15m', '1h', '4h']  # Monitored timeframes
-DATA_FETCH_LIMIT = 1000          # 每次获取数据条数
+DATA_FETCH_LIMIT = 1000          # 单次获取数据条数上限 (Upper bound for the per-series rolling window)
+
+# Extra candles kept in front of the checkers' declared lookback so that recursive indicators
+# (RSI / EMA / ATR smoothing) have converged. 200 candles leave < 1e-6 of the seed in EMA_26 and RSI_14.
+INDICATOR_WARMUP_CANDLES = 200
 
 # --- Dynamic Symbol Discovery ---
 # If True, the bot will automatically fetch the top volume coins from Binance.
@@ -50,7 +57,7 @@ RISE_OI_CHANGE_THRESHOLD = 0.03    # OI a single period change threshold (3%)
 RISE_PRICE_CHANGE_THRESHOLD = 0.01 # Price a single period change threshold (1%)
 
 # Rule 2: Catch the Trend (FVG)
-# FVG config is now handled within the class or via specific new constants if needed
+FVG_LOOKBACK = 100         # Search the last 100 candles for the most recent FVG
 
 # Rule 3: RSI Divergence
 RSI_LENGTH = 14
@@ -117,6 +124,41 @@ COOLDOWN_BACKOFF_FACTOR = 2
 # 如果新的 FVG 的 fvg_top 和 fvg_bottom 与上次的 FVG 的 top/bottom 都相差小于此百分比，则视为“相同”的 FVG。
 FVG_PRICE_TOLERANCE_PERCENT = 0.05 # e.g., 0.05%
 
+# Order Block 区域的价格容忍度百分比：与已记录区域重叠（或相距小于此百分比）的 OB 视为同一区域的重复回踩。
+OB_ZONE_TOLERANCE_PERCENT = 0.1
+
+# 布林带突破的价格容忍度百分比：突破位（上轨/下轨）与上次相近则视为同一突破。
+BB_LEVEL_TOLERANCE_PERCENT = 0.3
+
+# 区域类信号的记忆时长（分钟）：超过此时间未再触发的区域会从索引中移除。
+ZONE_MEMORY_MINUTES = 24 * 60
+
+# Zone-based dedup rules, keyed by indicator name (pluggable: add an entry to dedup another zone indicator).
+#   fields: primary-signal fields holding the zone bounds (one may be absent, giving a single price level)
+#   match: "midpoint" compares zone midpoints, "overlap" treats overlapping zones as the same zone
+#   tolerance_percent: how far apart (in % of price) two zones may be and still match
+#   cooldown_minutes: base cooldown of a repeated zone, grown by COOLDOWN_BACKOFF_FACTOR per repeat
+ZONE_DEDUP_RULES = {
+    "Fair Value Gap Rebalance": {
+        "fields": ("fvg_top", "fvg_bottom"),
+        "match": "midpoint",
+        "tolerance_percent": FVG_PRICE_TOLERANCE_PERCENT,
+        "cooldown_minutes": FVG_COOLDOWN_PERIOD_MINUTES,
+    },
+    "Order Block": {
+        "fields": ("ob_top", "ob_bottom"),
+        "match": "overlap",
+        "tolerance_percent": OB_ZONE_TOLERANCE_PERCENT,
+        "cooldown_minutes": DEFAULT_COOLDOWN_PERIOD_MINUTES,
+    },
+    "Bollinger Bands Breakout": {
+        "fields": ("upper_band", "lower_band"),
+        "match": "midpoint",
+        "tolerance_percent": BB_LEVEL_TOLERANCE_PERCENT,
+        "cooldown_minutes": DEFAULT_COOLDOWN_PERIOD_MINUTES,
+    },
+}
+
 # Z-Score 类信号的显著变化阈值
 # 只有当新的 Z-Score 与上次发送的 Z-Score 差值的绝对值大于此阈值时，才被视为新信号
 Z_SCORE_CHANGE_THRESHOLD = 0.5
@@ -138,3 +180,136 @@ ACTIVE_SESSIONS = [
     ("America/New_York", "08:00", "17:00"), # CME US Equity Hours
     ("America/New_York", "04:00", "16:00"), # US Market Pre-open to Post-close
 ]
+
+# --- Scale-out (Sharding) Settings ---
+# Run N bot instances, each monitoring a stable hash partition of the symbol universe.
+# SHARD_INDEX must be in [0, SHARD_COUNT). With SHARD_COUNT = 1 (default) sharding is disabled.
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+
+# 信号冷却状态文件。多个分片指向同一个文件即可共享冷却状态（通过文件锁协调）。
+SIGNAL_STATE_FILE = os.getenv("SIGNAL_STATE_FILE", "signal_state.json")
+
+# --- Metrics Settings ---
+# Prometheus-style metrics exposed at http://METRICS_HOST:METRICS_PORT/metrics.
+# When disabled, instrumentation calls are no-ops.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# --- Tracing ---
+# 记录每个阶段 (拉取、构建、check()、快照、冷却判断、LLM、卡片渲染、Webhook) 的 span，以 OTLP/JSON 写入 TRACE_FILE。
+# `python tracing.py report` 输出各阶段 p50/p95/p99 及 K 线收盘到推送送达的端到端延迟。
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+
+# 主循环检查周期（秒）。单次检查耗时超过该值即视为超时 (cycle overrun)。
+CHECK_INTERVAL_SECONDS = 60
+
+# 时钟同步：每次同步向 Binance 采样 CLOCK_SYNC_SAMPLES 次服务器时间，取往返时延 (RTT) 最小的一次估计时钟偏移
+# (NTP 方式，误差不超过 RTT/2)；之后每 CLOCK_RESYNC_SECONDS 秒在后台重新同步一次，以跟踪时钟漂移。
+CLOCK_SYNC_SAMPLES = int(os.getenv("CLOCK_SYNC_SAMPLES", "5"))
+CLOCK_RESYNC_SECONDS = int(os.getenv("CLOCK_RESYNC_SECONDS", "900"))
+
+# 调度器：检查按 Binance 同步时钟的绝对时刻触发 (每 CHECK_INTERVAL_SECONDS 秒对齐一次，如每分钟第 2 秒)，
+# 周期不会因单次检查耗时而漂移。偏移量给交易所留出 K 线收盘的时间。
+SCHEDULE_TICK_OFFSET_SECONDS = float(os.getenv("SCHEDULE_TICK_OFFSET_SECONDS", "2"))
+# 超时策略 (检查耗时超过周期时):
+#   "skip":     跳过运行期间错过的 tick，从下一个对齐 tick 继续
+#   "coalesce": 错过的 tick 合并为一次，在本次结束后立即补跑
+#   "overlap":  每个 tick 照常启动，允许并行运行，最多 SCHEDULE_MAX_CONCURRENT 个 (超出则跳过该 tick)
+SCHEDULE_OVERRUN_POLICY = os.getenv("SCHEDULE_OVERRUN_POLICY", "skip")
+SCHEDULE_MAX_CONCURRENT = int(os.getenv("SCHEDULE_MAX_CONCURRENT", "2"))
+
+# --- Recording & Profiling Settings ---
+# If set, raw Binance responses (klines / OI / L/S) are saved here every cycle so they can be replayed offline.
+MARKET_DATA_RECORD_DIR = os.getenv("MARKET_DATA_RECORD_DIR")
+
+# Profiling mode: profile N cycles of run_check (0 = disabled). Same as `python main.py --profile N`.
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", "0"))
+# Replay recorded market data instead of calling Binance while profiling (directory written by MARKET_DATA_RECORD_DIR).
+PROFILE_REPLAY_DIR = os.getenv("PROFILE_REPLAY_DIR")
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
+# --- Parameter Sweep (sweep.py) ---
+# 信号出现后第 SWEEP_HORIZON_CANDLES 根 K 线的收盘价沿信号方向移动至少 SWEEP_HIT_PERCENT% 记为命中。
+SWEEP_HORIZON_CANDLES = int(os.getenv("SWEEP_HORIZON_CANDLES", "4"))
+SWEEP_HIT_PERCENT = float(os.getenv("SWEEP_HIT_PERCENT", "0.5"))
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", "0"))  # 工作进程数 (0 = 每个 CPU 一个)
+
+# --- Candle Storage Settings ---
+# Store volume, taker-buy volume, OI and L/S ratio as float32 (prices and CVD stay float64).
+# Halves the memory of those columns; relative precision ~1e-7 is far below what the signals use.
+CANDLE_COMPACT_FLOAT32 = os.getenv("CANDLE_COMPACT_FLOAT32", "true").lower() in ("1", "true", "yes")
+
+# --- CVD Settings ---
+# CVD is a running accumulator per series, kept across cycles and restarts (state in CVD_STATE_FILE).
+# Optional session anchoring: None (never reset), "daily" (00:00 UTC) or "weekly" (Monday 00:00 UTC); other values are rejected.
+CVD_SESSION_RESET = os.getenv("CVD_SESSION_RESET") or None
+CVD_STATE_FILE = os.getenv("CVD_STATE_FILE", "cvd_state.json")
+
+# --- Evaluation Mode ---
+# "serial": run every checker on every series.
+# "panel":  stack all symbols of a timeframe into one (symbols x candles x fields) array, run vectorized
+#           pre-screens for Volume Spike / Bollinger / FVG / Order Block, and call check() (and build the
+#           market snapshot) only for the symbols a pre-screen lets through.
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "serial")
+
+# --- Multi-Timeframe Engine ---
+# 只拉取最低周期 (如 15m) 的 K 线，更高周期 (1h / 4h) 在本地由其重采样；首次仍按原生周期拉取历史。
+# OI 和多空比仍按各自原生周期拉取 (仅在新的高周期 K 线开盘时)。
+RESAMPLE_HIGHER_TIMEFRAMES = os.getenv("RESAMPLE_HIGHER_TIMEFRAMES", "false").lower() in ("1", "true", "yes")
+# 将同一币种各周期通过冷却的信号合并为一条共振告警 (一次 AI 调用, 一条推送)。
+CONFLUENCE_ALERTS = os.getenv("CONFLUENCE_ALERTS", "false").lower() in ("1", "true", "yes")
+
+# --- Live Candle Model ---
+# 区分已收盘 K 线与当前未收盘 (live) K 线。收盘型检测器 (evaluation = "close") 只在新 K 线收盘时对已收盘数据
+# 运行一次；盘中型检测器 ("intrabar") 每轮只针对更新后的 live K 线运行，同一根 K 线触发一次后不再重复评估，
+# 并在该 K 线收盘时做一次确认。设为 false 则恢复旧行为 (每轮对含 live K 线的完整数据运行全部检测器)。
+LIVE_CANDLE_MODEL = os.getenv("LIVE_CANDLE_MODEL", "true").lower() in ("1", "true", "yes")
+
+# --- Two-Stage Pre-Screen ---
+# 每轮先用一次批量请求 (/fapi/v1/ticker/price) 获取所有币种最新价格，只有满足以下任一条件的序列才拉取完整 K 线/OI/多空比：
+# 尚无缓存、有新 K 线开盘 (上一根已收盘)、价格突破缓存 live K 线的高/低点、或相对缓存收盘价变动超过 PRESCREEN_PRICE_MOVE_PERCENT。
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "false").lower() in ("1", "true", "yes")
+PRESCREEN_PRICE_MOVE_PERCENT = float(os.getenv("PRESCREEN_PRICE_MOVE_PERCENT", "0.15"))
+
+# --- OI / Long-Short Ratio Refresh ---
+# K 线、OI、多空比三个接口并发拉取。OI 和多空比历史变化较慢 (仅用于市场快照)，按各自的刷新周期 (秒) 拉取，
+# 两次刷新之间以及接口失败时沿用缓存的最新值，不会丢弃 K 线。
+OI_REFRESH_SECONDS = int(os.getenv("OI_REFRESH_SECONDS", "300"))
+LS_RATIO_REFRESH_SECONDS = int(os.getenv("LS_RATIO_REFRESH_SECONDS", "300"))
+
+# --- Detector Kernels ---
+# FVG / Order Block / RSI 背离的扫描循环 (kernels.py) 的执行后端："numba" 使用 @njit 编译 (结果缓存在磁盘，重启无需重新编译)，
+# 未安装 Numba 时自动回退为 "numpy" (同一套循环以 Python 运行在 NumPy 数组上)。
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "numba").lower()
+
+# --- Logging ---
+# 日志经 QueueHandler 入队，由后台线程格式化并写出，事件循环上不做 stdout I/O。
+# LOG_FORMAT: "text" (默认) 或 "json" (每行一个 JSON 对象，便于日志系统采集)。
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# 同一模块、同一条日志模板 (如冷却期抑制) 每分钟最多输出的 INFO/DEBUG 条数，超出部分只计数并在下一窗口汇总；0 表示不限。
+LOG_RATE_LIMIT_PER_MINUTE = int(os.getenv("LOG_RATE_LIMIT_PER_MINUTE", "30"))
+# 按模块覆盖上述限额，例如 "state_manager=10,alerter=60"
+LOG_RATE_LIMIT_OVERRIDES = {
+    module.strip(): int(limit)
+    for module, limit in (item.split("=", 1) for item in os.getenv("LOG_RATE_LIMIT_OVERRIDES", "").split(",") if "=" in item)
+}
+
+# --- AI Interpretation Queue ---
+# 通过冷却的信号进入优先队列，按优先级 (周期越长越高 + 指标权重 + 共振分量数 + 新鲜度) 依次交给 AI 解读。
+# 每个信号的截止时间为其所在 K 线收盘：超过截止时间仍未轮到的信号按 AI_EXPIRED_POLICY 处理：
+#   "send": 不做 AI 解读直接推送 (默认)； "drop": 直接丢弃。其他取值在启动时报错。
+AI_WORKERS = int(os.getenv("AI_WORKERS", "2"))                          # 并行的 AI 解读数
+AI_REQUEST_SPACING_SECONDS = float(os.getenv("AI_REQUEST_SPACING_SECONDS", "2"))  # 每个 worker 两次推送之间的间隔 (避免触发限流)
+AI_EXPIRED_POLICY = os.getenv("AI_EXPIRED_POLICY", "send").lower()
+AI_INDICATOR_PRIORITY = {
+    "Multi-Timeframe Confluence": 3.0,
+    "Order Block": 2.0,
+    "Fair Value Gap Rebalance": 2.0,
+    "RSI Divergence": 1.5,
+    "Bollinger Bands Breakout": 1.0,
+    "Volume Spike": 0.0,
+}
@@ -0,0 +1,54 @@
+from candle_store import TIMEFRAME_MS
+from indicators import materialize_signal
+from tracing import span
+
+CONFLUENCE_INDICATOR = "Multi-Timeframe Confluence"
+
+def _bias(signal_types):
+    bullish = sum('Bullish' in t for t in signal_types)
+    bearish = sum('Bearish' in t for t in signal_types)
+    if bullish and not bearish:
+        return "Bullish"
+    if bearish and not bullish:
+        return "Bearish"
+    return "Mixed"
+
+def build_confluence_event(symbol: str, items):
+    """
+    Merges one symbol's sendable signals, `items` = [(timeframe, signal, previous_signal)], into a single
+    alert. Only the lowest timeframe's market context is built. Returns (timeframe_label, signal, previous_signal).
+    """
+    items = sorted(items, key=lambda item: TIMEFRAME_MS.get(item[0], 0))
+    if len(items) == 1:
+        timeframe, signal, previous = items[0]
+        with span("snapshot", symbol=symbol, timeframe=timeframe):
+            return timeframe, materialize_signal(signal), previous
+
+    timeframes = list(dict.fromkeys(timeframe for timeframe, _, _ in items))
+    components = [dict(signal['primary_signal'], timeframe=timeframe) for timeframe, signal, _ in items]
+    primary = {
+        "indicator": CONFLUENCE_INDICATOR,
+        "signal_type": f"{_bias([c.get('signal_type', '') for c in components])} Confluence",
+        "timeframes": ", ".join(timeframes),
+    }
+    for component in components:
+        primary[f"{component['timeframe']} {component.get('indicator', 'N/A')}"] = component.get('signal_type', 'N/A')
+    primary["current_price"] = components[0].get('current_price', 'N/A')
+    # Full per-timeframe details for the AI prompt; alert cards show the one-line summaries above
+    primary["components"] = components
+
+    with span("snapshot", symbol=symbol, timeframe=items[0][0]):
+        lowest = materialize_signal(items[0][1])
+    previous = {f"{timeframe} {signal['primary_signal'].get('indicator', 'N/A')}": prev
+                for timeframe, signal, prev in items if prev}
+    return "+".join(timeframes), {"primary_signal": primary, "market_context": lowest.get('market_context', {})}, previous or None
+
+def group_confluence_events(sendable):
+    """
+    Groups sendable signals, [(symbol, timeframe, signal, previous_signal)], into one event per symbol.
+    Returns [(symbol, timeframe_label, signal, previous_signal)] in first-seen symbol order.
+    """
+    by_symbol = {}
+    for symbol, timeframe, signal, previous in sendable:
+        by_symbol.setdefault(symbol, []).append((timeframe, signal, previous))
+    return [(symbol, *build_confluence_event(symbol, items)) for symbol, items in by_symbol.items()]
@@ -0,0 +1,69 @@
+import numpy as np
+from config import CVD_SESSION_RESET
+from logger import log
+
+DAY_MS = 86_400_000
+WEEK_MS = 7 * DAY_MS
+# 1970-01-01 was a Thursday; Binance weeks (and ours) start on Monday 00:00 UTC.
+_MONDAY_OFFSET_MS = 4 * DAY_MS
+SESSION_RESET_MODES = (None, 'daily', 'weekly')
+
+def _check_mode(mode):
+    if mode not in SESSION_RESET_MODES:
+        raise ValueError(f"Unknown CVD session reset '{mode}', expected one of {SESSION_RESET_MODES}.")
+
+_check_mode(CVD_SESSION_RESET)
+
+def session_ids(timestamps, mode: str = CVD_SESSION_RESET):
+    """Session number of each candle open time (ms). All zeros when CVD is never reset."""
+    _check_mode(mode)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if mode == 'daily':
+        return timestamps // DAY_MS
+    if mode == 'weekly':
+        return (timestamps - _MONDAY_OFFSET_MS) // WEEK_MS
+    return np.zeros(len(timestamps), dtype=np.int64)
+
+def volume_delta(volume, taker_buy):
+    """Taker buy volume minus taker sell volume per candle."""
+    return taker_buy - (volume - taker_buy)
+
+def accumulate_cvd(timestamps, delta, anchor=None, mode: str = CVD_SESSION_RESET, step_ms: int = None):
+    """
+    CVD for a contiguous block of candles, restarting from zero at every session boundary.
+
+    `anchor` is a known (open_time_ms, cvd) level at the close of one candle: either the candle
+    just before this block (incremental updates) or a candle inside it (re-fetch after a restart).
+    It fixes the level of the first session in the block; later sessions start at zero by
+    definition. Without an anchor the first session starts at zero at the start of the block.
+    With `step_ms`, an anchor older than the candle just before the block is ignored: continuing from
+    it would silently skip the candles in the gap.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    delta = np.asarray(delta, dtype=np.float64)
+    ids = session_ids(timestamps, mode)
+
+    cvd = np.cumsum(delta)
+    boundaries = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    if len(boundaries):
+        # Subtract the running total at each session start from every row in that session.
+        offsets = np.zeros(len(delta))
+        offsets[boundaries] = np.diff(np.concatenate(([0.0], cvd[boundaries - 1])))
+        cvd -= np.cumsum(offsets)
+
+    if anchor is not None and step_ms and anchor[0] < timestamps[0] - step_ms:
+        log.warning("Ignoring CVD anchor at %d: %d candles are missing before the block at %d; CVD restarts from the block.",
+                    anchor[0], (timestamps[0] - anchor[0]) // step_ms - 1, timestamps[0])
+        anchor = None
+
+    if anchor is not None:
+        anchor_ts, anchor_cvd = anchor
+        first_session_end = boundaries[0] if len(boundaries) else len(cvd)
+        if anchor_ts < timestamps[0]:
+            if session_ids([anchor_ts], mode)[0] == ids[0]:
+                cvd[:first_session_end] += anchor_cvd
+        else:
+            pos = int(np.searchsorted(timestamps, anchor_ts))
+            if pos < first_session_end and timestamps[pos] == anchor_ts:
+                cvd[:first_session_end] += anchor_cvd - cvd[pos]
+    return cvd
@@ -1,23 +1,56 @@
 import asyncio
+import json
 import aiohttp
-from aiohttp_socks import ProxyConnector
-import pandas as pd
+import numpy as np
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the standard json module is used otherwise
+    orjson = None
 from config import (
     TIMEFRAMES, 
     DATA_FETCH_LIMIT, 
     MAJOR_COINS, 
-    SOCKS5_PROXY,
     ENABLE_DYNAMIC_SCAN,
     TOP_N_BY_VOLUME,
-    MIN_24H_QUOTE_VOLUME
+    MIN_24H_QUOTE_VOLUME,
+    BINANCE_BASE_URL,
+    CVD_SESSION_RESET,
+    RESAMPLE_HIGHER_TIMEFRAMES,
+    PRESCREEN_ENABLED,
+    OI_REFRESH_SECONDS,
+    LS_RATIO_REFRESH_SECONDS
 )
 from logger import log
+from sharding import filter_symbols_for_shard
+from metrics import FETCH_LATENCY, FRAME_BUILD_TIME, HISTORY_FALLBACKS
+from market_replay import record_raw_market_data
+from candles import CandleSeries
+from candle_store import CandleStore, candle_store, TIMEFRAME_MS
+from cvd import accumulate_cvd, volume_delta
+from resample import base_timeframe, resampled_timeframes, resample_candles
+from prescreen import parse_ticker_prices, series_needs_fetch
+from http_client import get_session
+from clock import clock
+from tracing import span
 
-BASE_URL = "https://fapi.binance.com"
+BASE_URL = BINANCE_BASE_URL
+
+# Candle column -> (endpoint, value key, refresh cadence in seconds) of the slower history sources
+HISTORY_SOURCES = {
+    'oi': ("/futures/data/openInterestHist", 'sumOpenInterestValue', OI_REFRESH_SECONDS),
+    'ls_ratio': ("/futures/data/globalLongShortAccountRatio", 'longShortRatio', LS_RATIO_REFRESH_SECONDS),
+}
 
 async def get_all_usdt_futures_symbols(session):
     """
-    Returns a list of symbols to monitor.
+    Returns the list of symbols monitored by this instance (its shard of the universe).
+    """
+    symbols = await _discover_symbols(session)
+    return filter_symbols_for_shard(symbols)
+
+async def _discover_symbols(session):
+    """
+    Returns the full list of symbols to monitor.
     If ENABLE_DYNAMIC_SCAN is True, fetches top volume USDT futures from Binance.
     Otherwise, returns the static MAJOR_COINS list.
     """
@@ -25,7 +58,7 @@ async def get_all_usdt_futures_symbols(session):
         if not MAJOR_COINS:
             log.warning("MAJOR_COINS list in config.py is empty and Dynamic Scan is disabled! No symbols will be scanned.")
             return []
-        log.info(f"Using the predefined list of {len(MAJOR_COINS)} major coins for scanning: {MAJOR_COINS}")
+        log.info("Using the predefined list of %s major coins for scanning: %s", len(MAJOR_COINS), MAJOR_COINS)
         return MAJOR_COINS
 
     log.info("Dynamic Scan Enabled: Fetching 24hr ticker data from Binance...")
@@ -60,112 +93,369 @@ async def get_all_usdt_futures_symbols(session):
         top_pairs = usdt_pairs[:TOP_N_BY_VOLUME]
         selected_symbols = [p['symbol'] for p in top_pairs]
         
-        log.info(f"Dynamic Scan selected top {len(selected_symbols)} coins by volume: {selected_symbols}")
+        log.info("Dynamic Scan selected top %s coins by volume: %s", len(selected_symbols), selected_symbols)
         return selected_symbols
 
     except Exception as e:
-        log.error(f"Error during dynamic symbol discovery: {e}. Falling back to MAJOR_COINS.")
+        log.error("Error during dynamic symbol discovery: %s. Falling back to MAJOR_COINS.", e)
         return MAJOR_COINS
 
-async def fetch_binance_server_time(session):
-    """Fetches the current server time from Binance (Futures API)."""
-    try:
-        url = f"{BASE_URL}/fapi/v1/time"
-        async with session.get(url) as response:
+# Kline row layout: [open_time, open, high, low, close, volume, close_time, quote_asset_volume,
+#                   number_of_trades, taker_buy_base_asset_volume, taker_buy_quote_asset_volume, ignore]
+KLINE_FLOAT_COLUMNS = {'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5, 'taker_buy_base_asset_volume': 9}
+
+def _loads(raw: bytes):
+    """Decodes a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def parse_klines(klines_data):
+    """
+    Decodes raw kline rows into (int64 open-time ms array, {column: float64 array}) for the columns we use.
+    Binance sends prices as strings; NumPy parses them directly while building each column.
+    """
+    columns = list(zip(*klines_data))
+    timestamps = np.array(columns[0], dtype=np.int64)
+    values = {name: np.array(columns[idx], dtype=np.float64) for name, idx in KLINE_FLOAT_COLUMNS.items()}
+    return timestamps, values
+
+def _parse_history(rows, value_key: str):
+    """Decodes an OI / L/S history response into sorted (int64 timestamp, float64 value) arrays."""
+    if not rows:
+        raise ValueError(f"Empty history response (expected '{value_key}')")
+    timestamps = np.fromiter((r['timestamp'] for r in rows), dtype=np.int64, count=len(rows))
+    values = np.array([r[value_key] for r in rows], dtype=np.float64)
+    if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+    return timestamps, values
+
+def _align_by_timestamp(target_ts, source_ts, source_values):
+    """Exact integer-timestamp join of a source series onto the kline timestamps (NaN where missing)."""
+    aligned = np.full(len(target_ts), np.nan)
+    positions = np.searchsorted(source_ts, target_ts)
+    in_range = positions < len(source_ts)
+    matched = np.zeros(len(target_ts), dtype=bool)
+    matched[in_range] = source_ts[positions[in_range]] == target_ts[in_range]
+    aligned[matched] = source_values[positions[matched]]
+    return aligned
+
+def _ffill(values):
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+def _bfill_then_ffill(values):
+    """Same result as DataFrame.bfill() followed by ffill() on a single column."""
+    if not np.isnan(values).any():
+        return values
+    return _ffill(_ffill(values[::-1])[::-1])
+
+def _fill_from(seed, values):
+    """Forward-fills a batch from the value stored before it (back-filling leading gaps when there is none)."""
+    if seed is not None and np.isnan(values[0]):
+        values[0] = seed
+    return _bfill_then_ffill(values)
+
+def _history_column(timestamps, rows, value_key: str, seed=None):
+    """
+    Joins an OI / L/S history response onto the kline timestamps. Without rows (not refreshed this
+    cycle, or the request failed) the last known value `seed` is carried forward, NaN if there is none.
+    """
+    if not rows:
+        return np.full(len(timestamps), np.nan if seed is None else seed, dtype=np.float64)
+    hist_ts, hist_values = _parse_history(rows, value_key)
+    return _fill_from(seed, _align_by_timestamp(timestamps, hist_ts, hist_values))
+
+def _merge_history(series: CandleSeries, name: str, rows, value_key: str):
+    """
+    Writes a history response over the stored column from its first matching candle onward, so rows
+    that only carried a cached value are corrected once fresh samples arrive.
+    """
+    hist_ts, hist_values = _parse_history(rows, value_key)
+    aligned = _align_by_timestamp(series.timestamps, hist_ts, hist_values)
+    matched = np.flatnonzero(~np.isnan(aligned))
+    if len(matched):
+        series.column(name)[matched[0]:] = _bfill_then_ffill(aligned[matched[0]:])
+
+def build_candle_series(symbol: str, timeframe: str, klines_data, oi_data, ls_data, capacity: int = None, cvd_anchor=None,
+                        history_seeds: dict = None) -> CandleSeries:
+    """
+    Builds the compact candle series from raw Binance klines, OI history and L/S ratio responses.
+    Only the columns used downstream are materialized; OI and L/S are joined on the integer open time.
+    `cvd_anchor` (open_time, cvd) carries the CVD level over from a previous run; `history_seeds`
+    ({'oi': value, 'ls_ratio': value}) fills a missing OI / L/S response (NaN without one).
+    """
+    history_seeds = history_seeds or {}
+    timestamps, columns = parse_klines(klines_data)
+
+    delta = volume_delta(columns['volume'], columns['taker_buy_base_asset_volume'])
+    columns['cvd'] = accumulate_cvd(timestamps, delta, anchor=cvd_anchor, step_ms=TIMEFRAME_MS.get(timeframe))
+
+    columns['oi'] = _history_column(timestamps, oi_data, 'sumOpenInterestValue', history_seeds.get('oi'))
+    columns['ls_ratio'] = _history_column(timestamps, ls_data, 'longShortRatio', history_seeds.get('ls_ratio'))
+
+    return CandleSeries.from_arrays(symbol, timeframe, timestamps, columns, capacity=capacity)
+
+def update_candle_series(series: CandleSeries, klines_data, oi_data, ls_data) -> int:
+    """
+    Merges an incremental fetch into an existing series: the previously live candle is finalized
+    in place and newly opened candles are appended. CVD continues from the stored rows; OI / L/S
+    carry the stored value forward and are then merged with their responses, when there are any.
+    Applying a cycle costs O(new candles).
+    Returns the number of appended candles.
+    """
+    timestamps, columns = parse_klines(klines_data)
+    first_ts = int(timestamps[0])
+
+    delta = volume_delta(columns['volume'], columns['taker_buy_base_asset_volume'])
+    columns['cvd'] = accumulate_cvd(timestamps, delta, anchor=series.cvd_anchor_before(first_ts),
+                                    step_ms=TIMEFRAME_MS.get(series.timeframe))
+
+    history = {'oi': oi_data, 'ls_ratio': ls_data}
+    for name in history:
+        columns[name] = _history_column(timestamps, None, HISTORY_SOURCES[name][1], seed=series.value_before(name, first_ts))
+
+    appended = series.extend(timestamps, columns)
+    for name, rows in history.items():
+        if rows:
+            _merge_history(series, name, rows, HISTORY_SOURCES[name][1])
+    return appended
+
+def resample_into_series(series: CandleSeries, base: CandleSeries, oi_data=None, ls_data=None):
+    """
+    Re-aggregates the base candles from the series' last (possibly still live) bucket onward and merges
+    them into the higher-timeframe series. OI / L/S come from the native-period responses when given,
+    otherwise the last stored values are carried forward.
+    Returns the number of appended candles, or None if the base window no longer covers that bucket.
+    """
+    from_ts = series.last_timestamp
+    base_ts = base.timestamps
+    start = int(np.searchsorted(base_ts, from_ts, side='left'))
+    if start >= len(base_ts) or base_ts[start] != from_ts:
+        return None
+
+    timestamps, columns = resample_candles(base_ts[start:], {name: base.column(name)[start:] for name in
+                                                             ('open', 'high', 'low', 'close', 'volume', 'cvd', 'oi', 'ls_ratio')},
+                                           TIMEFRAME_MS[series.timeframe])
+
+    # The base CVD at a bucket's last candle is the bucket's closing CVD. Without session resets the two
+    # series may have started accumulating at different points, so keep the higher series' own level.
+    if not CVD_SESSION_RESET:
+        series_anchor = series.cvd_anchor_before(from_ts)
+        base_anchor = base.cvd_anchor_before(from_ts)
+        if series_anchor is not None and base_anchor is not None:
+            columns['cvd'] = columns['cvd'] + (series_anchor[1] - base_anchor[1])
+
+    for name, data, key in (('oi', oi_data, 'sumOpenInterestValue'), ('ls_ratio', ls_data, 'longShortRatio')):
+        if data:
+            hist_ts, hist_values = _parse_history(data, key)
+            columns[name] = _fill_from(series.value_before(name, from_ts), _align_by_timestamp(timestamps, hist_ts, hist_values))
+        else:
+            columns[name] = np.full(len(timestamps), series.column(name)[-1], dtype=np.float64)
+
+    return series.extend(timestamps, columns)
+
+def build_market_dataframe(klines_data, oi_data, ls_data):
+    """Builds the indicator-ready DataFrame from raw responses (via the candle series)."""
+    return build_candle_series(None, None, klines_data, oi_data, ls_data).to_frame()
+
+async def _fetch_json(session, endpoint: str, params: dict):
+    """GETs a Binance REST endpoint and returns the decoded JSON body."""
+    with FETCH_LATENCY.time(endpoint=endpoint.rsplit('/', 1)[-1]):
+        async with session.get(f"{BASE_URL}{endpoint}", params=params) as response:
             response.raise_for_status()
-            data = await response.json()
-            server_time_ms = data['serverTime']
-            # Convert to UTC datetime
-            server_time_utc = pd.to_datetime(server_time_ms, unit='ms').to_pydatetime()
-            return server_time_utc
-    except Exception as e:
-        log.error(f"Failed to fetch Binance server time: {e}")
+            return _loads(await response.read())
+
+async def _fetch_history(session, symbol: str, timeframe: str, name: str, limit: int):
+    """One OI / L/S history request; a failure is logged and returns None so the cached values are kept."""
+    endpoint = HISTORY_SOURCES[name][0]
+    try:
+        return await _fetch_json(session, endpoint, {'symbol': symbol, 'period': timeframe, 'limit': limit})
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        HISTORY_FALLBACKS.inc(endpoint=endpoint.rsplit('/', 1)[-1])
+        log.warning("%s history unavailable for %s %s, keeping the cached values: %s", name, symbol, timeframe, e)
         return None
 
-async def get_binance_data_async(symbol: str, timeframe: str, session):
-    """Asynchronously fetches K-lines, OI, and L/S Ratio for a single symbol and timeframe."""
+async def _fetch_klines_and_history(session, symbol: str, timeframe: str, limit: int, history_limits: dict):
+    """
+    Requests the klines and the due history sources ({column: limit}) concurrently.
+    Returns (klines, {column: rows | None}); only a klines failure propagates.
+    """
+    names = list(history_limits)
+    klines_data, *rows = await asyncio.gather(
+        _fetch_json(session, "/fapi/v1/klines", {'symbol': symbol, 'interval': timeframe, 'limit': limit}),
+        *[_fetch_history(session, symbol, timeframe, name, history_limits[name]) for name in names])
+    return klines_data, dict(zip(names, rows))
+
+async def get_binance_data_async(symbol: str, timeframe: str, session, store: CandleStore = candle_store):
+    """
+    Asynchronously fetches K-lines, OI, and L/S Ratio for a single symbol and timeframe.
+    Only the candles missing from the stored rolling window are requested; the stored series is
+    updated in place. Returns (symbol, timeframe, CandleSeries | None).
+    """
     try:
-        # 1. Fetch K-lines
-        klines_url = f"{BASE_URL}/fapi/v1/klines"
-        params = {'symbol': symbol, 'interval': timeframe, 'limit': DATA_FETCH_LIMIT}
-        async with session.get(klines_url, params=params) as response:
-            response.raise_for_status()
-            klines_data = await response.json()
+        now_ms = int(clock.now() * 1000)
+        limit = store.fetch_limit(symbol, timeframe, now_ms)
+        series = store.get(symbol, timeframe)
+        rebuild = series is None or limit >= store.capacity
+
+        # K-lines, OI and L/S concurrently; OI and L/S only when their refresh cadence is due
+        history_limits = {}
+        for name, (_, _, refresh_seconds) in HISTORY_SOURCES.items():
+            history_limit = limit if rebuild else store.history_limit(symbol, timeframe, name, now_ms, refresh_seconds * 1000)
+            if history_limit is not None:
+                history_limits[name] = history_limit
+        with span("fetch", symbol=symbol, timeframe=timeframe):
+            klines_data, history = await _fetch_klines_and_history(session, symbol, timeframe, limit, history_limits)
 
         if not klines_data:
-            return symbol, timeframe, pd.DataFrame()
+            return symbol, timeframe, None
+        for name, rows in history.items():
+            if rows:
+                store.mark_history_fetched(symbol, timeframe, name, now_ms)
 
-        df = pd.DataFrame(klines_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'taker_buy_base_asset_volume']
-        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric)
+        oi_data, ls_data = history.get('oi'), history.get('ls_ratio')
+        # Incremental responses only cover the newest candles; they are merged into the recorded window
+        record_raw_market_data(symbol, timeframe, klines_data, oi_data, ls_data, merge=not rebuild, window=store.capacity)
 
-        volume_delta = df['taker_buy_base_asset_volume'] - (df['volume'] - df['taker_buy_base_asset_volume'])
-        df['cvd'] = volume_delta.cumsum()
-        
-        # 2. Fetch Open Interest (OI)
-        oi_url = f"{BASE_URL}/futures/data/openInterestHist"
-        oi_params = {'symbol': symbol, 'period': timeframe, 'limit': DATA_FETCH_LIMIT}
-        async with session.get(oi_url, params=oi_params) as response:
-            response.raise_for_status()
-            oi_data = await response.json()
-        oi_df = pd.DataFrame(oi_data)
-        oi_df['timestamp'] = pd.to_datetime(oi_df['timestamp'], unit='ms')
-        oi_df.set_index('timestamp', inplace=True)
-        df['oi'] = pd.to_numeric(oi_df['sumOpenInterestValue'])
-
-        # 3. Fetch Long/Short Ratio
-        ls_url = f"{BASE_URL}/futures/data/globalLongShortAccountRatio"
-        ls_params = {'symbol': symbol, 'period': timeframe, 'limit': DATA_FETCH_LIMIT}
-        async with session.get(ls_url, params=ls_params) as response:
-            response.raise_for_status()
-            ls_data = await response.json()
-        ls_df = pd.DataFrame(ls_data)
-        ls_df['timestamp'] = pd.to_datetime(ls_df['timestamp'], unit='ms')
-        ls_df.set_index('timestamp', inplace=True)
-        df['ls_ratio'] = pd.to_numeric(ls_df['longShortRatio'])
-        
-        df.bfill(inplace=True)
-        df.ffill(inplace=True)
-        
-        return symbol, timeframe, df
+        with FRAME_BUILD_TIME.time(), span("frame_build", symbol=symbol, timeframe=timeframe):
+            if rebuild:
+                # A stale series being reloaded still knows its last OI / L/S if those requests failed
+                seeds = {name: float(series.column(name)[-1]) for name in HISTORY_SOURCES} if series is not None and len(series) else None
+                series = build_candle_series(symbol, timeframe, klines_data, oi_data, ls_data, capacity=store.capacity,
+                                             cvd_anchor=store.cvd_anchor(symbol, timeframe), history_seeds=seeds)
+                store.put(series)
+            else:
+                update_candle_series(series, klines_data, oi_data, ls_data)
+
+        return symbol, timeframe, series
 
     except aiohttp.ClientError as e:
-        log.warning(f"Error fetching data for {symbol} {timeframe}: {e}")
-        return symbol, timeframe, pd.DataFrame()
+        log.warning("Error fetching data for %s %s: %s", symbol, timeframe, e)
+        return symbol, timeframe, None
     except Exception as e:
-        log.error(f"An unexpected error occurred for {symbol} {timeframe}: {e}")
-        return symbol, timeframe, pd.DataFrame()
+        log.error("An unexpected error occurred for %s %s: %s", symbol, timeframe, e)
+        return symbol, timeframe, None
+
+async def get_resampled_data_async(symbol: str, timeframe: str, base: CandleSeries, session, store: CandleStore = candle_store):
+    """
+    Updates a higher-timeframe series from the freshly fetched base series instead of fetching its klines.
+    OI and L/S are fetched at the native period only when a new bucket has opened. A series that is new,
+    or that the base window no longer covers, is (re)loaded natively.
+    Returns (symbol, timeframe, CandleSeries | None).
+    """
+    series = store.get(symbol, timeframe)
+    if base is None or series is None or store.fetch_limit(symbol, timeframe, int(clock.now() * 1000)) >= store.capacity:
+        return await get_binance_data_async(symbol, timeframe, session, store)
+
+    try:
+        step = TIMEFRAME_MS[timeframe]
+        new_buckets = (base.last_timestamp // step * step - series.last_timestamp) // step
+        oi_data = ls_data = None
+        if new_buckets > 0:
+            limit = int(new_buckets) + 2
+            with span("fetch", symbol=symbol, timeframe=timeframe):
+                oi_data, ls_data = await asyncio.gather(_fetch_history(session, symbol, timeframe, 'oi', limit),
+                                                        _fetch_history(session, symbol, timeframe, 'ls_ratio', limit))
+
+        with FRAME_BUILD_TIME.time(), span("frame_build", symbol=symbol, timeframe=timeframe):
+            appended = resample_into_series(series, base, oi_data, ls_data)
+        if appended is None:
+            log.info("Base window no longer covers %s %s; reloading it natively.", symbol, timeframe)
+            return await get_binance_data_async(symbol, timeframe, session, store)
+        return symbol, timeframe, series
+
+    except aiohttp.ClientError as e:
+        log.warning("Error fetching data for %s %s: %s", symbol, timeframe, e)
+        return symbol, timeframe, None
+    except Exception as e:
+        log.error("An unexpected error occurred for %s %s: %s", symbol, timeframe, e)
+        return symbol, timeframe, None
+
+async def get_symbol_data_async(symbol: str, session, store: CandleStore = candle_store):
+    """
+    Fetches the base (lowest) timeframe of a symbol and derives the higher ones from it by local resampling.
+    Returns a list of (symbol, timeframe, CandleSeries | None).
+    """
+    base_tf = base_timeframe(TIMEFRAMES)
+    higher = resampled_timeframes(TIMEFRAMES)
+    results = [await get_binance_data_async(symbol, base_tf, session, store)]
+    base = results[0][2]
+    for timeframe in TIMEFRAMES:
+        if timeframe == base_tf:
+            continue
+        if timeframe in higher:
+            results.append(await get_resampled_data_async(symbol, timeframe, base, session, store))
+        else:
+            results.append(await get_binance_data_async(symbol, timeframe, session, store))
+    return results
+
+async def fetch_ticker_prices(session):
+    """Latest price of every futures symbol in one request, or None if the request fails."""
+    try:
+        return parse_ticker_prices(await _fetch_json(session, "/fapi/v1/ticker/price", {}))
+    except Exception as e:
+        log.warning("Bulk ticker pre-screen failed, fetching every series: %s", e)
+        return None
+
+async def prescreen_series(session, symbols, store: CandleStore = candle_store):
+    """
+    Stage one of a cycle: a single bulk price request decides which (symbol, timeframe) series need
+    the full klines / OI / L/S fetch. Returns {symbol: [timeframes]} (every series if disabled or failed).
+    """
+    everything = {symbol: list(TIMEFRAMES) for symbol in symbols}
+    if not PRESCREEN_ENABLED:
+        return everything
+    prices = await fetch_ticker_prices(session)
+    if prices is None:
+        return everything
+
+    now_ms = int(clock.now() * 1000)
+    selected = {}
+    for symbol in symbols:
+        timeframes = [tf for tf in TIMEFRAMES if series_needs_fetch(store.get(symbol, tf), prices.get(symbol), now_ms)]
+        if timeframes:
+            selected[symbol] = timeframes
+    log.info("Pre-screen: %s of %s series need a fetch.", sum(map(len, selected.values())), len(symbols) * len(TIMEFRAMES))
+    return selected
 
 async def get_all_binance_data_async():
-    """Fetches data for monitored symbols and timeframes in parallel."""
-    if SOCKS5_PROXY:
-        # Enable SOCKS5 proxy for Binance requests if configured
-        connector = ProxyConnector.from_url(SOCKS5_PROXY, ssl=False)
-        log.info(f"Using SOCKS5 Proxy for Binance: {SOCKS5_PROXY}")
-    else:
-        connector = aiohttp.TCPConnector(ssl=False)
+    """
+    Fetches data for monitored symbols and timeframes in parallel (over the shared Binance session).
+    Returns {} when the pre-screen finds nothing to refresh, and None when no market data could be fetched.
+    """
+    session = get_session('binance')
+    symbols = await get_all_usdt_futures_symbols(session)
+    if not symbols:
+        return None
+        
+    candle_store.prune({(symbol, timeframe) for symbol in symbols for timeframe in TIMEFRAMES})
 
-    timeout = aiohttp.ClientTimeout(total=30)
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-        symbols = await get_all_usdt_futures_symbols(session)
-        if not symbols:
-            return {}
-            
+    selected = await prescreen_series(session, symbols)
+    if not selected:
+        return {}
+
+    if RESAMPLE_HIGHER_TIMEFRAMES:
+        # Higher timeframes are derived from the base one, so a selected symbol is refreshed as a whole
+        per_symbol = await asyncio.gather(*[get_symbol_data_async(symbol, session) for symbol in selected])
+        results = [result for symbol_results in per_symbol for result in symbol_results]
+    else:
         tasks = []
-        for symbol in symbols:
-            for timeframe in TIMEFRAMES:
+        for symbol, timeframes in selected.items():
+            for timeframe in timeframes:
                 tasks.append(get_binance_data_async(symbol, timeframe, session))
-        
-        results = await asyncio.gather(*tasks)
-        
-        # Return a dictionary of {symbol: {timeframe: dataframe}}
-        data = {}
-        for symbol, timeframe, df in results:
-            if not df.empty:
-                if symbol not in data:
-                    data[symbol] = {}
-                data[symbol][timeframe] = df
-        return data
 
+        results = await asyncio.gather(*tasks)
+    candle_store.save_cvd_state()
+    
+    # Return a dictionary of {symbol: {timeframe: CandleSeries}}
+    data = {}
+    for symbol, timeframe, series in results:
+        if series is not None and len(series):
+            if symbol not in data:
+                data[symbol] = {}
+            data[symbol][timeframe] = series
+    return data or None
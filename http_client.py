@@ -0,0 +1,56 @@
+import asyncio
+import ssl
+from functools import lru_cache
+import aiohttp
+from config import SOCKS5_PROXY
+from logger import log
+
+# name -> (event loop, aiohttp.ClientSession); a session can only be used on the loop it was created on
+_sessions = {}
+
+@lru_cache(maxsize=None)
+def tls_context() -> ssl.SSLContext:
+    """The certifi-backed TLS context, built once per process."""
+    import certifi
+    return ssl.create_default_context(cafile=certifi.where())
+
+def _binance_session():
+    if SOCKS5_PROXY:
+        # Only deployments behind a proxy pay for importing aiohttp_socks
+        from aiohttp_socks import ProxyConnector
+        log.info("Using SOCKS5 Proxy for Binance: %s", SOCKS5_PROXY)
+        connector = ProxyConnector.from_url(SOCKS5_PROXY, ssl=False)
+    else:
+        connector = aiohttp.TCPConnector(ssl=False)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+
+def _ai_session():
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=tls_context()), timeout=aiohttp.ClientTimeout(total=60))
+
+def _webhook_session():
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=tls_context()))
+
+SESSION_FACTORIES = {
+    'binance': _binance_session,
+    'ai': _ai_session,
+    'webhook': _webhook_session,
+}
+
+def get_session(name: str) -> aiohttp.ClientSession:
+    """
+    Returns the long-lived session for an upstream ('binance', 'ai' or 'webhook'), creating it on first use.
+    Connections are kept alive across cycles instead of being re-established for every request.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _sessions.get(name)
+    if entry is None or entry[0] is not loop or entry[1].closed:
+        entry = _sessions[name] = (loop, SESSION_FACTORIES[name]())
+    return entry[1]
+
+async def close_sessions():
+    """Closes the sessions opened on the running loop (call before the loop shuts down)."""
+    loop = asyncio.get_running_loop()
+    for name, (session_loop, session) in list(_sessions.items()):
+        if session_loop is loop:
+            await session.close()
+            del _sessions[name]
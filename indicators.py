@@ -1,11 +1,26 @@
-import pandas as pd
-import pandas_ta as ta
-from config import *
+import numpy as np
+from typing import TYPE_CHECKING
+from config import (
+    BB_LENGTH, BB_STD, CVD_SESSION_RESET, DATA_FETCH_LIMIT, FVG_LOOKBACK, OB_ATR_MULTIPLIER, OB_LOOKBACK,
+    RSI_DIVERGENCE_WINDOW, RSI_LENGTH, VOLUME_MA_LENGTH, VOLUME_SPIKE_THRESHOLD
+)
 from abc import ABC, abstractmethod
+from functools import partial
+from kernels import fvg_scan, divergence_scan, order_block_scan
 
-def _create_market_snapshot(df: pd.DataFrame, primary_signal: dict):
+if TYPE_CHECKING:
+    import pandas as pd  # annotations only; frames come from CandleSeries.to_frame()
+
+def _require_ta():
     """
-    Creates a rich data package containing the primary signal and a market context snapshot.
+    Imports pandas_ta, which registers the `DataFrame.ta` accessor. It is slow to import, so this
+    happens on the first indicator computation instead of at startup.
+    """
+    import pandas_ta  # noqa: F401
+
+def _build_market_context(df: 'pd.DataFrame'):
+    """
+    Builds the market context snapshot (recent klines, key/technical indicators, structure) for a signal.
     """
     # 1. Extract the last 16 candlesticks
     recent_klines = df.tail(16).copy()
@@ -20,9 +35,12 @@ def _create_market_snapshot(df: pd.DataFrame, primary_signal: dict):
         "cvd": f"{latest_indicators['cvd'].iloc[0]:,.0f}",
         "long_short_ratio": f"{latest_indicators['ls_ratio'].iloc[0]:.3f}"
     }
+    if CVD_SESSION_RESET:
+        context_indicators["cvd_session"] = f"{CVD_SESSION_RESET} (UTC)"
     
     # 3. Calculate additional technical indicators (RSI, EMA, ATR)
     # Optimize: Check if columns exist to avoid redundant calculation
+    _require_ta()
     if 'RSI_14' not in df.columns:
         df.ta.rsi(length=14, append=True)
     if 'EMA_12' not in df.columns:
@@ -59,16 +77,41 @@ def _create_market_snapshot(df: pd.DataFrame, primary_signal: dict):
         "dist_from_low": f"{(current_close - recent_low)/recent_low*100:.2f}%"
     }
 
+    return {
+        "recent_klines": klines_data,
+        "key_indicators": context_indicators,
+        "technical_indicators": tech_indicators,
+        "market_structure": structure
+    }
+
+def _defer_market_snapshot(df: 'pd.DataFrame', primary_signal: dict):
+    """
+    Returns the primary signal with the market context left unbuilt.
+    Most hits are suppressed by cooldown, so the context is only built by `materialize_signal`
+    once the alert is actually going out.
+    """
     return {
         "primary_signal": primary_signal,
-        "market_context": {
-            "recent_klines": klines_data,
-            "key_indicators": context_indicators,
-            "technical_indicators": tech_indicators,
-            "market_structure": structure
-        }
+        "market_context_builder": partial(_build_market_context, df)
     }
 
+def materialize_signal(signal: dict):
+    """Builds the deferred market context of a signal in place (no-op if already built) and returns it."""
+    builder = signal.pop("market_context_builder", None)
+    if builder is not None:
+        signal["market_context"] = builder()
+    return signal
+
+def _create_market_snapshot(df: 'pd.DataFrame', primary_signal: dict):
+    """
+    Creates a rich data package containing the primary signal and a market context snapshot.
+    """
+    return materialize_signal(_defer_market_snapshot(df, primary_signal))
+
+def _price_arrays(df: 'pd.DataFrame'):
+    """(open, high, low, close) as float64 arrays for the scan kernels."""
+    return tuple(df[column].to_numpy(dtype=np.float64) for column in ('open', 'high', 'low', 'close'))
+
 class BaseSignal(ABC):
     """
     Abstract base class for all signal detectors.
@@ -81,11 +124,28 @@ class BaseSignal(ABC):
         """
         pass
 
+    @property
+    def lookback(self):
+        """
+        Returns how many of the most recent candles the detector reads (indicator warm-up excluded).
+        Used to size the per-series rolling window.
+        """
+        return DATA_FETCH_LIMIT
+
+    @property
+    def evaluation(self):
+        """
+        "close": evaluated once per closed candle, on closed candles only.
+        "intrabar": evaluated on the live (still forming) candle and confirmed when it closes.
+        """
+        return "close"
+
     @abstractmethod
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         """
         Checks for the signal in the given DataFrame.
         Returns a signal data dictionary if a signal is found, otherwise None.
+        The market context is deferred; call `materialize_signal` before using it.
         """
         pass
 
@@ -98,65 +158,32 @@ class FairValueGapSignal(BaseSignal):
     def name(self):
         return "Fair Value Gap Rebalance"
 
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    @property
+    def lookback(self):
+        return FVG_LOOKBACK
+
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         if len(df) < 5:  # Need at least 5 candles to detect FVG and subsequent moves
             return None
 
-        # FVG Detection
-        for i in range(len(df) - 4, 0, -1): # Iterate backwards to find the latest FVG
-            candle_minus_2 = df.iloc[i-1]
-            candle_minus_1 = df.iloc[i]
-            candle_zero = df.iloc[i+1]
-
-            # Bullish FVG: High of candle[-2] < Low of candle[0]
-            is_bullish_fvg = candle_minus_2['high'] < candle_zero['low']
-            # Bearish FVG: Low of candle[-2] > High of candle[0]
-            is_bearish_fvg = candle_minus_2['low'] > candle_zero['high']
-
-            if is_bullish_fvg or is_bearish_fvg:
-                fvg_top = candle_zero['low'] if is_bullish_fvg else candle_minus_2['low']
-                fvg_bottom = candle_minus_2['high'] if is_bullish_fvg else candle_zero['high']
-                
-                # Check for rebalance and confirmation in the candles following the FVG
-                for j in range(i + 2, len(df)):
-                    current_candle = df.iloc[j]
-                    
-                    # Price entered the FVG zone
-                    price_in_fvg = fvg_bottom <= current_candle['low'] <= fvg_top or \
-                                   fvg_bottom <= current_candle['high'] <= fvg_top
-
-                    if price_in_fvg:
-                        # Confirmation: Bullish reversal (e.g., Hammer) after rebalancing in a bullish FVG
-                        if is_bullish_fvg and (current_candle['close'] > current_candle['open']):
-                            body_size = abs(current_candle['close'] - current_candle['open'])
-                            lower_wick = current_candle['open'] - current_candle['low']
-                            if lower_wick > body_size * 2: # Simple Hammer check
-                                signal = {
-                                    "indicator": self.name,
-                                    "signal_type": "Bullish Reversal Confirmation",
-                                    "fvg_top": f"{fvg_top:.2f}",
-                                    "fvg_bottom": f"{fvg_bottom:.2f}",
-                                    "confirmation_candle": "Hammer",
-                                    "current_price": f"{current_candle['close']:.2f}"
-                                }
-                                return _create_market_snapshot(df, signal)
-
-                        # Confirmation: Bearish reversal (e.g., Shooting Star) after rebalancing in a bearish FVG
-                        elif is_bearish_fvg and (current_candle['close'] < current_candle['open']):
-                            body_size = abs(current_candle['open'] - current_candle['close'])
-                            upper_wick = current_candle['high'] - current_candle['open']
-                            if upper_wick > body_size * 2: # Simple Shooting Star check
-                                signal = {
-                                    "indicator": self.name,
-                                    "signal_type": "Bearish Reversal Confirmation",
-                                    "fvg_top": f"{fvg_top:.2f}",
-                                    "fvg_bottom": f"{fvg_bottom:.2f}",
-                                    "confirmation_candle": "Shooting Star",
-                                    "current_price": f"{current_candle['close']:.2f}"
-                                }
-                                return _create_market_snapshot(df, signal)
-                break # Found the latest FVG, no need to check older ones
-        return None
+        open_, high, low, close = _price_arrays(df)
+        direction, i, j = fvg_scan(open_, high, low, close, FVG_LOOKBACK)
+        if direction == 0:
+            return None
+
+        if direction == 1:
+            fvg_top, fvg_bottom = low[i + 1], high[i - 1]
+        else:
+            fvg_top, fvg_bottom = low[i - 1], high[i + 1]
+        signal = {
+            "indicator": self.name,
+            "signal_type": "Bullish Reversal Confirmation" if direction == 1 else "Bearish Reversal Confirmation",
+            "fvg_top": f"{fvg_top:.2f}",
+            "fvg_bottom": f"{fvg_bottom:.2f}",
+            "confirmation_candle": "Hammer" if direction == 1 else "Shooting Star",
+            "current_price": f"{close[j]:.2f}"
+        }
+        return _defer_market_snapshot(df, signal)
 
 class RSIDivergenceSignal(BaseSignal):
     """
@@ -166,87 +193,46 @@ class RSIDivergenceSignal(BaseSignal):
     def name(self):
         return "RSI Divergence"
 
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    @property
+    def lookback(self):
+        return RSI_LENGTH + RSI_DIVERGENCE_WINDOW + 5
+
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         if len(df) < RSI_LENGTH + RSI_DIVERGENCE_WINDOW + 5:
             return None
 
         # Ensure RSI is calculated
         rsi_col = f'RSI_{RSI_LENGTH}'
         if rsi_col not in df.columns:
+            _require_ta()
             df.ta.rsi(length=RSI_LENGTH, append=True)
         
-        # We need to find local extrema (pivots) for Price and RSI
-        
-        curr_idx = len(df) - 2 # The last closed candle
-        if curr_idx < 5: return None
-        
-        # Candidate Pivot at i (using -2 as the "current" confirmed pivot point)
-        i = len(df) - 2
-        
-        # 1. Bullish Divergence Check (Lower Price Lows, Higher RSI Lows)
-        # Check if candle[i] is a local Low
-        is_price_low = df.iloc[i]['low'] < df.iloc[i-1]['low'] and df.iloc[i]['low'] < df.iloc[i+1]['low']
-        
-        if is_price_low:
-            curr_low_price = df.iloc[i]['low']
-            curr_low_rsi = df.iloc[i][rsi_col]
-            
-            # Find a previous local low within the window
-            for j in range(i - 2, i - RSI_DIVERGENCE_WINDOW, -1):
-                if j < 2: break
-                
-                # Check if j is a local low
-                is_prev_low = df.iloc[j]['low'] < df.iloc[j-1]['low'] and df.iloc[j]['low'] < df.iloc[j+1]['low']
-                
-                if is_prev_low:
-                    prev_low_price = df.iloc[j]['low']
-                    prev_low_rsi = df.iloc[j][rsi_col]
-                    
-                    # Bullish Divergence Condition
-                    if curr_low_price < prev_low_price and curr_low_rsi > prev_low_rsi:
-                        signal = {
-                            "indicator": self.name,
-                            "signal_type": "Bullish Divergence",
-                            "current_low": f"{curr_low_price:.2f}",
-                            "prev_low": f"{prev_low_price:.2f}",
-                            "current_rsi": f"{curr_low_rsi:.2f}",
-                            "prev_rsi": f"{prev_low_rsi:.2f}",
-                            "current_price": f"{df.iloc[-1]['close']:.2f}"
-                        }
-                        return _create_market_snapshot(df, signal)
-                    break # Only compare with the most recent previous pivot
-
-        # 2. Bearish Divergence Check (Higher Price Highs, Lower RSI Highs)
-        # Check if candle[i] is a local High
-        is_price_high = df.iloc[i]['high'] > df.iloc[i-1]['high'] and df.iloc[i]['high'] > df.iloc[i+1]['high']
-        
-        if is_price_high:
-            curr_high_price = df.iloc[i]['high']
-            curr_high_rsi = df.iloc[i][rsi_col]
-            
-            # Find a previous local high within the window
-            for j in range(i - 2, i - RSI_DIVERGENCE_WINDOW, -1):
-                if j < 2: break
-                
-                # Check if j is a local high
-                if df.iloc[j]['high'] > df.iloc[j-1]['high'] and df.iloc[j]['high'] > df.iloc[j+1]['high']:
-                    prev_high_price = df.iloc[j]['high']
-                    prev_high_rsi = df.iloc[j][rsi_col]
-                    
-                    # Bearish Divergence Condition
-                    if curr_high_price > prev_high_price and curr_high_rsi < prev_high_rsi:
-                        signal = {
-                            "indicator": self.name,
-                            "signal_type": "Bearish Divergence",
-                            "current_high": f"{curr_high_price:.2f}",
-                            "prev_high": f"{prev_high_price:.2f}",
-                            "current_rsi": f"{curr_high_rsi:.2f}",
-                            "prev_rsi": f"{prev_high_rsi:.2f}",
-                            "current_price": f"{df.iloc[-1]['close']:.2f}"
-                        }
-                        return _create_market_snapshot(df, signal)
-                    break
-
+        # Pivot comparison of the last closed candle against the previous pivot in the window
+        _, high, low, close = _price_arrays(df)
+        rsi = df[rsi_col].to_numpy(dtype=np.float64)
+        direction, i, j = divergence_scan(low, high, rsi, RSI_DIVERGENCE_WINDOW)
+        if direction == 1:
+            signal = {
+                "indicator": self.name,
+                "signal_type": "Bullish Divergence",
+                "current_low": f"{low[i]:.2f}",
+                "prev_low": f"{low[j]:.2f}",
+                "current_rsi": f"{rsi[i]:.2f}",
+                "prev_rsi": f"{rsi[j]:.2f}",
+                "current_price": f"{close[-1]:.2f}"
+            }
+            return _defer_market_snapshot(df, signal)
+        if direction == -1:
+            signal = {
+                "indicator": self.name,
+                "signal_type": "Bearish Divergence",
+                "current_high": f"{high[i]:.2f}",
+                "prev_high": f"{high[j]:.2f}",
+                "current_rsi": f"{rsi[i]:.2f}",
+                "prev_rsi": f"{rsi[j]:.2f}",
+                "current_price": f"{close[-1]:.2f}"
+            }
+            return _defer_market_snapshot(df, signal)
         return None
 
 class BollingerBandsBreakoutSignal(BaseSignal):
@@ -257,12 +243,17 @@ class BollingerBandsBreakoutSignal(BaseSignal):
     def name(self):
         return "Bollinger Bands Breakout"
 
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    @property
+    def lookback(self):
+        return BB_LENGTH + 5
+
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         if len(df) < BB_LENGTH + 5:
             return None
 
         # Calculate Bollinger Bands
         # Returns a dataframe with columns like BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
+        _require_ta()
         bb_df = df.ta.bbands(length=BB_LENGTH, std=BB_STD)
         
         if bb_df is None: return None
@@ -298,7 +289,7 @@ class BollingerBandsBreakoutSignal(BaseSignal):
                 "close_price": f"{current_candle['close']:.2f}",
                 "current_price": f"{current_candle['close']:.2f}"
             }
-             return _create_market_snapshot(df, signal)
+             return _defer_market_snapshot(df, signal)
 
         # Bearish Breakout: Close crosses below Lower Band
         if prev_candle['close'] >= prev_lower and current_candle['close'] < current_lower:
@@ -309,7 +300,7 @@ class BollingerBandsBreakoutSignal(BaseSignal):
                 "close_price": f"{current_candle['close']:.2f}",
                 "current_price": f"{current_candle['close']:.2f}"
             }
-             return _create_market_snapshot(df, signal)
+             return _defer_market_snapshot(df, signal)
              
         return None
 
@@ -321,12 +312,21 @@ class VolumeSpikeSignal(BaseSignal):
     def name(self):
         return "Volume Spike"
 
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    @property
+    def lookback(self):
+        return VOLUME_MA_LENGTH + 5
+
+    @property
+    def evaluation(self):
+        return "intrabar"
+
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         if len(df) < VOLUME_MA_LENGTH + 5:
             return None
 
         # Calculate Volume SMA
         # df.ta.sma returns a Series
+        _require_ta()
         vol_sma = df.ta.sma(close=df['volume'], length=VOLUME_MA_LENGTH)
         
         if vol_sma is None: return None
@@ -348,7 +348,7 @@ class VolumeSpikeSignal(BaseSignal):
                 "ratio": f"{current_vol/current_sma:.1f}x",
                 "current_price": f"{df.iloc[-1]['close']:.2f}"
             }
-            return _create_market_snapshot(df, signal)
+            return _defer_market_snapshot(df, signal)
             
         return None
 
@@ -361,78 +361,35 @@ class OrderBlockSignal(BaseSignal):
     def name(self):
         return "Order Block"
 
-    def check(self, df: pd.DataFrame, symbol: str = None):
+    @property
+    def lookback(self):
+        return OB_LOOKBACK + 5
+
+    @property
+    def evaluation(self):
+        return "intrabar"
+
+    def check(self, df: 'pd.DataFrame', symbol: str = None):
         if len(df) < OB_LOOKBACK + 5: return None
         
         # Ensure ATR is there for displacement check
         if 'ATRr_14' not in df.columns:
+            _require_ta()
             df.ta.atr(length=14, append=True)
             
-        current_candle = df.iloc[-1]
-        
-        # Iterate backwards to find the *first* (most recent) OB that matches the current price
-        # We start from -2 (completed candle) back to OB_LOOKBACK
-        for i in range(len(df) - 2, len(df) - OB_LOOKBACK, -1):
-            candle = df.iloc[i]     # The displacement candle candidate
-            prev_candle = df.iloc[i-1] # The OB candidate
-            
-            # Safe ATR access
-            atr = df.iloc[i]['ATRr_14'] if 'ATRr_14' in df.columns and not pd.isna(df.iloc[i]['ATRr_14']) else 0
-            if atr == 0: continue
-            
-            body_size = abs(candle['close'] - candle['open'])
-            
-            # Check for Displacement: Body significantly larger than ATR
-            if body_size > atr * OB_ATR_MULTIPLIER:
-                
-                # --- Potential Bearish OB ---
-                # Pattern: Green Candle (OB) -> Large Red Candle (Displacement)
-                # But strict color isn't always required, just the move. 
-                # Standard ICT: The last up candle before the down move.
-                
-                if candle['close'] < candle['open']: # Downward displacement
-                    ob_top = prev_candle['high']
-                    ob_bottom = prev_candle['low']
-                    
-                    # Check if OB Candle was actually "Up" (Green) or at least not a massive red one?
-                    # ICT: "Last up close candle". Let's stick to standard definition: Green candle.
-                    if prev_candle['close'] > prev_candle['open']:
-                        
-                        # Check if CURRENT price is retesting this zone
-                        # Overlap logic
-                        is_retesting = (current_candle['high'] >= ob_bottom) and (current_candle['low'] <= ob_top)
-                        
-                        if is_retesting:
-                             signal = {
-                                "indicator": self.name,
-                                "signal_type": "Bearish OB Retest",
-                                "ob_top": f"{ob_top:.2f}",
-                                "ob_bottom": f"{ob_bottom:.2f}",
-                                "displacement_candle_date": str(candle.name), # Index is usually datetime
-                                "current_price": f"{current_candle['close']:.2f}"
-                            }
-                             return _create_market_snapshot(df, signal)
-
-                # --- Potential Bullish OB ---
-                # Pattern: Red Candle (OB) -> Large Green Candle (Displacement)
-                elif candle['close'] > candle['open']: # Upward displacement
-                    ob_top = prev_candle['high']
-                    ob_bottom = prev_candle['low']
-                    
-                    # ICT: "Last down close candle". Red candle.
-                    if prev_candle['close'] < prev_candle['open']:
-                        
-                        is_retesting = (current_candle['high'] >= ob_bottom) and (current_candle['low'] <= ob_top)
-                        
-                        if is_retesting:
-                             signal = {
-                                "indicator": self.name,
-                                "signal_type": "Bullish OB Retest",
-                                "ob_top": f"{ob_top:.2f}",
-                                "ob_bottom": f"{ob_bottom:.2f}",
-                                "displacement_candle_date": str(candle.name),
-                                "current_price": f"{current_candle['close']:.2f}"
-                            }
-                             return _create_market_snapshot(df, signal)
-                           
-        return None
+        # Most recent displacement whose order block (the candle before it) the current candle retests
+        open_, high, low, close = _price_arrays(df)
+        atr = df['ATRr_14'].to_numpy(dtype=np.float64) if 'ATRr_14' in df.columns else np.zeros(len(df))
+        direction, i = order_block_scan(open_, high, low, close, atr, float(OB_ATR_MULTIPLIER), OB_LOOKBACK)
+        if direction == 0:
+            return None
+
+        signal = {
+            "indicator": self.name,
+            "signal_type": "Bullish OB Retest" if direction == 1 else "Bearish OB Retest",
+            "ob_top": f"{high[i - 1]:.2f}",
+            "ob_bottom": f"{low[i - 1]:.2f}",
+            "displacement_candle_date": str(df.index[i]), # Index is usually datetime
+            "current_price": f"{close[-1]:.2f}"
+        }
+        return _defer_market_snapshot(df, signal)
@@ -0,0 +1,126 @@
+"""
+Scan kernels of the FVG, Order Block and RSI divergence detectors.
+
+The kernels are plain loops over float64 arrays with early exits. With DETECTOR_BACKEND=numba they are
+compiled with `numba.njit(cache=True)`, so the machine code is written next to the module and later
+launches load it instead of re-compiling. Numba is imported and the kernels compiled on their first call,
+not at startup. Without Numba (or with DETECTOR_BACKEND=numpy) the same functions run as Python over
+NumPy arrays.
+Each kernel returns (direction, index...) with direction 1 (bullish), -1 (bearish) or 0 (nothing found).
+"""
+from functools import lru_cache
+import numpy as np
+from config import DETECTOR_BACKEND
+from logger import log
+
+@lru_cache(maxsize=None)
+def numba_module():
+    """The numba module, or None when it is not installed."""
+    try:
+        import numba
+    except ImportError:  # Optional: the kernels run uncompiled without it
+        return None
+    return numba
+
+def jit(func):
+    """Compiles a kernel with Numba (cached on disk)."""
+    return numba_module().njit(cache=True, nogil=True)(func)
+
+@lru_cache(maxsize=None)
+def backend() -> str:
+    """The kernel backend in use: "numba", or "numpy" when it is not selected or not installed."""
+    if DETECTOR_BACKEND == "numba":
+        if numba_module() is not None:
+            return "numba"
+        log.info("DETECTOR_BACKEND=numba but Numba is not installed; detector kernels run on NumPy.")
+    return "numpy"
+
+def _compile(func):
+    """Defers the backend choice (and any compilation) to the kernel's first call."""
+    kernel = None
+
+    def dispatch(*args):
+        nonlocal kernel
+        if kernel is None:
+            kernel = jit(func) if backend() == "numba" else func
+        return kernel(*args)
+    return dispatch
+
+def _fvg_scan(open_, high, low, close, lookback):
+    """
+    Finds the latest FVG (candles i-1 / i+1 not overlapping) and, after it, the first candle that
+    trades into the gap with a Hammer (bullish gap) or Shooting Star (bearish gap).
+    Returns (direction, i, j): the FVG's middle candle and the confirmation candle.
+    """
+    n = len(close)
+    for i in range(n - 4, max(n - lookback, 0), -1):
+        is_bullish = high[i - 1] < low[i + 1]
+        is_bearish = low[i - 1] > high[i + 1]
+        if not (is_bullish or is_bearish):
+            continue
+        top = low[i + 1] if is_bullish else low[i - 1]
+        bottom = high[i - 1] if is_bullish else high[i + 1]
+        for j in range(i + 2, n):
+            if not (bottom <= low[j] <= top or bottom <= high[j] <= top):
+                continue
+            if is_bullish and close[j] > open_[j]:
+                if open_[j] - low[j] > abs(close[j] - open_[j]) * 2:
+                    return 1, i, j
+            elif is_bearish and close[j] < open_[j]:
+                if high[j] - open_[j] > abs(open_[j] - close[j]) * 2:
+                    return -1, i, j
+        break
+    return 0, -1, -1
+
+def _divergence_scan(low, high, rsi, window):
+    """
+    Compares the pivot at the last closed candle (n-2) with the most recent earlier pivot inside `window`:
+    a lower price low with a higher RSI low is bullish, a higher price high with a lower RSI high bearish.
+    Returns (direction, i, j): the current and the previous pivot.
+    """
+    i = len(low) - 2
+    if low[i] < low[i - 1] and low[i] < low[i + 1]:
+        for j in range(i - 2, i - window, -1):
+            if j < 2:
+                break
+            if low[j] < low[j - 1] and low[j] < low[j + 1]:
+                if low[i] < low[j] and rsi[i] > rsi[j]:
+                    return 1, i, j
+                break
+    if high[i] > high[i - 1] and high[i] > high[i + 1]:
+        for j in range(i - 2, i - window, -1):
+            if j < 2:
+                break
+            if high[j] > high[j - 1] and high[j] > high[j + 1]:
+                if high[i] > high[j] and rsi[i] < rsi[j]:
+                    return -1, i, j
+                break
+    return 0, -1, -1
+
+def _order_block_scan(open_, high, low, close, atr, multiplier, lookback):
+    """
+    Finds the most recent displacement candle (body > ATR * multiplier) whose preceding opposite-colored
+    candle (the order block) is being retested by the last candle.
+    Returns (direction, i): the displacement candle; the order block is i-1.
+    """
+    n = len(close)
+    current = n - 1
+    for i in range(n - 2, n - lookback, -1):
+        if np.isnan(atr[i]) or atr[i] == 0:
+            continue
+        if abs(close[i] - open_[i]) <= atr[i] * multiplier:
+            continue
+        ob_top = high[i - 1]
+        ob_bottom = low[i - 1]
+        is_retesting = high[current] >= ob_bottom and low[current] <= ob_top
+        if close[i] < open_[i]:
+            if close[i - 1] > open_[i - 1] and is_retesting:
+                return -1, i
+        elif close[i] > open_[i]:
+            if close[i - 1] < open_[i - 1] and is_retesting:
+                return 1, i
+    return 0, -1
+
+fvg_scan = _compile(_fvg_scan)
+divergence_scan = _compile(_divergence_scan)
+order_block_scan = _compile(_order_block_scan)
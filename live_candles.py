@@ -0,0 +1,43 @@
+class EvaluationTracker:
+    """
+    Remembers, per (symbol, timeframe, checker), which candles have already been evaluated so that
+    re-running a cycle inside the same candle only does the work that can change the outcome:
+      - on-close checkers run once per newly closed candle;
+      - intrabar checkers run on the live candle until they fire, then rest until it closes,
+        when a single confirmation check is made on the closed candle.
+    """
+    __slots__ = ("_evaluated", "_fired", "_pending")
+
+    def __init__(self):
+        self._evaluated = {}   # key -> open time of the last closed candle evaluated
+        self._fired = {}       # key -> open time of the live candle an intrabar checker fired on
+        self._pending = {}     # key -> open time of a fired live candle awaiting its close
+
+    def needs_close_check(self, key, closed_ts):
+        """True (and records it) if the closed candle at `closed_ts` has not been evaluated for `key` yet."""
+        if closed_ts is None or self._evaluated.get(key) == closed_ts:
+            return False
+        self._evaluated[key] = closed_ts
+        return True
+
+    def needs_live_check(self, key, live_ts):
+        """True unless the intrabar checker already fired on the live candle at `live_ts`."""
+        return live_ts is not None and self._fired.get(key) != live_ts
+
+    def mark_fired(self, key, live_ts):
+        self._fired[key] = live_ts
+        self._pending[key] = live_ts
+
+    def due_confirmation(self, key, closed_ts):
+        """Open time of a fired live candle that has closed by now (popped), or None."""
+        pending = self._pending.get(key)
+        if pending is None or closed_ts is None or pending > closed_ts:
+            return None
+        del self._pending[key]
+        return pending
+
+    def prune(self, active_keys):
+        """Forgets keys of series that are no longer monitored."""
+        for table in (self._evaluated, self._fired, self._pending):
+            for key in [k for k in table if k[:2] not in active_keys]:
+                del table[key]
@@ -1,27 +1,118 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+from config import LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT_PER_MINUTE, LOG_RATE_LIMIT_OVERRIDES
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a JSON field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "rate_limited"}
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `limit` INFO/DEBUG records per (module, message template) through per window and
+    counts the rest. The first record of the next window carries the count as `rate_limited`.
+    Warnings and errors are never dropped.
+    """
+    def __init__(self, limit: int, overrides: dict = None, window: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.overrides = overrides or {}
+        self.window = window
+        # (module, template) -> [window start, records let through, records dropped]
+        self._windows = {}
+        self._last_sweep = 0.0
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        limit = self.overrides.get(record.module, self.limit)
+        if limit <= 0:
+            return True
+        if record.created - self._last_sweep >= self.window:
+            self._evict(record.created)
+        key = (record.module, record.msg)
+        state = self._windows.get(key)
+        if state is None or record.created - state[0] >= self.window:
+            if state is not None and state[2]:
+                record.rate_limited = state[2]
+            self._windows[key] = [record.created, 1, 0]
+            return True
+        if state[1] < limit:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+    def _evict(self, now: float):
+        """Forgets windows that have expired, so one-off messages do not accumulate."""
+        self._windows = {key: state for key, state in self._windows.items() if now - state[0] < self.window}
+        self._last_sweep = now
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        dropped = getattr(record, "rate_limited", 0)
+        return f"{line} [{dropped} similar messages rate-limited]" if dropped else line
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as top-level keys."""
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if getattr(record, "rate_limited", 0):
+            entry["rate_limited"] = record.rate_limited
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the record as is. The stock QueueHandler formats the message in the calling thread;
+    here the %-arguments are only merged when the listener thread formats the line.
+    """
+    def prepare(self, record):
+        return record
 
 def setup_logger():
     """
     Sets up a centralized logger for the application.
+    Callers only enqueue records; a background QueueListener formats them and writes to stdout.
     """
     logger = logging.getLogger("CryptoSignalBot")
     if not logger.handlers: # Avoid adding handlers multiple times
-        logger.setLevel(logging.INFO)
+        logger.setLevel(LOG_LEVEL)
         
-        # Create a handler to print to console
+        # Create a handler to print to console (runs on the listener thread)
         handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.INFO)
         
         # Create a formatter and set it for the handler
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        if LOG_FORMAT == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = TextFormatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
         handler.setFormatter(formatter)
-        
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT_PER_MINUTE, LOG_RATE_LIMIT_OVERRIDES))
+        listener = logging.handlers.QueueListener(log_queue, handler)
+        listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(listener.stop)
+
         # Add the handler to the logger
-        logger.addHandler(handler)
+        logger.addHandler(queue_handler)
         
     return logger
 
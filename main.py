@@ -1,35 +1,64 @@
+import argparse
 import asyncio
+import importlib
+import os
 from datetime import datetime, time, timedelta
-import pytz
-from config import TIMEFRAMES, ACTIVE_SIGNALS, ACTIVE_SESSIONS, SOCKS5_PROXY
-from data_fetcher import get_all_binance_data_async, fetch_binance_server_time
-import indicators as indicator_module
+from config import (
+    TIMEFRAMES, ACTIVE_SIGNALS, ACTIVE_SESSIONS, SHARD_INDEX, SHARD_COUNT,
+    CHECK_INTERVAL_SECONDS, PROFILE_CYCLES, PROFILE_REPLAY_DIR, PROFILE_OUTPUT_DIR, EVALUATION_MODE,
+    CONFLUENCE_ALERTS, LIVE_CANDLE_MODEL, SCHEDULE_TICK_OFFSET_SECONDS, SCHEDULE_OVERRUN_POLICY,
+    SCHEDULE_MAX_CONCURRENT
+)
+from data_fetcher import get_all_binance_data_async
+from clock import clock
+from candle_store import candle_store, TIMEFRAME_MS
+from live_candles import EvaluationTracker
+from scheduler import FixedRateScheduler
+from panel import panel_candidates
+from confluence import group_confluence_events
+from indicators import materialize_signal
 from ai_interpreter import get_ai_interpretation
+from ai_queue import AIQueue, signal_candle_close
 from alerter import send_all_alerts
 from state_manager import SignalStateManager
 from logger import log
-import aiohttp
-from aiohttp_socks import ProxyConnector
-
-# Global Time Offset (Binance Time - Local System Time)
-TIME_OFFSET = timedelta(seconds=0)
+from http_client import close_sessions
+from sharding import validate_shard_config
+from tracing import current_span, flush_spans, span, start_span, traced
+from metrics import (
+    CHECK_DURATION, SIGNALS_FOUND, SIGNALS_SUPPRESSED, SIGNALS_SENT, INTRABAR_CONFIRMATIONS,
+    start_metrics_server
+)
 
 def get_synced_now():
     """Returns the current UTC time synchronized with Binance server time."""
-    return datetime.utcnow() + TIME_OFFSET
+    return clock.utcnow()
+
+def get_synced_now_ms() -> int:
+    """Returns the Binance-synchronized current time in epoch milliseconds."""
+    return int(clock.now() * 1000)
 
 # --- Initialization ---
 
 def initialize_signal_checkers():
-    """Dynamically initializes signal checker instances based on ACTIVE_SIGNALS config."""
+    """
+    Dynamically initializes signal checker instances based on ACTIVE_SIGNALS config.
+    An entry is a class name from indicators.py or "module:ClassName"; only the modules named there are imported.
+    """
     checkers = []
-    for signal_class_name in ACTIVE_SIGNALS:
-        if hasattr(indicator_module, signal_class_name):
-            signal_class = getattr(indicator_module, signal_class_name)
-            checkers.append(signal_class())
-            log.info(f"Successfully initialized signal checker: {signal_class_name}")
-        else:
-            log.warning(f"Signal checker '{signal_class_name}' not found in indicators module.")
+    for entry in ACTIVE_SIGNALS:
+        module_name, _, signal_class_name = entry.rpartition(':')
+        try:
+            module = importlib.import_module(module_name or 'indicators')
+        except ImportError as e:
+            log.warning("Signal checker '%s' could not be imported: %s", entry, e)
+            continue
+        signal_class = getattr(module, signal_class_name, None)
+        if signal_class is None:
+            log.warning("Signal checker '%s' not found in %s module.", signal_class_name, module.__name__)
+            continue
+        checkers.append(signal_class())
+        log.info("Successfully initialized signal checker: %s", signal_class_name)
     return checkers
 
 def is_within_trading_hours() -> bool:
@@ -37,6 +66,8 @@ def is_within_trading_hours() -> bool:
     Checks if the current UTC time falls within any of the defined ACTIVE_SESSIONS.
     Handles different timezones and daylight saving time automatically.
     """
+    import pytz  # only needed once the scheduler asks; keeps it off the startup path
+
     # Use synchronized time if available, otherwise fallback to system UTC
     now_utc_naive = get_synced_now()
     now_utc = now_utc_naive.replace(tzinfo=pytz.utc)
@@ -64,51 +95,217 @@ def is_within_trading_hours() -> bool:
                 if session_start <= now_in_tz < session_end:
                     return True
         except pytz.exceptions.UnknownTimeZoneError:
-            log.error(f"Unknown timezone in config: {tz_name}")
+            log.error("Unknown timezone in config: %s", tz_name)
             continue
         except Exception as e:
-            log.error(f"Error checking trading hours for {tz_name} ({start_time_str}-{end_time_str}): {e}")
+            log.error("Error checking trading hours for %s (%s-%s): %s", tz_name, start_time_str, end_time_str, e)
             continue
     return False
 
+def next_session_open():
+    """
+    Returns the next start of any ACTIVE_SESSIONS entry as an epoch timestamp (seconds), or None.
+    """
+    import pytz
+    now_utc = get_synced_now().replace(tzinfo=pytz.utc)
+    opens = []
+    for tz_name, start_time_str, _ in ACTIVE_SESSIONS:
+        try:
+            timezone = pytz.timezone(tz_name)
+        except pytz.exceptions.UnknownTimeZoneError:
+            continue
+        start_hour, start_minute = map(int, start_time_str.split(':'))
+        today = now_utc.astimezone(timezone).date()
+        for day in (today, today + timedelta(days=1)):
+            # localize() applies the DST offset in force on that day
+            session_start = timezone.localize(datetime.combine(day, time(start_hour, start_minute)))
+            if session_start > now_utc:
+                opens.append(session_start)
+                break
+    return min(opens).timestamp() if opens else None
+
+def trading_hours_gate(now: float):
+    """Scheduler gate: None inside trading hours, otherwise when the next session opens."""
+    if is_within_trading_hours():
+        return None
+    # With no session to wait for, re-check on the next tick
+    return next_session_open() or now
+
 state_manager = SignalStateManager()
 signal_checkers = initialize_signal_checkers()
+candle_store.configure_for(signal_checkers)
+evaluation_tracker = EvaluationTracker()
+
+def _plan_checks(symbol, timeframe, series, df, checkers, now_ms):
+    """
+    Splits the series into closed candles and the live one and returns the (checker, frame) pairs
+    that still need evaluating this cycle (see EvaluationTracker), plus the live candle's open time.
+    """
+    if not LIVE_CANDLE_MODEL or now_ms is None or timeframe not in TIMEFRAME_MS:
+        return [(checker, df) for checker in checkers], None
+
+    closed = series.closed_length(now_ms, TIMEFRAME_MS[timeframe])
+    timestamps = series.timestamps
+    closed_ts = int(timestamps[closed - 1]) if closed else None
+    live_ts = int(timestamps[-1]) if closed < len(series) else None
+    closed_df = df.iloc[:closed] if live_ts is not None else df
+
+    planned = []
+    for checker in checkers:
+        key = (symbol, timeframe, checker.name)
+        if checker.evaluation == 'intrabar':
+            if evaluation_tracker.needs_close_check(key, closed_ts):
+                confirm_ts = evaluation_tracker.due_confirmation(key, closed_ts)
+                if confirm_ts is not None:
+                    _confirm_intrabar(checker, symbol, timeframe, series, df, confirm_ts)
+                if confirm_ts != closed_ts:
+                    # The candle closed without an intrabar hit: give it one on-close check
+                    planned.append((checker, closed_df))
+            if evaluation_tracker.needs_live_check(key, live_ts):
+                planned.append((checker, df))
+        elif evaluation_tracker.needs_close_check(key, closed_ts):
+            planned.append((checker, closed_df))
+    return planned, live_ts
+
+def _confirm_intrabar(checker, symbol, timeframe, series, df, candle_ts):
+    """Re-checks an intrabar hit on its now closed candle and records whether it held."""
+    pos = int(series.timestamps.searchsorted(candle_ts))
+    if pos >= len(series) or series.timestamps[pos] != candle_ts:
+        return
+    with CHECK_DURATION.time(checker=checker.name):
+        confirmed = checker.check(df.iloc[:pos + 1], symbol=symbol) is not None
+    outcome = "confirmed" if confirmed else "unconfirmed"
+    INTRABAR_CONFIRMATIONS.inc(checker=checker.name, outcome=outcome)
+    log.info("Intrabar %s signal for %s (%s) %s on candle close.", checker.name, symbol, timeframe, outcome)
+
+def collect_signals(symbol, timeframe, series, checkers, now_ms=None):
+    """
+    Runs the given checkers on one series and returns the signals found as (symbol, timeframe, checker, signal).
+    With `now_ms` (and LIVE_CANDLE_MODEL), on-close checkers only see closed candles and only run when a
+    new one has closed; intrabar checkers run on the live candle until they fire.
+    """
+    # Materialize the pandas view only while this series is being checked
+    with span("to_frame", symbol=symbol, timeframe=timeframe):
+        df = series.to_frame()
+    planned, live_ts = _plan_checks(symbol, timeframe, series, df, checkers, now_ms)
+    found = []
+    # Iterate through the checkers that still have something to evaluate
+    for checker, frame in planned:
+        with CHECK_DURATION.time(checker=checker.name), span("check", symbol=symbol, timeframe=timeframe, checker=checker.name):
+            signal = checker.check(frame, symbol=symbol)
+        
+        if signal:
+            if live_ts is not None and frame is df:
+                evaluation_tracker.mark_fired((symbol, timeframe, checker.name), live_ts)
+            log.info("Found potential signal for %s (%s) using %s", symbol, timeframe, checker.name)
+            log.debug("Signal details: %s", signal['primary_signal'])
+            SIGNALS_FOUND.inc(checker=checker.name, timeframe=timeframe)
+            found.append((symbol, timeframe, checker, signal))
+    return found
+
+async def process_signals(found, deliver_alerts: bool = True):
+    """
+    Decides the cycle's candidate signals against the cooldown table in one batch,
+    then queues the ones that pass for AI interpretation and alerting (most urgent first).
+    With CONFLUENCE_ALERTS a symbol's passing signals across timeframes go out as one merged event.
+    """
+    with span("cooldown", candidates=len(found)):
+        decisions = state_manager.evaluate_signals([(symbol, timeframe, signal) for symbol, timeframe, _, signal in found])
+    sendable = []
+    for (symbol, timeframe, checker, signal), (should_send, prev_signal) in zip(found, decisions):
+        if not should_send:
+            SIGNALS_SUPPRESSED.inc(checker=checker.name, timeframe=timeframe)
+            continue
+        SIGNALS_SENT.inc(checker=checker.name, timeframe=timeframe)
+        sendable.append((symbol, timeframe, signal, prev_signal))
+
+    if CONFLUENCE_ALERTS:
+        events = group_confluence_events(sendable)
+    else:
+        # The market context is only built for signals that survive the cooldown
+        events = []
+        for symbol, timeframe, signal, prev_signal in sendable:
+            with span("snapshot", symbol=symbol, timeframe=timeframe):
+                events.append((symbol, timeframe, materialize_signal(signal), prev_signal))
 
-async def run_check():
+    for symbol, timeframe, signal, prev_signal in events:
+        if not deliver_alerts:
+            log.info("Offline run: skipping AI interpretation and alert delivery for %s (%s).", symbol, timeframe)
+            continue
+        # One span per alert, ended by the queue once it is delivered
+        signal_span = start_span("signal", symbol=symbol, timeframe=timeframe,
+                                 indicator=signal['primary_signal'].get('indicator', 'N/A'),
+                                 candle_close=signal_candle_close(timeframe, clock.now()))
+        ai_queue.submit(symbol, timeframe, signal, prev_signal, span=signal_span)
+
+    # Without the background workers (one-off and load-test runs) the queue is served before returning
+    if not ai_queue.running:
+        await ai_queue.drain()
+
+async def deliver_signal(symbol: str, timeframe: str, signal: dict, prev_signal: dict, interpret: bool):
+    """Runs AI interpretation (unless the signal's deadline has passed) and sends the alerts."""
+    if interpret:
+        ai_insight, model_name = await get_ai_interpretation(symbol, timeframe, signal, previous_signal=prev_signal)
+    else:
+        ai_insight, model_name = "AI analysis skipped: the signal's candle closed before it was interpreted.", "None"
+
+    # Async Lark alert
+    synced_now = get_synced_now()
+    await send_all_alerts(symbol, timeframe, signal, ai_insight, model_name=model_name, timestamp=synced_now)
+    current_span().set(delivered_at=clock.now())
+
+ai_queue = AIQueue(deliver_signal)
+
+async def run_check(fetch_data=get_all_binance_data_async, deliver_alerts: bool = True, evaluation_mode: str = EVALUATION_MODE):
     """
     Main function to run all active signal checks.
+    `fetch_data` can be swapped for a recorded-data fetcher; with `deliver_alerts=False`
+    signals go through cooldown but no AI call or alert is made (offline runs).
     """
-    log.info(f"Starting data fetch for monitored symbols on timeframes: {TIMEFRAMES}...")
-    all_data = await get_all_binance_data_async()
+    try:
+        await _run_cycle(fetch_data, deliver_alerts, evaluation_mode)
+    finally:
+        # After the cycle span has ended, and on early returns and errors too
+        flush_spans()
 
-    if not all_data:
+@traced("cycle")
+async def _run_cycle(fetch_data, deliver_alerts: bool, evaluation_mode: str):
+    """One traced check cycle: fetch, evaluate, cooldown, then hand the signals to the AI queue."""
+    log.info("Starting data fetch for monitored symbols on timeframes: %s...", TIMEFRAMES)
+    all_data = await fetch_data()
+
+    if all_data is None:
         log.warning("Could not fetch any market data. Skipping this run.")
         return
+    if not all_data:
+        log.info("No series needs a refresh this cycle. Skipping this run.")
+        return
+
+    log.info("Data fetched for %s symbols. Now checking for signals...", len(all_data))
+
+    now_ms = get_synced_now_ms()
+    # Series skipped by the pre-screen are still monitored; only forget ones dropped from the store
+    evaluation_tracker.prune(candle_store.keys() | {(symbol, timeframe) for symbol, tf_data in all_data.items() for timeframe in tf_data})
+    found = []
+    if evaluation_mode == 'panel':
+        # One vectorized pre-screen per timeframe; check() only runs where a screen fired
+        for timeframe in TIMEFRAMES:
+            series_by_symbol = {symbol: tf_data[timeframe] for symbol, tf_data in all_data.items() if timeframe in tf_data}
+            live_symbols = None
+            if LIVE_CANDLE_MODEL and timeframe in TIMEFRAME_MS:
+                live_symbols = {symbol for symbol, series in series_by_symbol.items()
+                                if series.closed_length(now_ms, TIMEFRAME_MS[timeframe]) < len(series)}
+            candidates = panel_candidates(series_by_symbol, signal_checkers, live_symbols)
+            for symbol, series in series_by_symbol.items():
+                checkers = [c for c in signal_checkers if candidates[c] is None or symbol in candidates[c]]
+                if checkers:
+                    found.extend(collect_signals(symbol, timeframe, series, checkers, now_ms))
+    else:
+        for symbol, timeframe_data in all_data.items():
+            for timeframe, series in timeframe_data.items():
+                found.extend(collect_signals(symbol, timeframe, series, signal_checkers, now_ms))
 
-    log.info(f"Data fetched for {len(all_data)} symbols. Now checking for signals...")
-
-    for symbol, timeframe_data in all_data.items():
-        for timeframe, df in timeframe_data.items():
-            # Iterate through all active signal checkers
-            for checker in signal_checkers:
-                signal = checker.check(df, symbol=symbol)
-                
-                if signal:
-                    log.info(f"Found potential signal for {symbol} ({timeframe}) using {checker.name}")
-                    log.debug(f"Signal details: {signal['primary_signal']}")
-                    
-                    # Check if the alert should be sent
-                    should_send, prev_signal = state_manager.should_send_alert(symbol, timeframe, signal)
-                    if should_send:
-                        # Async AI interpretation
-                        ai_insight, model_name = await get_ai_interpretation(symbol, timeframe, signal, previous_signal=prev_signal)
-                        
-                        # Async Lark alert
-                        synced_now = get_synced_now()
-                        await send_all_alerts(symbol, timeframe, signal, ai_insight, model_name=model_name, timestamp=synced_now)
-                        
-                        # Small delay to avoid hitting rate limits if multiple signals trigger at once
-                        await asyncio.sleep(2)  
+    await process_signals(found, deliver_alerts)
 
     log.info("Check complete.")
 
@@ -120,46 +317,81 @@ async def main_loop():
         log.error("No signal checkers initialized. Please check your ACTIVE_SIGNALS configuration. Exiting.")
         return
 
+    validate_shard_config()
     log.info("Starting the crypto signal monitor (Async Mode)...")
+    metrics_runner = await start_metrics_server()
+    if SHARD_COUNT > 1:
+        log.info("Scale-out mode: running as shard %s of %s.", SHARD_INDEX, SHARD_COUNT)
 
     # --- Time Synchronization ---
-    global TIME_OFFSET
-    if SOCKS5_PROXY:
-        connector = ProxyConnector.from_url(SOCKS5_PROXY, ssl=False)
-    else:
-        connector = aiohttp.TCPConnector(ssl=False)
+    # Sync once before the first tick, then keep re-syncing in the background
+    await clock.sync_once()
+    clock_task = asyncio.create_task(clock.run())
+    ai_queue.start()
 
+    scheduler = FixedRateScheduler(
+        run_check,
+        CHECK_INTERVAL_SECONDS,
+        clock=clock.now,
+        offset=SCHEDULE_TICK_OFFSET_SECONDS,
+        policy=SCHEDULE_OVERRUN_POLICY,
+        max_concurrent=SCHEDULE_MAX_CONCURRENT,
+        gate=trading_hours_gate,
+    )
+    log.info("Scheduling checks every %ss at +%ss (overrun policy: %s).",
+             CHECK_INTERVAL_SECONDS, SCHEDULE_TICK_OFFSET_SECONDS, SCHEDULE_OVERRUN_POLICY)
     try:
-        async with aiohttp.ClientSession(connector=connector) as session:
-            binance_time = await fetch_binance_server_time(session)
-            if binance_time:
-                local_now = datetime.utcnow()
-                offset = binance_time - local_now
-                TIME_OFFSET = offset
-                log.info(f"Time Synchronized. Local: {local_now}, Binance: {binance_time}, Offset: {offset}")
-            else:
-                log.warning("Failed to synchronize time with Binance. Using local system time.")
-    except Exception as e:
-        log.error(f"Time synchronization failed: {e}")
+        await scheduler.run()
+    finally:
+        clock_task.cancel()
+        await ai_queue.stop()
+        await close_sessions()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
-    while True:
-        # Check if current time is within active trading sessions
-        if not is_within_trading_hours():
-            log.info("Outside of active trading hours. Sleeping for 1 minute until next check.")
-            await asyncio.sleep(1 * 60) # Still sleep for 1 minute before re-checking
-            continue # Skip run_check and go to next loop iteration
+async def run_profile(cycles: int, replay_dir: str = None, output_dir: str = PROFILE_OUTPUT_DIR, output_format: str = 'collapsed'):
+    """
+    Profiles `cycles` runs of run_check. With `replay_dir`, market data comes from recordings
+    and nothing is sent (no AI calls, no alerts), so results are reproducible offline.
+    """
+    from profiler import profile_cycles
 
-        try:
-            await run_check()
-        except Exception as e:
-            log.error(f"Error in main loop: {e}")
-        
-        # Calculate next run time (15 minutes interval)
-        log.info("Sleeping for 1 minute...")
-        await asyncio.sleep(1 * 60) 
+    global state_manager
+    fetch_data = get_all_binance_data_async
+    if replay_dir:
+        from market_replay import make_replay_fetcher
+        fetch_data = make_replay_fetcher(replay_dir)
+        # Keep offline cooldown state away from the live state file
+        os.makedirs(output_dir, exist_ok=True)
+        state_manager = SignalStateManager(os.path.join(output_dir, "signal_state.json"))
+
+    async def run_cycle():
+        global evaluation_tracker
+        if replay_dir:
+            # Replayed candles never change, so start each cycle as if they were new
+            evaluation_tracker = EvaluationTracker()
+        await run_check(fetch_data, deliver_alerts=not replay_dir)
+
+    await profile_cycles(run_cycle, cycles, output_dir, output_format=output_format)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crypto signal monitor")
+    parser.add_argument("--profile", type=int, default=PROFILE_CYCLES, metavar="N",
+                        help="Profile N run_check cycles and exit (env: PROFILE_CYCLES).")
+    parser.add_argument("--replay", default=PROFILE_REPLAY_DIR, metavar="DIR",
+                        help="Replay recorded market data from DIR while profiling (env: PROFILE_REPLAY_DIR).")
+    parser.add_argument("--profile-out", default=PROFILE_OUTPUT_DIR, metavar="DIR",
+                        help="Directory for profile output (env: PROFILE_OUTPUT_DIR).")
+    parser.add_argument("--profile-format", choices=["collapsed", "speedscope"], default="collapsed",
+                        help="Per-cycle stack output format.")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        asyncio.run(main_loop())
+        if args.profile > 0:
+            asyncio.run(run_profile(args.profile, args.replay, args.profile_out, args.profile_format))
+        else:
+            asyncio.run(main_loop())
     except KeyboardInterrupt:
         log.info("Bot stopped by user.")
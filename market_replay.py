@@ -0,0 +1,75 @@
+import json
+import os
+from config import MARKET_DATA_RECORD_DIR
+from logger import log
+
+def _recording_path(directory: str, symbol: str, timeframe: str) -> str:
+    return os.path.join(directory, f"{symbol}_{timeframe}.json")
+
+def _merge_rows(recorded, fetched, timestamp_of, window: int):
+    """Recorded rows updated with the fetched ones (by open time), oldest first, trimmed to the last `window`."""
+    rows = {timestamp_of(row): row for row in recorded or []}
+    rows.update((timestamp_of(row), row) for row in fetched or [])
+    return [rows[ts] for ts in sorted(rows)][-window:]
+
+def record_raw_market_data(symbol: str, timeframe: str, klines_data, oi_data, ls_data, directory: str = MARKET_DATA_RECORD_DIR,
+                           merge: bool = False, window: int = None):
+    """
+    Saves the raw Binance responses for one symbol/timeframe so the cycle can be replayed offline.
+    With `merge`, the responses are an incremental update (a few new candles, OI / L/S possibly None) and are
+    merged into the existing recording, keeping the last `window` rows, so it always holds the full window.
+    No-op unless a record directory is configured.
+    """
+    if not directory:
+        return
+    path = _recording_path(directory, symbol, timeframe)
+    try:
+        if merge and os.path.exists(path):
+            with open(path, 'r') as f:
+                recorded = json.load(f)
+            window = window or len(recorded.get('klines') or ())
+            klines_data = _merge_rows(recorded.get('klines'), klines_data, lambda row: row[0], window)
+            oi_data = _merge_rows(recorded.get('oi'), oi_data, lambda row: row['timestamp'], window)
+            ls_data = _merge_rows(recorded.get('ls'), ls_data, lambda row: row['timestamp'], window)
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"symbol": symbol, "timeframe": timeframe, "klines": klines_data, "oi": oi_data, "ls": ls_data}, f)
+    except (IOError, OSError, json.JSONDecodeError) as e:
+        log.warning("Could not record market data for %s %s: %s", symbol, timeframe, e)
+
+def load_raw_market_data(directory: str):
+    """
+    Loads every recording in a directory.
+    Returns a list of dicts with keys: symbol, timeframe, klines, oi, ls.
+    """
+    recordings = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, file_name), 'r') as f:
+                recordings.append(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            log.warning("Skipping unreadable recording %s: %s", file_name, e)
+    log.info("Loaded %s recorded series from %s.", len(recordings), directory)
+    return recordings
+
+def make_replay_fetcher(directory: str):
+    """
+    Returns an async drop-in for get_all_binance_data_async that serves recorded data.
+    Series are rebuilt on every call so each replayed cycle pays the same construction cost as a live one.
+    """
+    from data_fetcher import build_candle_series
+
+    recordings = load_raw_market_data(directory)
+
+    async def fetch_recorded_data():
+        data = {}
+        for rec in recordings:
+            if not rec.get('klines'):
+                continue
+            series = build_candle_series(rec['symbol'], rec['timeframe'], rec['klines'], rec['oi'], rec['ls'])
+            data.setdefault(rec['symbol'], {})[rec['timeframe']] = series
+        return data
+
+    return fetch_recorded_data
@@ -0,0 +1,174 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT
+from logger import log
+
+# Default latency buckets (seconds), from sub-millisecond CPU work up to slow LLM calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_TIMER = nullcontext()
+_registry = []
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+class Counter:
+    """
+    A monotonically increasing counter, optionally split by labels.
+    """
+    __slots__ = ("name", "documentation", "label_names", "values")
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        _registry.append(self)
+
+    def inc(self, value=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        self.values[key] = self.values.get(key, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+class Gauge:
+    """
+    A value that can go up and down, optionally split by labels.
+    """
+    __slots__ = ("name", "documentation", "label_names", "values")
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        _registry.append(self)
+
+    def set(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        self.values[tuple(labels.get(n, "") for n in self.label_names)] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+class Histogram:
+    """
+    A cumulative histogram with fixed buckets, optionally split by labels.
+    """
+    __slots__ = ("name", "documentation", "label_names", "buckets", "series")
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket_counts (non-cumulative, +Inf last), sum, count]
+        self.series = {}
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the wall time of the block. Free when metrics are disabled."""
+        if not METRICS_ENABLED:
+            return _NULL_TIMER
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+# --- Application Metrics ---
+FETCH_LATENCY = Histogram("binance_fetch_seconds", "Latency of Binance REST requests.", ("endpoint",))
+FRAME_BUILD_TIME = Histogram("dataframe_build_seconds", "Time spent building a market DataFrame from raw responses.")
+CHECK_DURATION = Histogram("signal_check_seconds", "Duration of a single checker check() call.", ("checker",))
+SIGNALS_FOUND = Counter("signals_found_total", "Signals detected by checkers.", ("checker", "timeframe"))
+SIGNALS_SUPPRESSED = Counter("signals_suppressed_total", "Signals suppressed by cooldown.", ("checker", "timeframe"))
+SIGNALS_SENT = Counter("signals_sent_total", "Signals that passed cooldown and were alerted.", ("checker", "timeframe"))
+AI_LATENCY = Histogram("ai_request_seconds", "Latency of AI interpretation requests.", ("provider", "outcome"))
+ALERT_SEND_LATENCY = Histogram("alert_send_seconds", "Latency of alert webhook posts.", ("channel",))
+INTRABAR_CONFIRMATIONS = Counter("intrabar_confirmations_total", "Intrabar signals re-checked when their candle closed.", ("checker", "outcome"))
+HISTORY_FALLBACKS = Counter("history_fallbacks_total", "OI / L/S fetches that failed and fell back to the cached values.", ("endpoint",))
+AI_QUEUE_DEPTH = Gauge("ai_queue_depth", "Signals waiting for AI interpretation.")
+AI_QUEUE_WAIT = Histogram("ai_queue_wait_seconds", "Time a signal waited in the AI queue.")
+AI_QUEUE_EXPIRED = Counter("ai_queue_expired_total", "Signals whose deadline passed before the AI queue reached them.", ("policy",))
+CYCLE_DURATION = Histogram("check_cycle_seconds", "Duration of a full run_check cycle.")
+SCHEDULE_JITTER = Histogram("schedule_jitter_seconds", "Delay between a scheduled tick and the actual cycle start.",
+                            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+SCHEDULE_SKIPPED_TICKS = Counter("schedule_skipped_ticks_total", "Scheduler ticks not run because of an overrun.", ("policy",))
+CLOCK_OFFSET = Gauge("clock_offset_seconds", "Estimated Binance server time minus local time.")
+CLOCK_UNCERTAINTY = Gauge("clock_offset_uncertainty_seconds", "Half the round-trip time of the sample the offset came from.")
+CYCLE_OVERRUNS = Counter("check_cycle_overruns_total", "Cycles that took longer than the check interval.")
+
+def render_metrics() -> str:
+    """Renders all registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+async def start_metrics_server():
+    """
+    Starts the local /metrics HTTP endpoint if metrics are enabled.
+    Returns the aiohttp AppRunner (call cleanup() on shutdown), or None when disabled.
+    """
+    if not METRICS_ENABLED:
+        return None
+
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, METRICS_HOST, METRICS_PORT)
+    await site.start()
+    log.info("Metrics endpoint listening on http://%s:%s/metrics", METRICS_HOST, METRICS_PORT)
+    return runner
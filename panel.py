@@ -0,0 +1,164 @@
+import numpy as np
+from config import (
+    VOLUME_MA_LENGTH, VOLUME_SPIKE_THRESHOLD,
+    BB_LENGTH, BB_STD,
+    FVG_LOOKBACK,
+    OB_LOOKBACK, OB_ATR_MULTIPLIER
+)
+
+PANEL_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(PANEL_FIELDS))
+
+# Pre-screens must never reject a symbol the exact checker would accept. Where the panel cannot
+# reproduce pandas_ta bit-for-bit (rolling sums, float32 volume, ATR seeding) it errs wide by these margins.
+_REL_TOLERANCE = 1e-5
+_ATR_SLACK = 0.8
+_ATR_LENGTH = 14
+
+def stack_panel(series_list, fields=PANEL_FIELDS):
+    """Stacks equal-length CandleSeries into a float64 (symbols x candles x fields) array."""
+    length = len(series_list[0])
+    panel = np.empty((len(series_list), length, len(fields)), dtype=np.float64)
+    for s, series in enumerate(series_list):
+        for f, name in enumerate(fields):
+            panel[s, :, f] = series.column(name)
+    return panel
+
+def volume_spike_candidates(panel):
+    """VolumeSpikeSignal: last volume above VOLUME_SPIKE_THRESHOLD x its VOLUME_MA_LENGTH average."""
+    symbols, length, _ = panel.shape
+    if length < VOLUME_MA_LENGTH + 5:
+        return np.zeros(symbols, dtype=bool)
+    volume = panel[:, :, VOLUME]
+    sma = volume[:, -VOLUME_MA_LENGTH:].mean(axis=1)
+    return (sma > 0) & (volume[:, -1] > sma * VOLUME_SPIKE_THRESHOLD * (1 - _REL_TOLERANCE))
+
+def _band_bounds(window):
+    """Mean and the narrowest / widest band half-width (population vs sample std), as pandas_ta may use either."""
+    mean = window.mean(axis=1)
+    return mean, BB_STD * window.std(axis=1, ddof=0), BB_STD * window.std(axis=1, ddof=1)
+
+def bollinger_breakout_candidates(panel):
+    """BollingerBandsBreakoutSignal: close crossed outside the band on the last candle."""
+    symbols, length, _ = panel.shape
+    if length < BB_LENGTH + 5:
+        return np.zeros(symbols, dtype=bool)
+    close = panel[:, :, CLOSE]
+    cur_mean, cur_narrow, cur_wide = _band_bounds(close[:, -BB_LENGTH:])
+    prev_mean, prev_narrow, prev_wide = _band_bounds(close[:, -BB_LENGTH - 1:-1])
+    tol = _REL_TOLERANCE * np.abs(cur_mean)
+
+    bullish = (close[:, -2] <= prev_mean + prev_wide + tol) & (close[:, -1] > cur_mean + cur_narrow - tol)
+    bearish = (close[:, -2] >= prev_mean - prev_wide - tol) & (close[:, -1] < cur_mean - cur_narrow + tol)
+    return bullish | bearish
+
+def fair_value_gap_candidates(panel):
+    """
+    FairValueGapSignal, exactly: the most recent FVG within FVG_LOOKBACK was rebalanced by a later
+    candle that is a Hammer (bullish gap) or Shooting Star (bearish gap).
+    """
+    symbols, length, _ = panel.shape
+    fired = np.zeros(symbols, dtype=bool)
+    first, last = max(length - FVG_LOOKBACK, 0) + 1, length - 4
+    if length < 5 or last < first:
+        return fired
+
+    o, h, l, c = (panel[:, :, f] for f in (OPEN, HIGH, LOW, CLOSE))
+    idx = np.arange(first, last + 1)
+    bullish = h[:, idx - 1] < l[:, idx + 1]
+    bearish = l[:, idx - 1] > h[:, idx + 1]
+    gaps = bullish | bearish
+    has_gap = gaps.any(axis=1)
+    if not has_gap.any():
+        return fired
+
+    # Most recent gap per symbol (the checker scans backwards and stops at the first one)
+    latest = gaps.shape[1] - 1 - np.argmax(gaps[:, ::-1], axis=1)
+    rows = np.arange(symbols)
+    gap_at = idx[latest]
+    is_bullish = bullish[rows, latest]
+    top = np.where(is_bullish, l[rows, gap_at + 1], l[rows, gap_at - 1])[:, None]
+    bottom = np.where(is_bullish, h[rows, gap_at - 1], h[rows, gap_at + 1])[:, None]
+
+    after_gap = np.arange(length)[None, :] >= (gap_at + 2)[:, None]
+    price_in_gap = ((bottom <= l) & (l <= top)) | ((bottom <= h) & (h <= top))
+    body = np.abs(c - o)
+    hammer = (c > o) & ((o - l) > body * 2)
+    shooting_star = (c < o) & ((h - o) > body * 2)
+    confirmation = np.where(is_bullish[:, None], hammer, shooting_star)
+
+    return has_gap & (after_gap & price_in_gap & confirmation).any(axis=1)
+
+def _wilder_atr(high, low, close, length=_ATR_LENGTH):
+    """ATR as an RMA of true range (ewm alpha=1/length, adjust=True), computed for all symbols at once."""
+    prev_close = np.concatenate((close[:, :1], close[:, :-1]), axis=1)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    decay = 1 - 1 / length
+    atr = np.full(true_range.shape, np.nan)
+    numerator = np.zeros(true_range.shape[0])
+    denominator = 0.0
+    for t in range(true_range.shape[1]):
+        numerator = true_range[:, t] + decay * numerator
+        denominator = 1 + decay * denominator
+        if t >= length - 1:
+            atr[:, t] = numerator / denominator
+    return atr
+
+def order_block_candidates(panel):
+    """OrderBlockSignal: a displacement candle within OB_LOOKBACK whose opposite-colored OB candle is being retested."""
+    symbols, length, _ = panel.shape
+    if length < OB_LOOKBACK + 5:
+        return np.zeros(symbols, dtype=bool)
+
+    o, h, l, c = (panel[:, :, f] for f in (OPEN, HIGH, LOW, CLOSE))
+    idx = np.arange(length - OB_LOOKBACK + 1, length - 1)
+    prev = idx - 1
+    atr = _wilder_atr(h, l, c)[:, idx]
+
+    displaced = np.abs(c[:, idx] - o[:, idx]) > atr * OB_ATR_MULTIPLIER * _ATR_SLACK
+    bearish = (c[:, idx] < o[:, idx]) & (c[:, prev] > o[:, prev])
+    bullish = (c[:, idx] > o[:, idx]) & (c[:, prev] < o[:, prev])
+    retest = (h[:, -1:] >= l[:, prev]) & (l[:, -1:] <= h[:, prev])
+    return (displaced & (bearish | bullish) & retest).any(axis=1)
+
+# Checker class name -> vectorized pre-screen
+PANEL_FILTERS = {
+    'VolumeSpikeSignal': volume_spike_candidates,
+    'BollingerBandsBreakoutSignal': bollinger_breakout_candidates,
+    'FairValueGapSignal': fair_value_gap_candidates,
+    'OrderBlockSignal': order_block_candidates,
+}
+
+def panel_candidates(series_by_symbol: dict, checkers, live_symbols=None):
+    """
+    Runs the vectorized pre-screens over all symbols of one timeframe.
+    Returns {checker: set of symbols to check, or None meaning "check every symbol"}.
+    Series shorter than the longest one are not stacked and are always checked.
+    `live_symbols` are the series whose last row is the live candle; on-close checkers are screened
+    on their closed candles only, intrabar checkers on both the live and the closed candles, as they will be checked.
+    """
+    if not series_by_symbol:
+        return {checker: set() for checker in checkers}
+
+    length = max(len(series) for series in series_by_symbol.values())
+    symbols = [symbol for symbol, series in series_by_symbol.items() if len(series) == length]
+    unstacked = set(series_by_symbol) - set(symbols)
+    panel = stack_panel([series_by_symbol[symbol] for symbol in symbols])
+
+    candidates = {}
+    for checker in checkers:
+        screen = PANEL_FILTERS.get(type(checker).__name__)
+        if screen is None:
+            candidates[checker] = None
+            continue
+        fired = screen(panel)
+        if live_symbols:
+            live = np.array([symbol in live_symbols for symbol in symbols])
+            closed = screen(panel[:, :-1])
+            if getattr(checker, 'evaluation', 'close') == 'close':
+                fired = np.where(live, closed, fired)
+            else:
+                # Intrabar checkers also get one on-close check when a candle closes without a live hit
+                fired = fired | (live & closed)
+        candidates[checker] = {symbols[i] for i in np.flatnonzero(fired)} | unstacked
+    return candidates
@@ -0,0 +1,30 @@
+from config import PRESCREEN_PRICE_MOVE_PERCENT
+from candle_store import TIMEFRAME_MS
+
+def parse_ticker_prices(rows):
+    """{symbol: last price} from a /fapi/v1/ticker/price (all symbols) response."""
+    prices = {}
+    for row in rows:
+        try:
+            prices[row['symbol']] = float(row['price'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return prices
+
+def series_needs_fetch(series, price, now_ms: int, move_percent: float = PRESCREEN_PRICE_MOVE_PERCENT) -> bool:
+    """
+    Whether a cached series is worth a full fetch this cycle, judged from the bulk ticker price alone:
+    there is no cached series, a new candle has opened since it was stored, or the price has left the
+    cached live candle's range or moved more than `move_percent` from its close.
+    """
+    if series is None or not len(series) or price is None:
+        return True
+    step = TIMEFRAME_MS.get(series.timeframe)
+    if step is None or now_ms >= series.last_timestamp + step:
+        return True
+    high = series.column('high')[-1]
+    low = series.column('low')[-1]
+    close = series.column('close')[-1]
+    if price > high or price < low:
+        return True
+    return close == 0 or abs(price - close) / close * 100 >= move_percent
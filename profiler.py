@@ -0,0 +1,163 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from logger import log
+
+class StackSampler:
+    """
+    Periodically samples the Python stack of one thread and aggregates identical stacks.
+    Output is flamegraph-compatible (collapsed stacks) or speedscope JSON.
+    """
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = getattr(code, 'co_qualname', code.co_name)  # co_qualname needs Python 3.11+
+                stack.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str):
+        """Writes `frame;frame;frame count` lines, as consumed by flamegraph.pl / inferno / speedscope."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def write_speedscope(self, path: str, name: str):
+        """Writes a speedscope 'sampled' profile."""
+        frames, frame_index = [], {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            indices = []
+            for label in stack.split(";"):
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "crypto-signal-bot profiler",
+        }
+        with open(path, 'w') as f:
+            json.dump(document, f)
+
+def _indicator_labels():
+    """Maps first line numbers of methods in indicators.py to `Class.method`, since pstats only records bare names."""
+    import indicators
+
+    labels = {}
+    for obj in vars(indicators).values():
+        if isinstance(obj, type) and obj.__module__ == indicators.__name__:
+            for attr in vars(obj).values():
+                code = getattr(attr, '__code__', None)
+                if code is not None:
+                    labels[code.co_firstlineno] = f"{obj.__name__}.{attr.__name__}"
+    return labels
+
+def _format_rows(title, rows, indicator_labels):
+    lines = [title, f"{'ncalls':>10} {'tottime':>10} {'cumtime':>10}  function"]
+    for (file_name, line, func), (cc, nc, tt, ct, _) in rows:
+        base_name = os.path.basename(file_name)
+        if base_name == 'indicators.py':
+            func = indicator_labels.get(line, func)
+        lines.append(f"{nc:>10} {tt:>10.4f} {ct:>10.4f}  {func} ({base_name}:{line})")
+    return lines
+
+def build_summary(stats: pstats.Stats, top: int = 25) -> str:
+    """
+    Renders the summary table: top functions by cumulative time, then every indicators.py function
+    (checkers and _create_market_snapshot) by cumulative time.
+    """
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    indicator_entries = [e for e in entries if os.path.basename(e[0][0]) == 'indicators.py' and e[1][3] > 0]
+    labels = _indicator_labels()
+    lines = _format_rows(f"Top {top} functions by cumulative time:", entries[:top], labels)
+    lines.append("")
+    lines.extend(_format_rows("indicators.py functions by cumulative time:", indicator_entries, labels))
+    return "\n".join(lines)
+
+async def profile_cycles(run_cycle, cycles: int, output_dir: str, output_format: str = 'collapsed',
+                         sample_interval: float = 0.001, top: int = 25):
+    """
+    Runs `run_cycle()` (an async callable, typically run_check) `cycles` times under cProfile and the stack sampler.
+    Writes per cycle `cycle_N.prof` (pstats) and `cycle_N.collapsed` or `cycle_N.speedscope.json`,
+    plus an aggregated `summary.txt`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    aggregate = None
+    thread_id = threading.get_ident()
+
+    for cycle in range(1, cycles + 1):
+        profile = cProfile.Profile()
+        sampler = StackSampler(thread_id, interval=sample_interval)
+
+        start = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            await run_cycle()
+        finally:
+            profile.disable()
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+
+        prof_path = os.path.join(output_dir, f"cycle_{cycle}.prof")
+        profile.dump_stats(prof_path)
+        if output_format == 'speedscope':
+            sampler.write_speedscope(os.path.join(output_dir, f"cycle_{cycle}.speedscope.json"), f"run_check cycle {cycle}")
+        else:
+            sampler.write_collapsed(os.path.join(output_dir, f"cycle_{cycle}.collapsed"))
+        log.info("Profiled cycle %s/%s in %.3fs (%s samples).", cycle, cycles, elapsed, sum(sampler.stacks.values()))
+
+        if aggregate is None:
+            aggregate = pstats.Stats(prof_path)
+        else:
+            aggregate.add(prof_path)
+
+    if aggregate is None:
+        return None
+
+    summary = build_summary(aggregate, top=top)
+    with open(os.path.join(output_dir, "summary.txt"), 'w') as f:
+        f.write(summary + "\n")
+    log.info("Profile summary over %s cycles (written to %s):\n%s", cycles, output_dir, summary)
+    return summary
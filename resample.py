@@ -0,0 +1,34 @@
+import numpy as np
+from candle_store import TIMEFRAME_MS
+
+def base_timeframe(timeframes):
+    """The lowest of the configured timeframes; the one fetched from Binance when resampling."""
+    return min(timeframes, key=TIMEFRAME_MS.__getitem__)
+
+def resampled_timeframes(timeframes):
+    """Configured timeframes that can be built from the base one (a whole multiple of its period)."""
+    base = base_timeframe(timeframes)
+    base_step = TIMEFRAME_MS[base]
+    return [tf for tf in timeframes if tf != base and TIMEFRAME_MS[tf] % base_step == 0]
+
+def resample_candles(timestamps, columns: dict, step_ms: int):
+    """
+    Aggregates consecutive base candles into `step_ms` buckets aligned to the epoch, like Binance's
+    own (UTC-aligned) intervals. Open is the first open, high/low the extremes, close the last close,
+    volume the sum; level series (CVD, OI, L/S) take the value of the bucket's last base candle.
+    A trailing bucket that is not complete yet becomes the live candle.
+    Returns (bucket open times, columns).
+    """
+    buckets = timestamps // step_ms * step_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    resampled = {
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'volume': np.add.reduceat(columns['volume'].astype(np.float64), starts),
+    }
+    for name in ('cvd', 'oi', 'ls_ratio'):
+        resampled[name] = columns[name][ends]
+    return buckets[starts], resampled
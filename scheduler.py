@@ -0,0 +1,111 @@
+import asyncio
+import math
+import time
+from collections import deque
+from logger import log
+from metrics import CYCLE_DURATION, CYCLE_OVERRUNS, SCHEDULE_JITTER, SCHEDULE_SKIPPED_TICKS
+
+OVERRUN_POLICIES = ("skip", "coalesce", "overlap")
+
+class FixedRateScheduler:
+    """
+    Runs `job` on absolute, clock-aligned ticks: every `interval` seconds, `offset` seconds past the
+    boundary, as read from `clock` (epoch seconds; pass the exchange-synced clock). The period does not
+    stretch with the job's run time. `gate(now)` may return the epoch time the job is next allowed to
+    run (e.g. the next session open); the scheduler then sleeps straight to the first tick after it.
+    """
+    def __init__(self, job, interval: float, clock=time.time, offset: float = 0.0, policy: str = "skip",
+                 max_concurrent: int = 2, gate=None, report_every: int = 60):
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{policy}', expected one of {OVERRUN_POLICIES}.")
+        self.job = job
+        self.interval = interval
+        self.clock = clock
+        self.offset = offset % interval
+        self.policy = policy
+        self.max_concurrent = max(1, max_concurrent)
+        self.gate = gate
+        self.report_every = report_every
+        self.jitters = deque(maxlen=report_every)
+        self.runs = 0
+        self.skipped = 0
+        self._running = set()
+
+    def next_tick(self, after: float) -> float:
+        """First tick strictly after `after`."""
+        return (math.floor((after - self.offset) / self.interval) + 1) * self.interval + self.offset
+
+    async def _sleep_until(self, target: float):
+        delay = target - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _run_job(self, tick: float):
+        start = time.perf_counter()
+        try:
+            await self.job()
+        except Exception as e:
+            log.error("Error in scheduled cycle: %s", e)
+        elapsed = time.perf_counter() - start
+        CYCLE_DURATION.observe(elapsed)
+        if elapsed > self.interval:
+            CYCLE_OVERRUNS.inc()
+            log.warning("Check cycle overran the %gs interval (%.1fs).", self.interval, elapsed)
+
+    def _record_start(self, tick: float):
+        jitter = max(self.clock() - tick, 0.0)
+        SCHEDULE_JITTER.observe(jitter)
+        self.jitters.append(jitter)
+        self.runs += 1
+        if self.runs % self.report_every == 0:
+            log.info("Scheduler: %s runs, %s skipped ticks; %s", self.runs, self.skipped, self.jitter_summary())
+
+    def jitter_summary(self) -> str:
+        """Median / p95 / max start jitter over the recent runs."""
+        if not self.jitters:
+            return "no runs yet"
+        ordered = sorted(self.jitters)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"jitter p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, max {ordered[-1] * 1000:.1f}ms"
+
+    def _skip(self, count: int):
+        self.skipped += count
+        SCHEDULE_SKIPPED_TICKS.inc(count, policy=self.policy)
+
+    async def run(self):
+        """Runs forever."""
+        tick = self.next_tick(self.clock())
+        while True:
+            await self._sleep_until(tick)
+
+            resume_at = self.gate(self.clock()) if self.gate else None
+            if resume_at is not None:
+                tick = self.next_tick(max(resume_at, self.clock()) - 1e-6)
+                log.info("Outside of active trading hours. Sleeping %.0fs until the next session tick.", tick - self.clock())
+                continue
+
+            if self.policy == "overlap":
+                self._running = {task for task in self._running if not task.done()}
+                if len(self._running) >= self.max_concurrent:
+                    log.warning("%s cycles still running; skipping this tick.", len(self._running))
+                    self._skip(1)
+                else:
+                    self._record_start(tick)
+                    self._running.add(asyncio.create_task(self._run_job(tick)))
+                tick = self.next_tick(max(tick, self.clock()))
+                continue
+
+            self._record_start(tick)
+            await self._run_job(tick)
+            now = self.clock()
+            missed = int((now - tick) // self.interval)
+            if missed <= 0:
+                tick += self.interval
+            elif self.policy == "skip":
+                self._skip(missed)
+                tick = self.next_tick(now)
+            else:
+                # coalesce: one immediate catch-up run stands in for all the ticks missed
+                self._skip(missed - 1)
+                tick += missed * self.interval
@@ -0,0 +1,34 @@
+import zlib
+from config import SHARD_INDEX, SHARD_COUNT
+from logger import log
+
+# Last ownership logged, so the symbol list is only logged when it changes (e.g. after a dynamic scan)
+_logged_ownership = None
+
+def shard_for_symbol(symbol: str, shard_count: int = SHARD_COUNT) -> int:
+    """
+    Returns the shard index owning a symbol.
+    Uses CRC32 so the partition is stable across processes and restarts (unlike hash()).
+    """
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(symbol.encode('utf-8')) % shard_count
+
+def validate_shard_config(shard_index: int = SHARD_INDEX, shard_count: int = SHARD_COUNT):
+    """Raises ValueError unless 0 <= shard_index < shard_count. Called once at startup."""
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard configuration: SHARD_INDEX={shard_index}, SHARD_COUNT={shard_count}")
+
+def filter_symbols_for_shard(symbols, shard_index: int = SHARD_INDEX, shard_count: int = SHARD_COUNT):
+    """
+    Returns only the symbols assigned to this shard, preserving the input order.
+    """
+    global _logged_ownership
+    if shard_count <= 1:
+        return list(symbols)
+
+    selected = [s for s in symbols if shard_for_symbol(s, shard_count) == shard_index]
+    if selected != _logged_ownership:
+        log.info("Shard %s/%s owns %s of %s symbols: %s", shard_index, shard_count, len(selected), len(symbols), selected)
+        _logged_ownership = selected
+    return selected
@@ -1,151 +1,266 @@
 import time
 import json
 import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+try:
+    import fcntl
+except ImportError:  # Non-POSIX platforms: fall back to single-process behaviour
+    fcntl = None
 from config import (
-    FVG_COOLDOWN_PERIOD_MINUTES, 
-    FVG_PRICE_TOLERANCE_PERCENT,
-    MAX_COOLDOWN_PERIOD_MINUTES,
-    COOLDOWN_BACKOFF_FACTOR,
-    DEFAULT_COOLDOWN_PERIOD_MINUTES
+    DEFAULT_COOLDOWN_PERIOD_MINUTES,
+    ZONE_DEDUP_RULES,
+    ZONE_MEMORY_MINUTES,
+    SIGNAL_STATE_FILE
 )
+from zone_index import ZoneIndex, zone_bounds, backoff_cooldown, _to_float
 from logger import log
 
+STATE_FORMAT_VERSION = 2
+
+class CooldownRecord:
+    """
+    Compact cooldown state of one (symbol, timeframe, indicator, signal_type) key.
+    Prices are parsed once when the record is written, not on every comparison.
+    """
+    __slots__ = ("timestamp", "trigger_count", "zone_top", "zone_bottom", "price", "confirmation")
+    FIELDS = __slots__
+
+    def __init__(self, timestamp: float, trigger_count: int = 1, zone_top: float = None,
+                 zone_bottom: float = None, price: float = None, confirmation: str = None):
+        self.timestamp = timestamp
+        self.trigger_count = trigger_count
+        self.zone_top = zone_top
+        self.zone_bottom = zone_bottom
+        self.price = price
+        self.confirmation = confirmation
+
+    @classmethod
+    def from_signal(cls, primary_signal: dict, timestamp: float, trigger_count: int = 1):
+        zone_bottom, zone_top = zone_bounds(primary_signal) or (None, None)
+        return cls(
+            timestamp,
+            trigger_count,
+            zone_top,
+            zone_bottom,
+            _to_float(primary_signal.get('current_price')),
+            primary_signal.get('confirmation_candle'),
+        )
+
+    def to_row(self):
+        return [getattr(self, field) for field in self.FIELDS]
+
+    def as_previous_signal(self, key):
+        """The summary handed to the AI as the previous signal of this key."""
+        symbol, timeframe, indicator, signal_type = key
+        previous = {
+            "indicator": indicator,
+            "signal_type": signal_type,
+            "triggered_at": datetime.fromtimestamp(self.timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+            "trigger_count": self.trigger_count,
+        }
+        if self.price is not None:
+            previous["current_price"] = f"{self.price:.2f}"
+        if self.zone_top is not None and self.zone_bottom is not None:
+            previous["zone_top"] = f"{self.zone_top:.2f}"
+            previous["zone_bottom"] = f"{self.zone_bottom:.2f}"
+        if self.confirmation:
+            previous["confirmation_candle"] = self.confirmation
+        return previous
+
 class SignalStateManager:
-    def __init__(self, state_file='signal_state.json'):
+    def __init__(self, state_file=SIGNAL_STATE_FILE):
         """
         Initializes the signal state manager with persistence.
+        The state file may be shared by several shard instances; access is serialized with a file lock.
         """
         self.state_file = state_file
-        # Storage structure: { "unique_key": {"timestamp": float, "signal_data": dict, "trigger_count": int} }
-        self.last_triggered_signals = self._load_state()
+        self.lock_file = f"{state_file}.lock"
+        self._state_mtime = None
+        self._dirty = False
+        # Cooldown table: { (symbol, timeframe, indicator, signal_type): CooldownRecord }
+        # Active zones of zone-based indicators (ZONE_DEDUP_RULES): { same key: ZoneIndex }
+        self.cooldowns, self.zones = self._load_state()
+
+    @contextmanager
+    def _locked(self):
+        """Holds an exclusive inter-process lock on the state file for the duration of the block."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'a') as lock_fd:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
 
     def _load_state(self):
-        """Loads the last triggered signals from the state file."""
+        """Loads the cooldown table from the state file (the legacy per-signal format is converted)."""
         if os.path.exists(self.state_file):
             try:
+                self._state_mtime = os.path.getmtime(self.state_file)
                 with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                log.warning(f"Could not load signal state from {self.state_file}. Starting with a fresh state. Error: {e}")
-                return {}
-        return {}
+                    data = json.load(f)
+                if data.get('version') != STATE_FORMAT_VERSION:
+                    return self._convert_legacy_state(data)
+                cooldowns = {tuple(row[:4]): CooldownRecord(*row[4:]) for row in data['records']}
+                zones = {}
+                for row in data.get('zones', []):
+                    key = tuple(row[:4])
+                    if key[2] in ZONE_DEDUP_RULES:
+                        zones.setdefault(key, ZoneIndex.for_indicator(key[2])).load_rows(row[4])
+                return cooldowns, zones
+            except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError) as e:
+                log.warning("Could not load signal state from %s. Starting with a fresh state. Error: %s", self.state_file, e)
+                return {}, {}
+        return {}, {}
+
+    @staticmethod
+    def _convert_legacy_state(data):
+        """Converts the old {"SYMBOL-tf-indicator-type": {timestamp, signal_data, trigger_count}} layout."""
+        cooldowns, zones = {}, {}
+        for unique_key, info in data.items():
+            parts = unique_key.split('-', 3)
+            if len(parts) != 4:
+                continue
+            key = tuple(parts)
+            primary = info.get('signal_data', {}).get('primary_signal', {})
+            record = CooldownRecord.from_signal(primary, info.get('timestamp', 0.0), info.get('trigger_count', 1))
+            cooldowns[key] = record
+            if record.zone_bottom is not None:
+                zones.setdefault(key, ZoneIndex.for_indicator(key[2])).record(
+                    record.zone_bottom, record.zone_top, record.timestamp, record.trigger_count)
+        return cooldowns, zones
+
+    def _refresh_state(self):
+        """Reloads the state file if another shard has written to it since we last read it."""
+        try:
+            mtime = os.path.getmtime(self.state_file)
+        except OSError:
+            return
+        if mtime != self._state_mtime:
+            self.cooldowns, self.zones = self._load_state()
 
     def _save_state(self):
-        """Saves the current signal state to the state file."""
+        """Saves the cooldown table to the state file (atomically, so other shards never read a partial file)."""
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        state = {
+            "version": STATE_FORMAT_VERSION,
+            "fields": ["symbol", "timeframe", "indicator", "signal_type", *CooldownRecord.FIELDS],
+            "records": [[*key, *record.to_row()] for key, record in self.cooldowns.items()],
+            "zones": [[*key, index.to_rows()] for key, index in self.zones.items() if len(index)],
+        }
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(self.last_triggered_signals, f, indent=4)
-        except IOError as e:
-            log.error(f"Could not save signal state to {self.state_file}. Error: {e}")
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(tmp_file, self.state_file)
+            self._state_mtime = os.path.getmtime(self.state_file)
+            self._dirty = False
+        except (IOError, OSError) as e:
+            log.error("Could not save signal state to %s. Error: %s", self.state_file, e)
 
     def _get_unique_key(self, symbol, timeframe, signal):
         """
-        Generates a unique key based on the symbol, timeframe, indicator name, and signal type.
+        Returns the cooldown key: (symbol, timeframe, indicator name, signal type).
         """
-        indicator = signal['primary_signal'].get('indicator', 'UnknownIndicator')
-        signal_type = signal['primary_signal'].get('signal_type', 'UnknownType')
-        return f"{symbol}-{timeframe}-{indicator}-{signal_type}"
+        primary = signal['primary_signal']
+        return (symbol, timeframe, primary.get('indicator', 'UnknownIndicator'), primary.get('signal_type', 'UnknownType'))
 
     def should_send_alert(self, symbol, timeframe, signal):
         """
         Determines if a new alert should be sent based on dynamic cooldown and signal significance.
         Returns a tuple (should_send: bool, previous_signal: dict | None)
         """
-        unique_key = self._get_unique_key(symbol, timeframe, signal)
-        current_time = time.time()
-        
-        last_signal_info = self.last_triggered_signals.get(unique_key)
+        return self.evaluate_signals([(symbol, timeframe, signal)])[0]
 
-        # 1. If the signal has never been sent before, it should be sent.
-        if not last_signal_info:
-            log.info(f"New signal type {unique_key}, allowing send.")
-            self._update_state(unique_key, signal, trigger_count=1)
-            return True, None
+    def evaluate_signals(self, candidates):
+        """
+        Decides a whole cycle's candidate signals in one pass.
+        `candidates` is a list of (symbol, timeframe, signal); returns a list of
+        (should_send, previous_signal) in the same order. The state file is locked,
+        refreshed and written at most once for the batch.
+        """
+        if not candidates:
+            return []
+        # Read-decide-write under the lock so cooldowns stay consistent across shards.
+        with self._locked():
+            self._refresh_state()
+            current_time = time.time()
+            decisions = [self._evaluate_signal(symbol, timeframe, signal, current_time)
+                         for symbol, timeframe, signal in candidates]
+            if self._dirty:
+                self._save_state()
+        return decisions
 
-        last_timestamp = last_signal_info['timestamp']
-        last_signal_data = last_signal_info['signal_data']['primary_signal']
+    def _evaluate_signal(self, symbol, timeframe, signal, current_time):
+        """Applies the cooldown rules to a signal against the current in-memory table."""
+        unique_key = self._get_unique_key(symbol, timeframe, signal)
         current_signal_data = signal['primary_signal']
-        trigger_count = last_signal_info.get('trigger_count', 1)
         
-        # 2. Check logic for FVG signals
-        if current_signal_data.get('indicator') == "Fair Value Gap Rebalance":
-            # Check for significant changes (Price Tolerance)
-            is_similar = False
-            try:
-                last_fvg_top = float(last_signal_data.get('fvg_top', '0'))
-                last_fvg_bottom = float(last_signal_data.get('fvg_bottom', '0'))
-                current_fvg_top = float(current_signal_data.get('fvg_top', '0'))
-                current_fvg_bottom = float(current_signal_data.get('fvg_bottom', '0'))
-                
-                last_conf_candle = last_signal_data.get('confirmation_candle')
-                current_conf_candle = current_signal_data.get('confirmation_candle')
-
-                # Calculate midpoints
-                last_fvg_mid = (last_fvg_top + last_fvg_bottom) / 2
-                current_fvg_mid = (current_fvg_top + current_fvg_bottom) / 2
-
-                # Calculate percentage difference
-                if last_fvg_mid != 0:
-                    fvg_mid_diff_percent = abs((current_fvg_mid - last_fvg_mid) / last_fvg_mid) * 100
-                else:
-                    fvg_mid_diff_percent = 0 if current_fvg_mid == 0 else float('inf')
-                
-                if fvg_mid_diff_percent < FVG_PRICE_TOLERANCE_PERCENT and \
-                   last_conf_candle == current_conf_candle:
-                    is_similar = True
-            except (ValueError, TypeError) as e:
-                log.warning(f"Error comparing FVG data for {unique_key}: {e}")
-                is_similar = False # Treat as different on error
-            
-            if is_similar:
-                # Calculate Dynamic Cooldown: Base * (Factor ^ (Count - 1))
-                # Cycle: 30 -> 60 -> 120 -> 240 -> 30 ...
-                
-                calculated_cooldown = FVG_COOLDOWN_PERIOD_MINUTES * (COOLDOWN_BACKOFF_FACTOR ** (trigger_count - 1))
-                
-                if calculated_cooldown > MAX_COOLDOWN_PERIOD_MINUTES:
-                    # Reset Logic: If exceeds max, we loop back to base cooldown
-                    dynamic_cooldown = FVG_COOLDOWN_PERIOD_MINUTES
-                    next_trigger_count = 2 # Prepare for the second step in the next cycle
-                else:
-                    dynamic_cooldown = calculated_cooldown
-                    next_trigger_count = trigger_count + 1
-                
-                time_since_last_min = (current_time - last_timestamp) / 60
-                
-                if time_since_last_min < dynamic_cooldown:
-                    log.info(f"FVG signal {unique_key} suppressed. Count: {trigger_count}. Required Cooldown: {dynamic_cooldown:.1f}m (Elapsed: {time_since_last_min:.1f}m).")
-                    return False, last_signal_data
-                else:
-                    log.info(f"FVG signal {unique_key} passed dynamic cooldown ({dynamic_cooldown:.1f}m). Sending repeated alert (Next Count {next_trigger_count}).")
-                    self._update_state(unique_key, signal, trigger_count=next_trigger_count)
-                    return True, last_signal_data
-            else:
-                # Significant change detected -> Reset trigger count
-                log.info(f"FVG signal {unique_key} features changed significantly (Diff: {fvg_mid_diff_percent:.2f}%). Resetting cooldown.")
-                self._update_state(unique_key, signal, trigger_count=1)
-                return True, last_signal_data
+        last_record = self.cooldowns.get(unique_key)
+        previous_signal = last_record.as_previous_signal(unique_key) if last_record else None
+
+        # 1. Zone-based indicators (FVG, Order Block, Bollinger breakout level): repeats of a known zone back off
+        zone = zone_bounds(current_signal_data)
+        if zone is not None:
+            return self._evaluate_zone(unique_key, current_signal_data, zone, current_time, previous_signal)
+
+        # 2. If the signal has never been sent before, it should be sent.
+        if last_record is None:
+            log.info("New signal type %s, allowing send.", unique_key)
+            self._update_state(unique_key, current_signal_data, current_time, trigger_count=1)
+            return True, None
 
         # 3. Generic logic for all other signals
         # Use a simple time-based cooldown
-        time_since_last_min = (current_time - last_timestamp) / 60
-        
+        time_since_last_min = (current_time - last_record.timestamp) / 60
         if time_since_last_min < DEFAULT_COOLDOWN_PERIOD_MINUTES:
-            log.info(f"Signal {unique_key} suppressed by default cooldown. "
-                     f"Elapsed: {time_since_last_min:.1f}m, Required: {DEFAULT_COOLDOWN_PERIOD_MINUTES}m.")
-            return False, last_signal_data
+            log.info("Signal %s suppressed by default cooldown. Elapsed: %.1fm, Required: %sm.",
+                     unique_key, time_since_last_min, DEFAULT_COOLDOWN_PERIOD_MINUTES)
+            return False, previous_signal
         
-        log.info(f"Signal {unique_key} passed default cooldown. Updating state and sending.")
-        self._update_state(unique_key, signal, trigger_count=1)
-        return True, last_signal_data
+        log.info("Signal %s passed default cooldown. Updating state and sending.", unique_key)
+        self._update_state(unique_key, current_signal_data, current_time, trigger_count=1)
+        return True, previous_signal
 
-    def _update_state(self, unique_key, signal, trigger_count=1):
+    def _evaluate_zone(self, unique_key, current_signal_data, zone, current_time, previous_signal):
         """
-        Updates or creates the state of a signal and saves it to the file.
+        Looks the signal's zone up among the key's active zones. A new zone is sent right away;
+        a known one is held back by an exponentially growing cooldown.
         """
-        self.last_triggered_signals[unique_key] = {
-            "timestamp": time.time(),
-            "signal_data": signal,
-            "trigger_count": trigger_count
-        }
-        self._save_state()
+        rule = ZONE_DEDUP_RULES[unique_key[2]]
+        index = self.zones.get(unique_key)
+        if index is None:
+            index = self.zones[unique_key] = ZoneIndex.for_indicator(unique_key[2])
+        index.prune(current_time - ZONE_MEMORY_MINUTES * 60)
+        match = index.find(*zone)
+
+        if match is None:
+            # Significant change detected -> new zone, fresh trigger count
+            log.info("Zone signal %s at %.2f-%.2f does not match any active zone. Sending.", unique_key, zone[0], zone[1])
+            index.record(*zone, current_time, 1)
+            self._update_state(unique_key, current_signal_data, current_time, trigger_count=1)
+            return True, previous_signal
+
+        trigger_count = index.trigger_counts[match]
+        dynamic_cooldown, next_trigger_count = backoff_cooldown(rule['cooldown_minutes'], trigger_count)
+        time_since_last_min = (current_time - index.timestamps[match]) / 60
+
+        if time_since_last_min < dynamic_cooldown:
+            log.info("Zone signal %s suppressed. Count: %d. Required Cooldown: %.1fm (Elapsed: %.1fm).",
+                     unique_key, trigger_count, dynamic_cooldown, time_since_last_min)
+            return False, previous_signal
+
+        log.info("Zone signal %s passed dynamic cooldown (%.1fm). Sending repeated alert (Next Count %d).",
+                 unique_key, dynamic_cooldown, next_trigger_count)
+        index.record(*zone, current_time, next_trigger_count)
+        self._update_state(unique_key, current_signal_data, current_time, trigger_count=next_trigger_count)
+        return True, previous_signal
+
+    def _update_state(self, unique_key, primary_signal, current_time, trigger_count=1):
+        """
+        Updates or creates the cooldown record of a signal; the caller saves the table once per batch.
+        """
+        self.cooldowns[unique_key] = CooldownRecord.from_signal(primary_signal, current_time, trigger_count)
+        self._dirty = True
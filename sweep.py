@@ -0,0 +1,384 @@
+"""
+Parameter sweep for the detector thresholds over stored candle history.
+
+    python sweep.py download --timeframe 15m --days 365 --out history
+    python sweep.py run --data history --timeframe 15m [--grid BB_STD=1.5:3:0.25] [--random 50] [--per-symbol]
+
+Every parameter set replays its detector on every closed candle of every symbol and is scored by
+hit rate (the close `SWEEP_HORIZON_CANDLES` later moved at least `SWEEP_HIT_PERCENT` in the signal's
+direction) and alert volume (signals per symbol per day, before cooldown). The candles and their
+RSI / ATR columns live in one shared-memory block that the worker processes map instead of copying.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import config
+from config import MAJOR_COINS, RSI_LENGTH, SWEEP_HIT_PERCENT, SWEEP_HORIZON_CANDLES, SWEEP_WORKERS
+from logger import log
+
+SWEEP_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'rsi', 'atr')
+_ATR_LENGTH = 14  # OrderBlockSignal's ATR length
+MINUTES = {'m': 1, 'h': 60, 'd': 1440}
+
+# Swept parameter -> the checker it belongs to. Checkers do not interact, so each one's grid is swept on its own.
+PARAMETERS = {
+    'VOLUME_SPIKE_THRESHOLD': 'VolumeSpikeSignal',
+    'VOLUME_MA_LENGTH': 'VolumeSpikeSignal',
+    'BB_STD': 'BollingerBandsBreakoutSignal',
+    'BB_LENGTH': 'BollingerBandsBreakoutSignal',
+    'OB_ATR_MULTIPLIER': 'OrderBlockSignal',
+    'OB_LOOKBACK': 'OrderBlockSignal',
+    'RSI_DIVERGENCE_WINDOW': 'RSIDivergenceSignal',
+}
+INTEGER_PARAMETERS = {'VOLUME_MA_LENGTH', 'BB_LENGTH', 'OB_LOOKBACK', 'RSI_DIVERGENCE_WINDOW'}
+
+DEFAULT_GRID = {
+    'VOLUME_SPIKE_THRESHOLD': '1.5:4:0.25',
+    'BB_STD': '1.5:3:0.25',
+    'OB_ATR_MULTIPLIER': '1:3.5:0.25',
+    'RSI_DIVERGENCE_WINDOW': '4:30:2',
+}
+
+# --- Detectors: direction (1 / -1 / 0) at every closed candle, as the checker would decide on a frame ending there ---
+
+def _rolling(values, length):
+    """(len - length + 1, length) view of every window."""
+    return np.lib.stride_tricks.sliding_window_view(values, length)
+
+def volume_spike_signals(c, p):
+    length, threshold = int(p['VOLUME_MA_LENGTH']), p['VOLUME_SPIKE_THRESHOLD']
+    n = len(c['volume'])
+    direction = np.zeros(n, dtype=np.int8)
+    if n < length + 5:
+        return direction
+    sma = np.full(n, np.nan)
+    sma[length - 1:] = _rolling(c['volume'], length).mean(axis=1)
+    fired = (sma > 0) & (c['volume'] > sma * threshold)
+    fired[:length + 4] = False
+    direction[fired] = np.where(c['close'][fired] > c['open'][fired], 1, -1)
+    return direction
+
+def bollinger_breakout_signals(c, p):
+    length, std = int(p['BB_LENGTH']), p['BB_STD']
+    close = c['close']
+    n = len(close)
+    direction = np.zeros(n, dtype=np.int8)
+    if n < length + 5:
+        return direction
+    windows = _rolling(close, length)
+    upper, lower = np.full(n, np.nan), np.full(n, np.nan)
+    mean, width = windows.mean(axis=1), std * windows.std(axis=1)
+    upper[length - 1:], lower[length - 1:] = mean + width, mean - width
+    t = np.arange(length + 4, n)
+    bullish = (close[t - 1] <= upper[t - 1]) & (close[t] > upper[t])
+    bearish = (close[t - 1] >= lower[t - 1]) & (close[t] < lower[t])
+    direction[t] = np.where(bullish, 1, np.where(bearish, -1, 0))
+    return direction
+
+def order_block_signals(c, p):
+    """kernels._order_block_scan at every candle: the first matching displacement, newest first."""
+    multiplier, lookback = p['OB_ATR_MULTIPLIER'], int(p['OB_LOOKBACK'])
+    o, h, l, cl, atr = c['open'], c['high'], c['low'], c['close'], c['atr']
+    n = len(cl)
+    direction = np.zeros(n, dtype=np.int8)
+    t = np.arange(lookback + 4, n)
+    if not len(t):
+        return direction
+    found = np.zeros(len(t), dtype=np.int8)
+    for k in range(1, lookback - 1):
+        i = t - k
+        displaced = (atr[i] != 0) & (np.abs(cl[i] - o[i]) > atr[i] * multiplier)  # NaN ATR compares False
+        retest = (h[t] >= l[i - 1]) & (l[t] <= h[i - 1])
+        bearish = displaced & (cl[i] < o[i]) & (cl[i - 1] > o[i - 1]) & retest
+        bullish = displaced & (cl[i] > o[i]) & (cl[i - 1] < o[i - 1]) & retest
+        found = np.where(found != 0, found, np.where(bearish, -1, np.where(bullish, 1, 0))).astype(np.int8)
+    direction[t] = found
+    return direction
+
+def _previous_pivot_divergence(pivot, price, rsi, i, window):
+    """
+    kernels._divergence_scan for the bullish side: pivot i set a lower low than the nearest earlier pivot
+    in the window while RSI set a higher one.
+    """
+    result = np.zeros(len(i), dtype=bool)
+    open_ = pivot[i].copy()  # still looking for the previous pivot
+    for d in range(2, window):
+        j = i - d
+        open_ &= j >= 2
+        hit = open_ & pivot[np.maximum(j, 0)]
+        jj = j[hit]
+        result[hit] = (price[i[hit]] < price[jj]) & (rsi[i[hit]] > rsi[jj])
+        open_ &= ~hit
+    return result
+
+def rsi_divergence_signals(c, p):
+    window = int(p['RSI_DIVERGENCE_WINDOW'])
+    low, high, rsi = c['low'], c['high'], c['rsi']
+    n = len(low)
+    direction = np.zeros(n, dtype=np.int8)
+    t = np.arange(RSI_LENGTH + window + 4, n)
+    if not len(t):
+        return direction
+    pivot_low, pivot_high = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    pivot_low[1:-1] = (low[1:-1] < low[:-2]) & (low[1:-1] < low[2:])
+    pivot_high[1:-1] = (high[1:-1] > high[:-2]) & (high[1:-1] > high[2:])
+    i = t - 1
+    bullish = _previous_pivot_divergence(pivot_low, low, rsi, i, window)
+    # Bearish: a higher high with a lower RSI, i.e. the same comparison on negated values
+    bearish = _previous_pivot_divergence(pivot_high, -high, -rsi, i, window)
+    direction[t] = np.where(bullish, 1, np.where(bearish, -1, 0))
+    return direction
+
+DETECTORS = {
+    'VolumeSpikeSignal': volume_spike_signals,
+    'BollingerBandsBreakoutSignal': bollinger_breakout_signals,
+    'OrderBlockSignal': order_block_signals,
+    'RSIDivergenceSignal': rsi_divergence_signals,
+}
+
+def score(direction, close, horizon: int, hit_percent: float):
+    """(signals, hits): signals with a full horizon after them, and those that moved far enough their way."""
+    t = np.flatnonzero(direction[:len(close) - horizon])
+    moves = (close[t + horizon] / close[t] - 1) * 100 * direction[t]
+    return len(t), int(np.count_nonzero(moves >= hit_percent))
+
+# --- Worker side: the candle block is mapped from shared memory once per process ---
+
+_worker = {}
+
+def _attach(name: str, shape, offsets):
+    # Workers share the parent's resource tracker, so the parent's unlink is the only cleanup needed
+    memory = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    _worker.update(memory=memory, block=block, offsets=offsets)
+
+def _symbol_columns(index: int):
+    start, end = _worker['offsets'][index], _worker['offsets'][index + 1]
+    rows = _worker['block'][start:end]
+    return {name: rows[:, f] for f, name in enumerate(SWEEP_FIELDS)}
+
+def _evaluate(checker: str, params: dict, horizon: int, hit_percent: float):
+    """Scores one parameter set on every symbol. Returns [(signals, hits)] per symbol."""
+    detect = DETECTORS[checker]
+    results = []
+    for index in range(len(_worker['offsets']) - 1):
+        columns = _symbol_columns(index)
+        results.append(score(detect(columns, params), columns['close'], horizon, hit_percent))
+    return results
+
+# --- Parent side ---
+
+def load_history(directory: str, timeframe: str, symbols=None):
+    """Recorded klines of one timeframe as [(symbol, {field: float64 array})], with RSI and ATR computed like the checkers."""
+    import pandas as pd
+    from data_fetcher import parse_klines
+    from indicators import _require_ta
+    from market_replay import load_raw_market_data
+
+    _require_ta()
+    history = []
+    for recording in load_raw_market_data(directory):
+        if recording['timeframe'] != timeframe or not recording.get('klines'):
+            continue
+        if symbols and recording['symbol'] not in symbols:
+            continue
+        _, columns = parse_klines(recording['klines'])
+        df = pd.DataFrame({name: columns[name] for name in ('open', 'high', 'low', 'close', 'volume')})
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        columns['rsi'] = df.ta.rsi(length=RSI_LENGTH).to_numpy(dtype=np.float64)
+        columns['atr'] = df.ta.atr(length=_ATR_LENGTH).to_numpy(dtype=np.float64)
+        history.append((recording['symbol'], columns))
+    return history
+
+def _parse_values(name: str, spec: str):
+    """"a,b,c" or "start:stop:step" (stop included)."""
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        values = list(np.round(np.arange(start, stop + step / 2, step), 6))
+    else:
+        values = [float(x) for x in spec.split(',')]
+    return [int(v) for v in values] if name in INTEGER_PARAMETERS else [float(v) for v in values]
+
+def parameter_sets(grid: dict, samples: int = 0, seed: int = 0):
+    """
+    {checker: [params]}: the full grid of each checker's parameters (the rest at their config values),
+    or `samples` sets drawn from it per checker when `samples` > 0.
+    """
+    rng = random.Random(seed)
+    sets = {}
+    for checker in dict.fromkeys(PARAMETERS[name] for name in grid):
+        names = [name for name, owner in PARAMETERS.items() if owner == checker]
+        axes = [grid.get(name, [getattr(config, name)]) for name in names]
+        combos = list(itertools.product(*axes))
+        if 0 < samples < len(combos):
+            combos = rng.sample(combos, samples)
+        sets[checker] = [dict(zip(names, combo)) for combo in combos]
+    return sets
+
+def run_sweep(history, sets: dict, timeframe: str, workers: int = SWEEP_WORKERS,
+              horizon: int = SWEEP_HORIZON_CANDLES, hit_percent: float = SWEEP_HIT_PERCENT):
+    """
+    Scores every parameter set across the pool. Returns one row per set with its totals, hit rate,
+    alerts per symbol per day and the per-symbol (signals, hits).
+    """
+    offsets = np.cumsum([0] + [len(columns['close']) for _, columns in history])
+    shape = (int(offsets[-1]), len(SWEEP_FIELDS))
+    memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+        for (_, columns), start, end in zip(history, offsets[:-1], offsets[1:]):
+            for f, name in enumerate(SWEEP_FIELDS):
+                block[start:end, f] = columns[name]
+        del block
+
+        tasks = [(checker, params) for checker, param_list in sets.items() for params in param_list]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach,
+                                 initargs=(memory.name, shape, offsets.tolist())) as pool:
+            futures = [pool.submit(_evaluate, checker, params, horizon, hit_percent) for checker, params in tasks]
+            results = [future.result() for future in futures]
+    finally:
+        memory.close()
+        memory.unlink()
+
+    candle_days = int(timeframe[:-1]) * MINUTES[timeframe[-1]] / 1440
+    days = sum(max(end - start - horizon, 0) for start, end in zip(offsets[:-1], offsets[1:])) * candle_days
+    rows = []
+    for (checker, params), per_symbol in zip(tasks, results):
+        signals = sum(s for s, _ in per_symbol)
+        hits = sum(h for _, h in per_symbol)
+        rows.append({
+            'checker': checker,
+            'params': params,
+            'signals': signals,
+            'hit_rate': hits / signals if signals else 0.0,
+            'alerts_per_day': signals / days if days else 0.0,
+            'per_symbol': per_symbol,
+        })
+    return rows
+
+def rank(rows, min_signals: int, max_alerts_per_day: float = None):
+    """Best first: hit rate among sets with enough signals (and within the alert budget), then fewer alerts."""
+    eligible = [r for r in rows if r['signals'] >= min_signals
+                and (max_alerts_per_day is None or r['alerts_per_day'] <= max_alerts_per_day)]
+    return sorted(eligible, key=lambda r: (-r['hit_rate'], r['alerts_per_day']))
+
+def _format_params(params: dict) -> str:
+    return ", ".join(f"{name}={value:g}" for name, value in params.items())
+
+def format_report(rows, symbols, top: int, min_signals: int, max_alerts_per_day: float = None, per_symbol: bool = False) -> str:
+    lines = []
+    for checker in dict.fromkeys(r['checker'] for r in rows):
+        checker_rows = [r for r in rows if r['checker'] == checker]
+        current = {name: getattr(config, name) for name in checker_rows[0]['params']}
+        lines.append(f"\n{checker} (current: {_format_params(current)})")
+        lines.append(f"  {'hit rate':>8} {'alerts/day':>10} {'signals':>8}  params")
+        for r in rank(checker_rows, min_signals, max_alerts_per_day)[:top]:
+            marker = " *" if r['params'] == current else ""
+            lines.append(f"  {r['hit_rate']:>8.1%} {r['alerts_per_day']:>10.2f} {r['signals']:>8}  {_format_params(r['params'])}{marker}")
+        if per_symbol:
+            lines.append("  best per symbol:")
+            for s, symbol in enumerate(symbols):
+                best = max(((hits / signals, r) for r in checker_rows for signals, hits in [r['per_symbol'][s]] if signals >= min_signals),
+                           key=lambda item: item[0], default=None)
+                if best:
+                    lines.append(f"    {symbol:<14} {best[0]:>6.1%}  {_format_params(best[1]['params'])}")
+    return "\n".join(lines)
+
+def write_csv(rows, path: str):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['checker', 'params', 'signals', 'hit_rate', 'alerts_per_day'])
+        for r in rows:
+            writer.writerow([r['checker'], _format_params(r['params']), r['signals'], f"{r['hit_rate']:.4f}", f"{r['alerts_per_day']:.4f}"])
+
+async def download_history(symbols, timeframe: str, days: int, directory: str, concurrency: int = 5):
+    """Pages closed klines of the last `days` from Binance into recordings (the format of MARKET_DATA_RECORD_DIR)."""
+    from data_fetcher import _fetch_json
+    from http_client import close_sessions, get_session
+    from market_replay import record_raw_market_data
+
+    now_ms = int(time.time() * 1000)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(symbol):
+        klines, start = [], now_ms - days * 86_400_000
+        async with semaphore:
+            while start < now_ms:
+                page = await _fetch_json(get_session('binance'), "/fapi/v1/klines",
+                                         {'symbol': symbol, 'interval': timeframe, 'startTime': start, 'limit': 1500})
+                if not page or page[-1][0] < start:
+                    break
+                klines.extend(k for k in page if k[6] < now_ms)
+                start = page[-1][0] + 1
+        record_raw_market_data(symbol, timeframe, klines, [], [], directory)
+        log.info("Downloaded %d %s candles for %s.", len(klines), timeframe, symbol)
+
+    try:
+        await asyncio.gather(*[fetch(symbol) for symbol in symbols])
+    finally:
+        await close_sessions()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sweep detector thresholds over stored candle history.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    download = commands.add_parser("download", help="Download kline history into a recordings directory.")
+    download.add_argument("--symbols", default=",".join(MAJOR_COINS), help="Comma-separated symbols (default: MAJOR_COINS).")
+    download.add_argument("--timeframe", default="15m")
+    download.add_argument("--days", type=int, default=365)
+    download.add_argument("--out", default="history", metavar="DIR")
+
+    run = commands.add_parser("run", help="Run the sweep.")
+    run.add_argument("--data", default="history", metavar="DIR", help="Recordings directory (download or MARKET_DATA_RECORD_DIR).")
+    run.add_argument("--timeframe", default="15m")
+    run.add_argument("--symbols", help="Comma-separated subset of the recorded symbols.")
+    run.add_argument("--grid", action="append", default=[], metavar="NAME=SPEC",
+                     help=f"Values for one parameter: a,b,c or start:stop:step. Replaces the default grid. One of {', '.join(PARAMETERS)}.")
+    run.add_argument("--random", type=int, default=0, metavar="N", help="Random search: N sets per checker drawn from the grid.")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--workers", type=int, default=SWEEP_WORKERS, help="Worker processes (0 = one per CPU).")
+    run.add_argument("--horizon", type=int, default=SWEEP_HORIZON_CANDLES, help="Candles after the signal to judge it on.")
+    run.add_argument("--hit-percent", type=float, default=SWEEP_HIT_PERCENT, help="Move in the signal's direction that counts as a hit.")
+    run.add_argument("--min-signals", type=int, default=30, help="Ignore sets with fewer signals.")
+    run.add_argument("--max-alerts-per-day", type=float, help="Ignore sets above this many alerts per symbol per day.")
+    run.add_argument("--top", type=int, default=10)
+    run.add_argument("--per-symbol", action="store_true", help="Also print the best set per symbol (candidate COIN_CONFIGS overrides).")
+    run.add_argument("--csv", metavar="PATH", help="Write every scored set to a CSV file.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.command == "download":
+        asyncio.run(download_history(args.symbols.split(","), args.timeframe, args.days, args.out))
+        return
+
+    grid = {}
+    for item in args.grid or [f"{name}={spec}" for name, spec in DEFAULT_GRID.items()]:
+        name, spec = item.split("=", 1)
+        if name not in PARAMETERS:
+            raise SystemExit(f"Unknown parameter {name}; choose from {', '.join(PARAMETERS)}.")
+        grid[name] = _parse_values(name, spec)
+
+    history = load_history(args.data, args.timeframe, set(args.symbols.split(",")) if args.symbols else None)
+    if not history:
+        raise SystemExit(f"No {args.timeframe} recordings in {args.data}.")
+    sets = parameter_sets(grid, args.random, args.seed)
+    candles = sum(len(columns['close']) for _, columns in history)
+    print(f"{len(history)} symbols, {candles} {args.timeframe} candles, {sum(map(len, sets.values()))} parameter sets")
+
+    start = time.perf_counter()
+    rows = run_sweep(history, sets, args.timeframe, args.workers, args.horizon, args.hit_percent)
+    print(f"swept in {time.perf_counter() - start:.1f}s")
+    print(format_report(rows, [symbol for symbol, _ in history], args.top, args.min_signals, args.max_alerts_per_day, args.per_symbol))
+    if args.csv:
+        write_csv(rows, args.csv)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Lightweight span tracing with an in-process exporter.
+
+Spans follow the OpenTelemetry model (trace / span / parent ids, wall-clock start and end in ns,
+attributes) and are written to TRACE_FILE as OTLP/JSON lines, one export request per flush, the
+format of the OpenTelemetry Collector's file exporter. The current span is kept in a ContextVar,
+so it follows asyncio tasks. When TRACING_ENABLED is off every call is a no-op.
+
+    python tracing.py report [--file traces.jsonl] [--alerts 20]
+
+prints p50 / p95 / p99 per stage and the end-to-end latency from candle close to delivery.
+"""
+import argparse
+import atexit
+import contextvars
+import json
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from config import TRACING_ENABLED, TRACE_FILE
+from logger import log
+
+SERVICE_NAME = "CryptoSignalBot"
+FLUSH_EVERY_SPANS = 512
+# Report order: per-series stages, per-cycle stages, then per-alert delivery stages
+STAGES = ("fetch", "frame_build", "to_frame", "check", "cooldown", "snapshot",
+          "ai_queue_wait", "llm", "card_render", "webhook_post", "signal", "cycle")
+
+_current = contextvars.ContextVar("current_span", default=None)
+_finished = []
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, **attributes):
+        """Sets any last attributes and hands the span to the exporter (once)."""
+        if self.end_ns is not None:
+            return
+        self.attributes.update(attributes)
+        self.end_ns = time.time_ns()
+        _finished.append(self)
+        if len(_finished) >= FLUSH_EVERY_SPANS:
+            flush_spans()
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": 2, "message": self.error}  # STATUS_CODE_ERROR
+        return span
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled."""
+    __slots__ = ()
+    attributes = {}
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, **attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+_NULL_CONTEXT = nullcontext(_NOOP_SPAN)
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _plain_value(value: dict):
+    (kind, raw), = value.items()
+    return int(raw) if kind == "intValue" else raw
+
+def current_span():
+    """The active span, or a no-op one."""
+    return _current.get() or _NOOP_SPAN
+
+def start_span(name: str, parent=None, **attributes):
+    """Starts a span (a child of `parent`, or of the active span) without activating it; call `end()` on it."""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, parent if parent is not None else _current.get(), attributes)
+
+def span(name: str, **attributes):
+    """Context manager: a child span of the active one, active for the block. Free when tracing is disabled."""
+    if not TRACING_ENABLED:
+        return _NULL_CONTEXT
+    return _active_span(Span(name, _current.get(), attributes), end=True)
+
+def use_span(active):
+    """Context manager activating an already started span (e.g. in another task) without ending it."""
+    if not TRACING_ENABLED or active is None or active is _NOOP_SPAN:
+        return _NULL_CONTEXT
+    return _active_span(active, end=False)
+
+@contextmanager
+def _active_span(active, end: bool):
+    token = _current.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        if end:
+            active.end()
+
+def traced(name: str):
+    """Decorator running a coroutine function inside a span."""
+    def decorate(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def flush_spans(path: str = TRACE_FILE):
+    """Appends the finished spans to the trace file as one OTLP/JSON export request."""
+    if not _finished:
+        return
+    spans = [s.to_otlp() for s in _finished]
+    _finished.clear()
+    request = {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+    }]}
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+    except OSError as e:
+        log.warning("Could not write %d spans to %s: %s", len(spans), path, e)
+
+if TRACING_ENABLED:
+    atexit.register(flush_spans)
+
+# --- Report ---
+
+def load_spans(path: str):
+    """Reads a trace file back into plain dicts: name, trace, id, parent, start / end (s), attributes."""
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for s in scope.get("spans", []):
+                        spans.append({
+                            "name": s["name"],
+                            "trace": s["traceId"],
+                            "id": s["spanId"],
+                            "parent": s.get("parentSpanId"),
+                            "start": int(s["startTimeUnixNano"]) / 1e9,
+                            "end": int(s["endTimeUnixNano"]) / 1e9,
+                            "attributes": {a["key"]: _plain_value(a["value"]) for a in s.get("attributes", [])},
+                        })
+    return spans
+
+def end_to_end_seconds(signal_span: dict):
+    """Candle close to alert delivery of a signal span, or None if it was not delivered."""
+    attributes = signal_span["attributes"]
+    if "delivered_at" not in attributes or "candle_close" not in attributes:
+        return None
+    return attributes["delivered_at"] - attributes["candle_close"]
+
+def alert_breakdown(signal_span: dict, spans) -> dict:
+    """
+    Seconds per stage for one alert: the fetch / build / check / snapshot spans of its series in the same
+    cycle, the cycle's cooldown decision, and everything under the signal span (queue wait, LLM, render, POST).
+    """
+    attributes = signal_span["attributes"]
+    timeframes = set(str(attributes.get("timeframe", "")).split("+"))
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent"], []).append(s)
+    stages = {}
+
+    def add(s):
+        stages[s["name"]] = stages.get(s["name"], 0.0) + s["end"] - s["start"]
+
+    for s in spans:
+        if s["trace"] != signal_span["trace"]:
+            continue
+        a = s["attributes"]
+        if s["name"] == "cooldown" or (a.get("symbol") == attributes.get("symbol") and a.get("timeframe") in timeframes
+                                       and s["name"] in ("fetch", "frame_build", "to_frame", "check", "snapshot")):
+            add(s)
+    pending = list(children.get(signal_span["id"], []))
+    while pending:
+        s = pending.pop()
+        add(s)
+        pending.extend(children.get(s["id"], []))
+    return stages
+
+def _percentiles(values):
+    import numpy as np
+    return np.percentile(np.asarray(values), (50, 95, 99))
+
+def format_report(spans, alerts: int = 0) -> str:
+    durations = {}
+    for s in spans:
+        durations.setdefault(s["name"], []).append((s["end"] - s["start"]) * 1000)
+    names = [name for name in STAGES if name in durations] + sorted(set(durations) - set(STAGES))
+    lines = [f"{'stage':<16} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"]
+    for name in names:
+        p50, p95, p99 = _percentiles(durations[name])
+        lines.append(f"{name:<16} {len(durations[name]):>7} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f}")
+
+    signals = [s for s in spans if s["name"] == "signal"]
+    e2e = [value for value in map(end_to_end_seconds, signals) if value is not None]
+    if e2e:
+        p50, p95, p99 = _percentiles(e2e)
+        lines.append(f"\ncandle close -> delivery: {len(e2e)} alerts, p50 {p50:.1f}s, p95 {p95:.1f}s, p99 {p99:.1f}s")
+
+    if alerts:
+        lines.append("\nslowest alerts (s):")
+        delivered = sorted((s for s in signals if end_to_end_seconds(s) is not None), key=end_to_end_seconds, reverse=True)
+        for s in delivered[:alerts]:
+            stages = alert_breakdown(s, spans)
+            breakdown = ", ".join(f"{name} {stages[name]:.2f}" for name in STAGES if name in stages)
+            a = s["attributes"]
+            lines.append(f"  {a.get('symbol')} {a.get('timeframe')} {a.get('indicator')}: {end_to_end_seconds(s):.1f} ({breakdown})")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize span traces written with TRACING_ENABLED.")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--file", default=TRACE_FILE)
+    parser.add_argument("--alerts", type=int, default=0, metavar="N", help="Also break down the N slowest alerts.")
+    args = parser.parse_args()
+    print(format_report(load_spans(args.file), args.alerts))
+
+if __name__ == "__main__":
+    main()
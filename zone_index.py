@@ -0,0 +1,112 @@
+from bisect import bisect_left, bisect_right
+from config import ZONE_DEDUP_RULES, COOLDOWN_BACKOFF_FACTOR, MAX_COOLDOWN_PERIOD_MINUTES
+
+def _to_float(value):
+    """Parses a (possibly formatted, e.g. '1,234.50') price; None if missing or invalid."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+def zone_bounds(primary_signal: dict):
+    """
+    Returns the raw (bottom, top) price zone of a signal covered by ZONE_DEDUP_RULES, otherwise None.
+    A signal carrying only one of the zone fields (e.g. a band level) gives a single-price zone.
+    """
+    rule = ZONE_DEDUP_RULES.get(primary_signal.get('indicator'))
+    if rule is None:
+        return None
+    prices = [p for p in (_to_float(primary_signal.get(field)) for field in rule['fields']) if p is not None]
+    if not prices:
+        return None
+    return min(prices), max(prices)
+
+def backoff_cooldown(base_minutes: float, trigger_count: int):
+    """
+    Dynamic cooldown of a repeated zone: Base * (Factor ^ (Count - 1)), looping back to the base
+    once it would exceed MAX_COOLDOWN_PERIOD_MINUTES. Returns (cooldown_minutes, next_trigger_count).
+    """
+    calculated_cooldown = base_minutes * (COOLDOWN_BACKOFF_FACTOR ** (trigger_count - 1))
+    if calculated_cooldown > MAX_COOLDOWN_PERIOD_MINUTES:
+        # Reset Logic: If exceeds max, we loop back to base cooldown
+        return base_minutes, 2 # Prepare for the second step in the next cycle
+    return calculated_cooldown, trigger_count + 1
+
+class ZoneIndex:
+    """
+    Active price zones of one cooldown key, kept disjoint and sorted so that both bottoms and tops
+    are ascending; the zones overlapping a query are a contiguous run found with two bisections.
+    """
+    __slots__ = ("match", "tolerance", "bottoms", "tops", "timestamps", "trigger_counts")
+
+    def __init__(self, match: str = "overlap", tolerance_percent: float = 0.0):
+        self.match = match
+        self.tolerance = tolerance_percent / 100
+        self.bottoms = []
+        self.tops = []
+        self.timestamps = []
+        self.trigger_counts = []
+
+    @classmethod
+    def for_indicator(cls, indicator: str):
+        rule = ZONE_DEDUP_RULES[indicator]
+        return cls(rule['match'], rule['tolerance_percent'])
+
+    def __len__(self):
+        return len(self.bottoms)
+
+    def _normalize(self, bottom: float, top: float):
+        """The stored form of a zone: its midpoint in "midpoint" mode, the zone itself otherwise."""
+        if self.match == "midpoint":
+            mid = (bottom + top) / 2
+            return mid, mid
+        return bottom, top
+
+    def _overlapping(self, bottom: float, top: float):
+        """Index range of stored zones overlapping [bottom, top] widened by the tolerance."""
+        pad = abs(bottom + top) / 2 * self.tolerance
+        return bisect_left(self.tops, bottom - pad), bisect_right(self.bottoms, top + pad)
+
+    def find(self, bottom: float, top: float):
+        """
+        Returns the index of the most recently triggered stored zone matching the given raw zone, or None.
+        """
+        lo, hi = self._overlapping(*self._normalize(bottom, top))
+        if lo >= hi:
+            return None
+        return max(range(lo, hi), key=self.timestamps.__getitem__)
+
+    def record(self, bottom: float, top: float, timestamp: float, trigger_count: int):
+        """
+        Stores a zone triggered at `timestamp`. Stored zones it matches are replaced by it,
+        which keeps the index disjoint.
+        """
+        bottom, top = self._normalize(bottom, top)
+        lo, hi = self._overlapping(bottom, top)
+        del self.bottoms[lo:hi], self.tops[lo:hi], self.timestamps[lo:hi], self.trigger_counts[lo:hi]
+        self.bottoms.insert(lo, bottom)
+        self.tops.insert(lo, top)
+        self.timestamps.insert(lo, timestamp)
+        self.trigger_counts.insert(lo, trigger_count)
+
+    def prune(self, cutoff: float):
+        """Drops zones last triggered before `cutoff`."""
+        if not self.timestamps or min(self.timestamps) >= cutoff:
+            return
+        keep = [i for i, ts in enumerate(self.timestamps) if ts >= cutoff]
+        self.bottoms = [self.bottoms[i] for i in keep]
+        self.tops = [self.tops[i] for i in keep]
+        self.timestamps = [self.timestamps[i] for i in keep]
+        self.trigger_counts = [self.trigger_counts[i] for i in keep]
+
+    def to_rows(self):
+        return [list(row) for row in zip(self.bottoms, self.tops, self.timestamps, self.trigger_counts)]
+
+    def load_rows(self, rows):
+        for bottom, top, timestamp, trigger_count in sorted(rows):
+            self.bottoms.append(bottom)
+            self.tops.append(top)
+            self.timestamps.append(timestamp)
+            self.trigger_counts.append(trigger_count)